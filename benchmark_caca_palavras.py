@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Medições de desempenho do Gerador de Caça-Palavras
+
+Uso:
+python benchmark_caca_palavras.py importacao
+python benchmark_caca_palavras.py executar [--saida resultados.json] [--rapido]
+python benchmark_caca_palavras.py comparar resultados.json baseline.json
+python benchmark_caca_palavras.py banco [--arquivo palavras.txt]
+python benchmark_caca_palavras.py backends
+python benchmark_caca_palavras.py raster
+
+O subcomando "importacao" mede o tempo de importação do módulo principal em
+um processo novo e falha se o orçamento for estourado ou se alguma biblioteca
+pesada for carregada junto com o núcleo.
+
+O subcomando "executar" mede, com sementes fixas e sem precisar de display, a
+geração da grade (criar_grade_vazia + inserir_palavras +
+preencher_espacos_vazios) e cada gerador de arquivo separadamente. O
+resultado é um JSON com tempo, pico de memória e taxa de sucesso de cada caso.
+
+O subcomando "comparar" aponta as regressões em relação a um baseline salvo e
+termina com código 1 se houver alguma.
+
+O subcomando "banco" monta um BancoPalavras (de um arquivo ou com palavras
+sintéticas) e mostra a memória do índice, o tempo de construção, o tempo
+médio de consulta e o tempo de empacotar uma grade até a densidade padrão.
+
+O subcomando "backends" gera os mesmos casos com cada backend do gerador e a
+mesma semente, compara o tempo e falha se algum deles colocar as palavras em
+posições diferentes das do backend 'linhas'.
+
+O subcomando "raster" renderiza as imagens (JPEG e PNG) em cada modo de cor e
+resolução, cada uma em um processo novo, e mostra o pico de memória residente
+(RSS) acrescentado pela renderização, o tempo e o tamanho dos arquivos.
+"""
+
+import argparse
+import json
+import os
+import platform
+import py_compile
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Orçamento para "import gerador_caca_palavras" em um processo limpo
+ORCAMENTO_IMPORTACAO_MS = 30.0
+
+# Bibliotecas que o núcleo não pode importar no carregamento do módulo
+MODULOS_PESADOS = ("tkinter", "reportlab", "PIL", "docx", "numpy")
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+VERSAO_RESULTADOS = 1
+
+# Casos de geração: (tamanho da grade, quantidade de palavras)
+CASOS_GERACAO = [(10, 10), (18, 15), (18, 30), (30, 30), (30, 60)]
+CASOS_GERACAO_RAPIDO = [(10, 10), (18, 15)]
+
+# Combinações de (usar_diagonais, usar_contrarias)
+OPCOES_DIRECAO = [(False, False), (False, True), (True, False), (True, True)]
+
+# Tamanhos de grade usados nos geradores de arquivo
+TAMANHOS_RENDER = [15, 30]
+TAMANHOS_RENDER_RAPIDO = [15]
+
+SEMENTE = 20240101
+
+# Tolerância padrão do modo de comparação (15% a mais de tempo ou memória)
+TOLERANCIA_PADRAO = 0.15
+
+# Palavras sintéticas do benchmark do banco e grades empacotadas com ele
+PALAVRAS_BANCO = 100000
+TAMANHOS_EMPACOTAMENTO = [15, 30]
+
+# Configurações do benchmark de imagens: (formato, modo, dpi, JPEG progressivo)
+CONFIGURACOES_RASTER = [
+    ('.jpeg', 'RGB', 300, False),
+    ('.jpeg', 'L', 300, False),
+    ('.jpeg', 'L', 300, True),
+    ('.png', 'L', 300, False),
+    ('.png', '1', 300, False),
+    ('.jpeg', 'L', 150, True),
+    ('.png', 'L', 150, False),
+    ('.png', '1', 100, False),
+]
+
+_SCRIPT_RASTER = """
+import json, resource, sys, time
+import gerador_caca_palavras as modulo
+gerador = modulo.GeradorCacaPalavras(semente={semente})
+gerador.criar_grade_vazia({tamanho})
+gerador.inserir_palavras({palavras!r}, True, True)
+gerador.preencher_espacos_vazios()
+import PIL.Image, PIL.ImageDraw
+# ru_maxrss vem em KB no Linux e em bytes no macOS
+unidade = 1 if sys.platform == 'darwin' else 1024
+antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unidade
+inicio = time.perf_counter()
+opcoes = {{'modo': {modo!r}, 'dpi': {dpi}}}
+if {formato!r} == '.jpeg':
+    opcoes['progressivo'] = {progressivo}
+arquivos = gerador.renderizar_em_memoria({formato!r}, **opcoes)
+tempo = time.perf_counter() - inicio
+depois = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unidade
+print(json.dumps({{'tempo_s': tempo, 'rss_render_kb': (depois - antes) / 1024.0,
+                  'rss_pico_kb': depois / 1024.0, 'bytes': [len(c) for _, c in arquivos]}}))
+"""
+
+_SCRIPT_IMPORTACAO = """
+import sys, time
+inicio = time.perf_counter()
+import gerador_caca_palavras
+fim = time.perf_counter()
+pesados = [m for m in {pesados!r} if m in sys.modules]
+print((fim - inicio) * 1000.0, ",".join(pesados))
+"""
+
+
+def medir_importacao(repeticoes=5):
+    """Mede o tempo de importação (melhor de N processos novos) e os módulos pesados carregados"""
+    # Mede com o bytecode já compilado, como em uma instalação real
+    py_compile.compile(os.path.join(DIRETORIO, "gerador_caca_palavras.py"))
+    script = _SCRIPT_IMPORTACAO.format(pesados=MODULOS_PESADOS)
+    tempos = []
+    pesados = set()
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", script], cwd=DIRETORIO,
+                               capture_output=True, text=True, check=True).stdout.split()
+        tempos.append(float(saida[0]))
+        if len(saida) > 1:
+            pesados.update(saida[1].split(","))
+    return {
+        'tempo_ms': min(tempos),
+        'orcamento_ms': ORCAMENTO_IMPORTACAO_MS,
+        'modulos_pesados': sorted(pesados),
+    }
+
+
+def palavras_sinteticas(quantidade, semente=SEMENTE):
+    """Lista fixa de palavras (4 a 10 letras) para os casos de benchmark"""
+    rng = random.Random(semente)
+    return [''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(4, 10)))
+            for _ in range(quantidade)]
+
+
+def _cronometrar(funcao, repeticoes):
+    """Tempos de cada execução da função"""
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def _medir(funcao, repeticoes):
+    """Executa a função com e sem tracemalloc; devolve (mediana do tempo, pico de memória em KB)"""
+    tempos = _cronometrar(funcao, repeticoes)
+
+    tracemalloc.start()
+    funcao(0)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tempos), pico / 1024.0
+
+
+def _gerar_grade(tamanho, palavras, usar_diagonais, usar_contrarias, semente, backend='linhas'):
+    """Gera uma grade completa com semente fixa; devolve (gerador, palavras não inseridas)"""
+    from gerador_caca_palavras import GeradorCacaPalavras
+    gerador = GeradorCacaPalavras(backend, semente=semente)
+    gerador.criar_grade_vazia(tamanho)
+    nao_inseridas = gerador.inserir_palavras(palavras, usar_diagonais, usar_contrarias)
+    gerador.preencher_espacos_vazios()
+    return gerador, nao_inseridas
+
+
+def medir_geracao(casos, repeticoes):
+    """Mede a geração da grade para cada caso e combinação de direções"""
+    resultados = {}
+    for tamanho, quantidade in casos:
+        palavras = palavras_sinteticas(quantidade)
+        for usar_diagonais, usar_contrarias in OPCOES_DIRECAO:
+            chave = (f"geracao/{tamanho}x{tamanho}/{quantidade}p/"
+                     f"{'diag' if usar_diagonais else 'hv'}-{'contr' if usar_contrarias else 'frente'}")
+            inseridas = []
+
+            def executar(i):
+                _, nao_inseridas = _gerar_grade(tamanho, palavras, usar_diagonais,
+                                                usar_contrarias, SEMENTE + i)
+                inseridas.append(quantidade - len(nao_inseridas))
+
+            tempo, memoria = _medir(executar, repeticoes)
+            resultados[chave] = {
+                'tempo_s': tempo,
+                'memoria_pico_kb': memoria,
+                'taxa_sucesso': sum(inseridas) / (len(inseridas) * quantidade),
+            }
+            print(f"{chave:40s} {tempo * 1000:9.2f} ms {memoria:9.0f} KB "
+                  f"{resultados[chave]['taxa_sucesso']:7.1%}")
+    return resultados
+
+
+def medir_backends(casos, repeticoes):
+    """Tempo de cada backend nos casos de geração; devolve (resultados, casos divergentes)"""
+    import gerador_caca_palavras as modulo
+    backends = [b for b in modulo.BACKENDS if b != 'numpy' or modulo.NUMPY_DISPONIVEL]
+    resultados = {}
+    divergentes = []
+    for tamanho, quantidade in casos:
+        palavras = palavras_sinteticas(quantidade)
+        for usar_diagonais, usar_contrarias in OPCOES_DIRECAO:
+            caso = (f"{tamanho}x{tamanho}/{quantidade}p/"
+                    f"{'diag' if usar_diagonais else 'hv'}-{'contr' if usar_contrarias else 'frente'}")
+            referencia = None
+            tempos = []
+            for backend in backends:
+                posicoes = []
+
+                def executar(i):
+                    gerador, _ = _gerar_grade(tamanho, palavras, usar_diagonais, usar_contrarias,
+                                              SEMENTE + i, backend)
+                    # O preenchimento do numpy usa outro sorteio: só as posições são comparadas
+                    posicoes.append(gerador.palavras_posicoes)
+
+                tempo = statistics.median(_cronometrar(executar, repeticoes))
+                resultados[f"backend/{backend}/{caso}"] = {'tempo_s': tempo}
+                tempos.append(f"{backend} {tempo * 1000:8.2f} ms")
+                if referencia is None:
+                    referencia = posicoes
+                elif posicoes != referencia:
+                    divergentes.append(f"{caso}: {backend}")
+            print(f"{caso:32s} {'  '.join(tempos)}")
+    return resultados, divergentes
+
+
+def medir_renderizacao(tamanhos, repeticoes):
+    """Mede gerar_pdf, gerar_jpeg e gerar_docx separadamente"""
+    import gerador_caca_palavras as modulo
+    disponiveis = {
+        'pdf': modulo.REPORTLAB_DISPONIVEL,
+        'jpeg': modulo.PILLOW_DISPONIVEL,
+        'docx': modulo.DOCX_DISPONIVEL,
+    }
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for tamanho in tamanhos:
+            palavras = palavras_sinteticas(tamanho)
+            gerador, _ = _gerar_grade(tamanho, palavras, True, True, SEMENTE)
+            geradores = {
+                'pdf': lambda caminho: gerador.gerar_pdf(caminho, palavras),
+                'jpeg': lambda caminho: gerador.gerar_jpeg(caminho, palavras, incluir_gabarito=True),
+                'docx': lambda caminho: gerador.gerar_docx(caminho, palavras),
+            }
+            for formato, gerar in geradores.items():
+                chave = f"render/{formato}/{tamanho}x{tamanho}"
+                if not disponiveis[formato]:
+                    print(f"{chave:40s} biblioteca indisponível")
+                    continue
+                caminho = os.path.join(pasta, f"bench.{formato}")
+                tempo, memoria = _medir(lambda i: gerar(caminho), repeticoes)
+                resultados[chave] = {'tempo_s': tempo, 'memoria_pico_kb': memoria}
+                print(f"{chave:40s} {tempo * 1000:9.2f} ms {memoria:9.0f} KB")
+    return resultados
+
+
+def executar_benchmarks(rapido=False, repeticoes=None):
+    """Roda todos os casos e devolve o dicionário de resultados"""
+    repeticoes = repeticoes or (3 if rapido else 7)
+    resultados = {}
+    resultados.update(medir_geracao(CASOS_GERACAO_RAPIDO if rapido else CASOS_GERACAO, repeticoes))
+    resultados.update(medir_renderizacao(TAMANHOS_RENDER_RAPIDO if rapido else TAMANHOS_RENDER,
+                                         max(1, repeticoes // 2)))
+    return {
+        'versao': VERSAO_RESULTADOS,
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+        },
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+
+
+def comparar_resultados(atual, baseline, tolerancia=TOLERANCIA_PADRAO):
+    """Lista as regressões de tempo, memória e taxa de sucesso em relação ao baseline"""
+    regressoes = []
+    for chave, base in baseline['resultados'].items():
+        novo = atual['resultados'].get(chave)
+        if novo is None:
+            continue
+        for metrica in ('tempo_s', 'memoria_pico_kb'):
+            if metrica in base and base[metrica] > 0 and novo[metrica] > base[metrica] * (1 + tolerancia):
+                regressoes.append(f"{chave}: {metrica} {base[metrica]:.4g} -> {novo[metrica]:.4g} "
+                                  f"(+{novo[metrica] / base[metrica] - 1:.0%})")
+        if 'taxa_sucesso' in base and novo['taxa_sucesso'] < base['taxa_sucesso']:
+            regressoes.append(f"{chave}: taxa_sucesso {base['taxa_sucesso']:.1%} -> "
+                              f"{novo['taxa_sucesso']:.1%}")
+    return regressoes
+
+
+def _carregar_json(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _relatar_regressoes(regressoes):
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões):")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        return 1
+    print("\nNenhuma regressão encontrada.")
+    return 0
+
+
+def comando_executar(args):
+    """Roda o benchmark e opcionalmente compara com um baseline"""
+    resultado = executar_benchmarks(args.rapido, args.repeticoes)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+    else:
+        print(json.dumps(resultado, indent=2))
+    if args.comparar:
+        return _relatar_regressoes(comparar_resultados(resultado, _carregar_json(args.comparar),
+                                                       args.tolerancia))
+    return 0
+
+
+def comando_comparar(args):
+    """Compara dois arquivos de resultados"""
+    regressoes = comparar_resultados(_carregar_json(args.atual), _carregar_json(args.baseline),
+                                     args.tolerancia)
+    return _relatar_regressoes(regressoes)
+
+
+def medir_banco(palavras, repeticoes=5):
+    """Construção, memória e consultas do BancoPalavras, mais o empacotamento de grades"""
+    from gerador_caca_palavras import BancoPalavras, GeradorCacaPalavras
+    tracemalloc.start()
+    banco = BancoPalavras(palavras)
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Sem o tracemalloc a construção é mais rápida: mede de novo
+    banco = BancoPalavras(palavras)
+
+    rng = random.Random(SEMENTE)
+    for _ in range(10000):
+        comprimento = rng.choice(banco.comprimentos)
+        banco.candidatos([rng.choice(string.ascii_uppercase) if rng.random() < 0.3 else None
+                          for _ in range(comprimento)])
+    resultado = banco.estatisticas()
+    resultado['memoria_total_kb'] = memoria / 1024.0
+
+    for tamanho in TAMANHOS_EMPACOTAMENTO:
+        colocadas = []
+
+        def executar(i):
+            gerador = GeradorCacaPalavras(semente=SEMENTE + i)
+            gerador.criar_grade_vazia(tamanho)
+            colocadas.append(len(gerador.empacotar_palavras(banco, usar_diagonais=True)))
+
+        resultado[f'empacotamento_{tamanho}x{tamanho}'] = {
+            'tempo_s': statistics.median(_cronometrar(executar, repeticoes)),
+            'palavras': statistics.median(colocadas),
+        }
+    return resultado
+
+
+def comando_banco(args):
+    """Mede o banco de palavras"""
+    if args.arquivo:
+        with open(args.arquivo, encoding='utf-8') as arquivo:
+            palavras = arquivo.read().split('\n')
+    else:
+        palavras = palavras_sinteticas(args.palavras)
+    resultado = medir_banco(palavras, args.repeticoes)
+    print(f"Palavras no banco:    {resultado['palavras']}")
+    print(f"Memória do índice:    {resultado['memoria_indice_kb']:.0f} KB "
+          f"(palavras: {resultado['memoria_palavras_kb']:.0f} KB, "
+          f"total alocado: {resultado['memoria_total_kb']:.0f} KB)")
+    print(f"Construção:           {resultado['tempo_construcao_s'] * 1000:.0f} ms")
+    print(f"Consulta (média):     {resultado['tempo_medio_consulta_us']:.1f} us")
+    for tamanho in TAMANHOS_EMPACOTAMENTO:
+        empacotamento = resultado[f'empacotamento_{tamanho}x{tamanho}']
+        print(f"Empacotar {tamanho}x{tamanho}:".ljust(22) +
+              f"{empacotamento['tempo_s'] * 1000:.1f} ms ({empacotamento['palavras']:.0f} palavras)")
+    return 0
+
+
+def comando_backends(args):
+    """Compara o tempo e as posições dos backends"""
+    _, divergentes = medir_backends(CASOS_GERACAO_RAPIDO if args.rapido else CASOS_GERACAO,
+                                    args.repeticoes)
+    if divergentes:
+        print(f"\nERRO: posições diferentes do backend 'linhas': {', '.join(divergentes)}")
+        return 1
+    print("\nTodos os backends colocaram as palavras nas mesmas posições.")
+    return 0
+
+
+def medir_raster(tamanho=15):
+    """Pico de RSS, tempo e tamanho das imagens em cada configuração (um processo novo por medição)"""
+    palavras = palavras_sinteticas(tamanho)
+    resultados = {}
+    for formato, modo, dpi, progressivo in CONFIGURACOES_RASTER:
+        script = _SCRIPT_RASTER.format(semente=SEMENTE, tamanho=tamanho, palavras=palavras,
+                                       formato=formato, modo=modo, dpi=dpi, progressivo=progressivo)
+        saida = subprocess.run([sys.executable, "-c", script], cwd=DIRETORIO,
+                               capture_output=True, text=True, check=True).stdout
+        chave = f"raster/{formato[1:]}/{modo}/{dpi}dpi{'/progressivo' if progressivo else ''}"
+        resultados[chave] = json.loads(saida)
+    return resultados
+
+
+def comando_raster(args):
+    """Mostra a memória e o tempo das imagens em cada modo e resolução"""
+    try:
+        import resource  # noqa: F401 (só para saber se o RSS pode ser medido)
+    except ImportError:
+        print("ERRO: o módulo resource não existe nesta plataforma")
+        return 1
+    import gerador_caca_palavras as modulo
+    if not modulo.PILLOW_DISPONIVEL:
+        print("ERRO: Pillow não está instalado")
+        return 1
+    for chave, medida in medir_raster(args.tamanho).items():
+        print(f"{chave:36s} RSS +{medida['rss_render_kb'] / 1024:7.1f} MB "
+              f"(pico {medida['rss_pico_kb'] / 1024:6.1f} MB) {medida['tempo_s'] * 1000:8.1f} ms  "
+              f"{' + '.join(f'{b // 1024} KB' for b in medida['bytes'])}")
+    return 0
+
+
+def comando_importacao(args):
+    """Verifica o orçamento de importação do núcleo"""
+    resultado = medir_importacao(args.repeticoes)
+    print(f"Importação: {resultado['tempo_ms']:.1f} ms "
+          f"(orçamento: {resultado['orcamento_ms']:.0f} ms)")
+    falhou = False
+    if resultado['modulos_pesados']:
+        print(f"ERRO: módulos pesados importados: {', '.join(resultado['modulos_pesados'])}")
+        falhou = True
+    if resultado['tempo_ms'] > args.orcamento:
+        print("ERRO: tempo de importação acima do orçamento")
+        falhou = True
+    return 1 if falhou else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Gerador de Caça-Palavras")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_importacao = subcomandos.add_parser("importacao", help="mede o tempo de importação do núcleo")
+    p_importacao.add_argument("--repeticoes", type=int, default=5)
+    p_importacao.add_argument("--orcamento", type=float, default=ORCAMENTO_IMPORTACAO_MS,
+                              help="limite em milissegundos")
+    p_importacao.set_defaults(funcao=comando_importacao)
+
+    p_executar = subcomandos.add_parser("executar", help="mede a geração e os geradores de arquivo")
+    p_executar.add_argument("--saida", help="arquivo JSON com os resultados")
+    p_executar.add_argument("--rapido", action="store_true", help="menos casos e repetições")
+    p_executar.add_argument("--repeticoes", type=int, default=None)
+    p_executar.add_argument("--comparar", metavar="BASELINE", help="compara com um baseline salvo")
+    p_executar.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    p_executar.set_defaults(funcao=comando_executar)
+
+    p_comparar = subcomandos.add_parser("comparar", help="compara resultados com um baseline")
+    p_comparar.add_argument("atual")
+    p_comparar.add_argument("baseline")
+    p_comparar.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    p_comparar.set_defaults(funcao=comando_comparar)
+
+    p_banco = subcomandos.add_parser("banco", help="mede o índice do banco de palavras")
+    p_banco.add_argument("--arquivo", help="arquivo com uma palavra por linha (padrão: palavras sintéticas)")
+    p_banco.add_argument("--palavras", type=int, default=PALAVRAS_BANCO,
+                         help="quantidade de palavras sintéticas")
+    p_banco.add_argument("--repeticoes", type=int, default=5)
+    p_banco.set_defaults(funcao=comando_banco)
+
+    p_backends = subcomandos.add_parser("backends", help="compara os backends de posicionamento")
+    p_backends.add_argument("--rapido", action="store_true", help="menos casos")
+    p_backends.add_argument("--repeticoes", type=int, default=5)
+    p_backends.set_defaults(funcao=comando_backends)
+
+    p_raster = subcomandos.add_parser("raster", help="memória e tempo das imagens por modo e resolução")
+    p_raster.add_argument("--tamanho", type=int, default=15, help="tamanho da grade")
+    p_raster.set_defaults(funcao=comando_raster)
+
+    args = parser.parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,325 +11,2159 @@ pip install reportlab Pillow python-docx
 Se alguma biblioteca estiver faltando, instale usando o comando acima.
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+import collections
+import functools
+import queue
 import random
+import re
 import string
+import struct
 import os
+import sys
+import threading
+import time
 import unicodedata
+import importlib.util
+
+# As bibliotecas pesadas (tkinter, reportlab, Pillow e python-docx) só são
+# importadas no primeiro uso. Assim o núcleo do gerador funciona em servidores
+# sem display e não paga o tempo de importação em processos curtos.
+REPORTLAB_DISPONIVEL = importlib.util.find_spec("reportlab") is not None
+PILLOW_DISPONIVEL = importlib.util.find_spec("PIL") is not None
+DOCX_DISPONIVEL = importlib.util.find_spec("docx") is not None
+NUMPY_DISPONIVEL = importlib.util.find_spec("numpy") is not None
+PYPDF_DISPONIVEL = importlib.util.find_spec("pypdf") is not None
+
+# Preenchidos por _importar_tkinter() quando a interface gráfica é aberta
+tk = ttk = messagebox = scrolledtext = filedialog = None
+
+# Preenchido por _importar_numpy() quando a grade numpy é usada
+np = None
+
+
+def _importar_tkinter():
+    """Importa o tkinter sob demanda (somente a interface gráfica precisa dele)"""
+    global tk, ttk, messagebox, scrolledtext, filedialog
+    if tk is None:
+        import tkinter as tk
+        from tkinter import ttk, messagebox, scrolledtext, filedialog
+
+
+def _importar_numpy():
+    """Importa o numpy sob demanda (somente a grade numpy precisa dele)"""
+    global np
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Biblioteca numpy não está instalada. Use: pip install numpy")
+
+
+# Deslocamento (linha, coluna) de cada direção:
+# 0=horizontal direita, 1=horizontal esquerda,
+# 2=vertical baixo, 3=vertical cima
+# 4=diagonal baixo-direita, 5=diagonal baixo-esquerda
+# 6=diagonal cima-direita, 7=diagonal cima-esquerda
+DIRECOES = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# Eixo de leitura de cada direção e se ela percorre o eixo ao contrário
+# (eixos: 0=horizontal, 1=vertical, 2=diagonal baixo-direita, 3=diagonal baixo-esquerda)
+EIXO_DIRECAO = [(0, False), (0, True), (1, False), (1, True),
+                (2, False), (3, False), (3, True), (2, True)]
+
+# Quantas palavras já colocadas podem ser desfeitas quando uma palavra não cabe
+PROFUNDIDADE_RETROCESSO = 3
+
+# Sorteios de posição antes de listar todas as posições legais da palavra
+TENTATIVAS_SORTEIO = 50
+
+# Limites de tamanho da grade (JPEG e DOCX ficam ilegíveis acima de 30x30)
+TAMANHO_MINIMO = 5
+TAMANHO_MAXIMO = 300
+TAMANHO_MAXIMO_JPEG_DOCX = 30
+
+# Valor do tamanho que pede a menor grade em que todas as palavras cabem
+TAMANHO_AUTOMATICO = "auto"
+# Sorteios de arranjo por tamanho testado na busca do tamanho automático
+TENTATIVAS_TAMANHO_AUTOMATICO = 3
+# Limite de retrocessos em cada teste (um tamanho apertado desiste mais cedo)
+RETROCESSOS_TAMANHO_AUTOMATICO = 50
+# Palavras colocadas pela busca completa que encerra o teste de um tamanho
+PASSOS_BUSCA_TAMANHO_AUTOMATICO = 200
+
+# Abaixo deste tamanho de célula (em pontos) o PDF é dividido em várias páginas
+TAMANHO_MINIMO_CELULA_PDF = 12
+# Tamanho da célula nas páginas do PDF dividido
+TAMANHO_CELULA_MOSAICO_PDF = 16
+
+# Formato binário dos puzzles salvos (grade + posição inicial, direção e
+# comprimento de cada palavra); a versão muda a cada alteração no layout
+MAGICO_PUZZLE = b'CACA'
+MAGICO_COLECAO = b'CACL'
+VERSAO_FORMATO_PUZZLE = 1
+EXTENSAO_PUZZLE = '.caca'
+# magico, versão, reservado, tamanho, nº de palavras colocadas, nº de palavras da lista
+CABECALHO_PUZZLE = struct.Struct('<4sBxHHH')
+# linha, coluna, direção, comprimento
+REGISTRO_PALAVRA = struct.Struct('<HHBH')
+# magico, versão, nº de puzzles; seguido de (deslocamento, comprimento) por puzzle
+CABECALHO_COLECAO = struct.Struct('<4sBxxxI')
+ENTRADA_COLECAO = struct.Struct('<QQ')
+
+# Limite padrão (em bytes) do cache de arquivos gerados; muda a versão quando
+# os arquivos gerados mudam, para não servir saídas antigas
+TAMANHO_MAXIMO_CACHE_SAIDAS = 256 * 1024 * 1024
+VERSAO_CACHE_SAIDAS = 3
+
+# Gabaritos reduzidos por página no apêndice do caderno de puzzles
+GABARITOS_POR_PAGINA = 4
+
+# Opção que gera PDF, JPEG e DOCX a partir da mesma grade
+FORMATO_TODOS = "todos"
+
+# Intervalo (ms) em que a interface lê o progresso da thread de geração
+INTERVALO_PROGRESSO_MS = 50
+
+# Prévia na janela: espera (ms) depois da última alteração antes de recalcular,
+# lado do quadro de desenho (px) e maior grade desenhada
+ATRASO_PREVIA_MS = 300
+TAMANHO_PREVIA_PX = 420
+TAMANHO_MAXIMO_PREVIA = 40
+
+# Marca de célula vazia nas linhas do índice
+VAZIO = '\0'
+
+# Palavras que nunca devem aparecer por acaso nas letras de preenchimento
+# (cada instalação pode completar a lista ou passar a sua própria)
+PALAVRAS_BLOQUEADAS = ()
+
+# Rodadas de correção do preenchimento antes de desistir das ocorrências restantes
+RODADAS_CORRECAO_PREENCHIMENTO = 50
+
+# Quantas palavras normalizadas ficam no cache compartilhado entre os puzzles
+TAMANHO_CACHE_NORMALIZACAO = 8192
+
+# Empacotamento com banco de palavras: fração das células a cobrir com palavras
+DENSIDADE_EMPACOTAMENTO = 0.6
+
+# Janelas sorteadas a cada palavra do empacotamento e rodadas seguidas sem
+# nenhuma palavra que caiba antes de desistir
+AMOSTRAS_EMPACOTAMENTO = 48
+FALHAS_EMPACOTAMENTO = 40
+
+# Palavras mais curtas que isso ficam fora do banco
+COMPRIMENTO_MINIMO_BANCO = 3
+
+# Colunas da lista de palavras abaixo da grade quando duas não bastam
+COLUNAS_MAXIMAS_LISTA = 4
+
+# Imagens: resolução da página A4 (as medidas do desenho são dadas em 300 DPI)
+# e qualidade padrão do JPEG
+DPI_IMAGEM = 300
+QUALIDADE_JPEG = 95
+
+# Modos das imagens: RGB (padrão do JPEG), cinza de 8 bits ou 1 bit. Fora do
+# RGB o gabarito é desenhado em paleta, com 16 tons de cinza mais as cores
+# dos destaques, ocupando um byte por pixel em vez de três.
+MODOS_IMAGEM = ('RGB', 'L', '1')
+CORES_GABARITO_IMAGEM = [
+    (255, 0, 0), (0, 0, 255), (0, 128, 0), (255, 165, 0),
+    (128, 0, 128), (165, 42, 42), (255, 192, 203), (0, 255, 255)
+]
+TONS_CINZA_PALETA = 16
+FORMATOS_IMAGEM = ('.jpeg', '.png')
+
+
+class GeracaoCancelada(Exception):
+    """Lançada pelo callback de progresso para interromper a geração"""
+
+
+def remover_acentos(texto):
+    """Remove acentos de uma string"""
+    nfkd = unicodedata.normalize('NFKD', texto)
+    return ''.join([c for c in nfkd if not unicodedata.combining(c)])
+
+
+class PalavraNormalizada:
+    """Palavra convertida uma única vez para a forma gravada na grade
+
+    Guarda a grafia original (usada na lista de palavras), o texto em
+    maiúsculas sem acentos e sem espaços, os códigos Latin-1 desse texto e os
+    padrões de busca do índice, compilados no primeiro uso.
+    """
+
+    __slots__ = ('original', 'texto', 'codigos', '_padroes')
+
+    def __init__(self, original):
+        self.original = original
+        self.texto = remover_acentos(original.upper()).replace(" ", "")
+        try:
+            self.codigos = self.texto.encode('latin-1')
+        except UnicodeEncodeError:
+            self.codigos = None
+        self._padroes = {}
+
+    def __len__(self):
+        return len(self.texto)
+
+    def __repr__(self):
+        return f"PalavraNormalizada({self.original!r})"
+
+    def padrao(self, contraria=False):
+        """Regex que acha as janelas de uma linha do índice em que a palavra cabe"""
+        padrao = self._padroes.get(contraria)
+        if padrao is None:
+            letras = self.texto[::-1] if contraria else self.texto
+            padrao = re.compile('(?=' + ''.join(
+                '[' + VAZIO + re.escape(letra) + ']' for letra in letras) + ')')
+            self._padroes[contraria] = padrao
+        return padrao
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_NORMALIZACAO)
+def _normalizar_texto(palavra):
+    return PalavraNormalizada(palavra)
+
+
+def normalizar_palavra(palavra):
+    """Devolve a PalavraNormalizada da palavra, usando o cache compartilhado do processo"""
+    if isinstance(palavra, PalavraNormalizada):
+        return palavra
+    return _normalizar_texto(palavra)
+
+
+def estatisticas_normalizacao():
+    """Acertos, falhas e ocupação do cache de normalização"""
+    info = _normalizar_texto.cache_info()
+    return {
+        'acertos': info.hits,
+        'falhas': info.misses,
+        'tamanho': info.currsize,
+        'capacidade': info.maxsize,
+    }
+
+
+def limpar_cache_normalizacao():
+    """Esvazia o cache de normalização e zera os contadores"""
+    _normalizar_texto.cache_clear()
+
+
+def direcoes_disponiveis(usar_diagonais=False, usar_contrarias=True):
+    """Devolve a lista de direções permitidas pelas opções"""
+    if usar_diagonais:
+        if usar_contrarias:
+            # Todas as direções (0-7)
+            return list(range(8))
+        # Apenas direções "para frente": horizontal direita, vertical baixo, diagonais para baixo
+        return [0, 2, 4, 5]
+    if usar_contrarias:
+        # Apenas horizontal e vertical (todas)
+        return [0, 1, 2, 3]
+    # Apenas horizontal direita e vertical para baixo
+    return [0, 2]
+
+
+class IndiceLinhas:
+    """Índice da grade organizado pelas linhas de leitura
+
+    Cada linha horizontal, vertical e diagonal é guardada como uma string com
+    VAZIO nas células livres. Assim todas as posições legais de uma palavra
+    saem de uma busca de regex por linha, em vez de testar célula por célula.
+    """
+
+    # Passo (linha, coluna) ao longo de cada eixo
+    PASSOS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+    def __init__(self, grade):
+        n = len(grade)
+        self.tamanho = n
+        self.linhas = [[], [], [], []]
+        self.inicios = [[], [], [], []]
+        for eixo, (passo_l, passo_c) in enumerate(self.PASSOS):
+            for inicio in self._inicios_eixo(eixo):
+                linha, coluna = inicio
+                letras = []
+                while 0 <= linha < n and 0 <= coluna < n:
+                    letras.append(grade[linha][coluna] or VAZIO)
+                    linha += passo_l
+                    coluna += passo_c
+                self.inicios[eixo].append(inicio)
+                self.linhas[eixo].append(''.join(letras))
+
+    def _inicios_eixo(self, eixo):
+        """Células iniciais de todas as linhas de um eixo"""
+        n = self.tamanho
+        if eixo == 0:
+            return [(l, 0) for l in range(n)]
+        if eixo == 1:
+            return [(0, c) for c in range(n)]
+        if eixo == 2:
+            return [(max(0, -d), max(0, d)) for d in range(-(n - 1), n)]
+        return [(max(0, s - (n - 1)), min(s, n - 1)) for s in range(2 * n - 1)]
+
+    def _localizar(self, eixo, linha, coluna):
+        """Índice da linha do eixo que contém a célula e a posição dela nessa linha"""
+        n = self.tamanho
+        if eixo == 0:
+            return linha, coluna
+        if eixo == 1:
+            return coluna, linha
+        if eixo == 2:
+            return coluna - linha + n - 1, min(linha, coluna)
+        return linha + coluna, linha - max(0, linha + coluna - (n - 1))
+
+    def escrever(self, linha, coluna, letra):
+        """Atualiza a célula em todos os eixos (letra None esvazia a célula)"""
+        letra = letra or VAZIO
+        for eixo in range(4):
+            indice, pos = self._localizar(eixo, linha, coluna)
+            texto = self.linhas[eixo][indice]
+            self.linhas[eixo][indice] = texto[:pos] + letra + texto[pos + 1:]
+
+    def cabe(self, palavra, linha, coluna, direcao):
+        """Verifica uma única posição da PalavraNormalizada"""
+        n = self.tamanho
+        passo_l, passo_c = DIRECOES[direcao]
+        fim_l = linha + (len(palavra) - 1) * passo_l
+        fim_c = coluna + (len(palavra) - 1) * passo_c
+        if not (0 <= linha < n and 0 <= coluna < n and 0 <= fim_l < n and 0 <= fim_c < n):
+            return False
+        eixo, contraria = EIXO_DIRECAO[direcao]
+        # Na direção contrária a janela da linha começa na última letra
+        indice, pos = self._localizar(eixo, fim_l, fim_c) if contraria else self._localizar(eixo, linha, coluna)
+        return palavra.padrao(contraria).match(self.linhas[eixo][indice], pos) is not None
+
+    def posicoes_validas(self, palavra, direcoes, contar_sobreposicoes=False):
+        """Lista (linha, coluna, direcao) de todas as posições legais da PalavraNormalizada
+
+        A lista sai ordenada por (direcao, linha, coluna). Com
+        contar_sobreposicoes=True devolve também quantas letras de cada posição
+        já estão na grade.
+        """
+        tamanho_palavra = len(palavra)
+        posicoes = []
+        for direcao in direcoes:
+            eixo, contraria = EIXO_DIRECAO[direcao]
+            padrao = palavra.padrao(contraria)
+            passo_l, passo_c = self.PASSOS[eixo]
+            # Na direção contrária a palavra começa no fim da janela encontrada
+            deslocamento = tamanho_palavra - 1 if contraria else 0
+            encontradas = []
+            for texto, (linha0, coluna0) in zip(self.linhas[eixo], self.inicios[eixo]):
+                if len(texto) < tamanho_palavra:
+                    continue
+                for m in padrao.finditer(texto):
+                    k = m.start() + deslocamento
+                    posicao = (linha0 + k * passo_l, coluna0 + k * passo_c, direcao)
+                    if contar_sobreposicoes:
+                        janela = texto[m.start():m.start() + tamanho_palavra]
+                        posicao += (tamanho_palavra - janela.count(VAZIO),)
+                    encontradas.append(posicao)
+            encontradas.sort()
+            posicoes.extend(encontradas)
+        return posicoes
+
+
+class GradeNumpy:
+    """Grade guardada em uma matriz numpy uint8 (0 = célula vazia)
+
+    As letras são gravadas pelo código Latin-1. A viabilidade de uma palavra é
+    calculada de uma vez para todas as células iniciais e direções, como uma
+    máscara booleana (direcao, linha, coluna).
+    """
+
+    def __init__(self, grade):
+        _importar_numpy()
+        self.tamanho = len(grade)
+        self.codigos = np.zeros((self.tamanho, self.tamanho), dtype=np.uint8)
+        for i, linha in enumerate(grade):
+            for j, letra in enumerate(linha):
+                if letra is not None:
+                    self.codigos[i, j] = self.codificar(letra)[0]
+        self._listas = None
+
+    @staticmethod
+    def codificar(texto):
+        """Converte o texto (ou PalavraNormalizada) nos códigos uint8 da grade"""
+        if isinstance(texto, PalavraNormalizada):
+            codigos = texto.codigos
+        else:
+            try:
+                codigos = texto.encode('latin-1')
+            except UnicodeEncodeError:
+                codigos = None
+        if codigos is None:
+            raise ValueError(f"Caractere não suportado pela grade numpy: {texto}")
+        return np.frombuffer(codigos, dtype=np.uint8)
+
+    def como_listas(self):
+        """Visão lista de listas (str/None) usada pelos geradores de arquivo"""
+        if self._listas is None:
+            self._listas = [[chr(codigo) if codigo else None for codigo in linha]
+                            for linha in self.codigos.tolist()]
+        return self._listas
+
+    def escrever(self, linha, coluna, letra):
+        """Grava uma letra na célula (None esvazia a célula)"""
+        self.codigos[linha, coluna] = self.codificar(letra)[0] if letra else 0
+        # A visão em listas é atualizada no lugar: refazê-la custaria a grade inteira
+        if self._listas is not None:
+            self._listas[linha][coluna] = letra or None
+
+    def colocar(self, palavra, linha, coluna, direcao):
+        """Grava a PalavraNormalizada de uma vez e devolve as células que estavam vazias
+        
+        Como nos outros backends, só as células vazias são escritas.
+        """
+        passo_l, passo_c = DIRECOES[direcao]
+        passos = np.arange(len(palavra))
+        vazias = passos[self.codigos[linha + passos * passo_l, coluna + passos * passo_c] == 0]
+        linhas = linha + vazias * passo_l
+        colunas = coluna + vazias * passo_c
+        self.codigos[linhas, colunas] = self.codificar(palavra)[vazias]
+        celulas = list(zip(linhas.tolist(), colunas.tolist()))
+        if self._listas is not None:
+            for (l, c), i in zip(celulas, vazias.tolist()):
+                self._listas[l][c] = palavra.texto[i]
+        return celulas
+
+    def cabe(self, palavra, linha, coluna, direcao):
+        """Verifica uma única posição da PalavraNormalizada"""
+        n = self.tamanho
+        passo_l, passo_c = DIRECOES[direcao]
+        fim_l = linha + (len(palavra) - 1) * passo_l
+        fim_c = coluna + (len(palavra) - 1) * passo_c
+        if not (0 <= linha < n and 0 <= coluna < n and 0 <= fim_l < n and 0 <= fim_c < n):
+            return False
+        passos = np.arange(len(palavra))
+        atuais = self.codigos[linha + passos * passo_l, coluna + passos * passo_c]
+        return bool(np.all((atuais == 0) | (atuais == self.codificar(palavra))))
+
+    def preencher_vazios(self, letras, semente=None):
+        """Preenche as células vazias com letras sorteadas em uma única escrita"""
+        vazias = self.codigos == 0
+        rng = np.random.default_rng(semente)
+        alfabeto = self.codificar(letras)
+        self.codigos[vazias] = rng.choice(alfabeto, size=int(vazias.sum()))
+        self._listas = None
+
+    def mascara_posicoes(self, palavra, direcoes, contar_sobreposicoes=False):
+        """Máscara booleana (8, n, n) das posições legais da PalavraNormalizada
+
+        Com contar_sobreposicoes=True devolve também uma matriz com quantas
+        letras de cada posição já estão na grade.
+        """
+        n = self.tamanho
+        codigos = self.codificar(palavra)
+        borda = len(codigos) - 1
+        vazias = self.codigos == 0
+
+        # Para cada letra: onde ela pode ficar (célula vazia ou mesma letra),
+        # com uma borda False em volta para que deslocamentos fora da grade falhem
+        permitidas = {}
+        for codigo in set(codigos.tolist()):
+            permitida = np.zeros((n + 2 * borda, n + 2 * borda), dtype=bool)
+            permitida[borda:borda + n, borda:borda + n] = vazias | (self.codigos == codigo)
+            permitidas[codigo] = permitida
+        if contar_sobreposicoes:
+            ocupadas = np.zeros((n + 2 * borda, n + 2 * borda), dtype=np.int32)
+            ocupadas[borda:borda + n, borda:borda + n] = ~vazias
+
+        mascara = np.zeros((8, n, n), dtype=bool)
+        sobreposicoes = np.zeros((8, n, n), dtype=np.int32) if contar_sobreposicoes else None
+        for direcao in direcoes:
+            passo_l, passo_c = DIRECOES[direcao]
+            legal = np.ones((n, n), dtype=bool)
+            for i, codigo in enumerate(codigos.tolist()):
+                l0 = borda + i * passo_l
+                c0 = borda + i * passo_c
+                legal &= permitidas[codigo][l0:l0 + n, c0:c0 + n]
+                if contar_sobreposicoes:
+                    sobreposicoes[direcao] += ocupadas[l0:l0 + n, c0:c0 + n]
+            mascara[direcao] = legal
+        if contar_sobreposicoes:
+            return mascara, sobreposicoes
+        return mascara
+
+    def posicoes_validas(self, palavra, direcoes, contar_sobreposicoes=False):
+        """Mesma interface de IndiceLinhas.posicoes_validas, calculada pela máscara"""
+        if contar_sobreposicoes:
+            mascara, sobreposicoes = self.mascara_posicoes(palavra, direcoes, True)
+            return [(l, c, d, s) for (d, l, c), s in
+                    zip(np.argwhere(mascara).tolist(), sobreposicoes[mascara].tolist())]
+        mascara = self.mascara_posicoes(palavra, direcoes)
+        return [(l, c, d) for d, l, c in np.argwhere(mascara).tolist()]
+
+
+class GradeBits:
+    """Grade guardada como máscaras de bits (um inteiro por letra e um de ocupação)
+
+    A célula (linha, coluna) é o bit linha * (n + 1) + coluna: a coluna extra
+    de cada linha nunca é livre nem tem letra, então um passo que sai pela
+    lateral da grade cai nela e falha. As posições legais de uma palavra em
+    uma direção saem de um AND das máscaras de cada letra deslocadas pelo
+    passo da direção, para todas as células iniciais de uma vez.
+    """
+
+    def __init__(self, grade):
+        n = len(grade)
+        self.tamanho = n
+        self.passo = n + 1
+        self.letras = {}
+        self.ocupadas = 0
+        self.celulas = [None] * (n * self.passo)
+        # Bits das células de verdade (sem a coluna extra)
+        self.validas = sum(((1 << n) - 1) << (linha * self.passo) for linha in range(n))
+        for i, linha in enumerate(grade):
+            for j, letra in enumerate(linha):
+                if letra is not None:
+                    self.escrever(i, j, letra)
+
+    def escrever(self, linha, coluna, letra):
+        """Atualiza a célula nas máscaras (letra None esvazia a célula)"""
+        posicao = linha * self.passo + coluna
+        bit = 1 << posicao
+        anterior = self.celulas[posicao]
+        if anterior is not None:
+            self.letras[anterior] &= ~bit
+            self.ocupadas &= ~bit
+        self.celulas[posicao] = letra
+        if letra is not None:
+            self.letras[letra] = self.letras.get(letra, 0) | bit
+            self.ocupadas |= bit
+
+    def _deslocamento(self, direcao):
+        passo_l, passo_c = DIRECOES[direcao]
+        return passo_l * self.passo + passo_c
+
+    def cabe(self, palavra, linha, coluna, direcao):
+        """Verifica uma única posição da PalavraNormalizada"""
+        n = self.tamanho
+        passo_l, passo_c = DIRECOES[direcao]
+        fim_l = linha + (len(palavra) - 1) * passo_l
+        fim_c = coluna + (len(palavra) - 1) * passo_c
+        if not (0 <= linha < n and 0 <= coluna < n and 0 <= fim_l < n and 0 <= fim_c < n):
+            return False
+        deslocamento = self._deslocamento(direcao)
+        posicao = linha * self.passo + coluna
+        for i, letra in enumerate(palavra.texto):
+            bit = 1 << (posicao + i * deslocamento)
+            if self.ocupadas & bit and not self.letras.get(letra, 0) & bit:
+                return False
+        return True
+
+    def mascara_posicoes(self, palavra, direcao):
+        """Bits das células iniciais em que a PalavraNormalizada cabe na direção"""
+        deslocamento = self._deslocamento(direcao)
+        livres = self.validas & ~self.ocupadas
+        legal = self.validas
+        for i, letra in enumerate(palavra.texto):
+            # Célula inicial p é legal se a célula p + i * deslocamento aceita a letra i
+            permitida = livres | self.letras.get(letra, 0)
+            k = i * deslocamento
+            legal &= permitida >> k if k >= 0 else permitida << -k
+            if not legal:
+                break
+        return legal
+
+    def _contar_sobreposicoes(self, palavra, direcao, legal):
+        """Para cada célula inicial legal, quantas letras da palavra já estão na grade"""
+        deslocamento = self._deslocamento(direcao)
+        # Soma bit a bit (com vai-um) da ocupação deslocada: um plano por bit do total
+        planos = []
+        for i in range(len(palavra)):
+            k = i * deslocamento
+            vai_um = (self.ocupadas >> k if k >= 0 else self.ocupadas << -k) & legal
+            for p, plano in enumerate(planos):
+                planos[p], vai_um = plano ^ vai_um, plano & vai_um
+                if not vai_um:
+                    break
+            if vai_um:
+                planos.append(vai_um)
+        contagens = [0] * len(self.celulas)
+        for p, plano in enumerate(planos):
+            for posicao in _bits_ativos(plano):
+                contagens[posicao] += 1 << p
+        return contagens
+
+    def posicoes_validas(self, palavra, direcoes, contar_sobreposicoes=False):
+        """Mesma interface de IndiceLinhas.posicoes_validas, calculada pelas máscaras"""
+        passo = self.passo
+        posicoes = []
+        for direcao in direcoes:
+            legal = self.mascara_posicoes(palavra, direcao)
+            if not legal:
+                continue
+            if contar_sobreposicoes:
+                contagens = self._contar_sobreposicoes(palavra, direcao, legal)
+                posicoes.extend((p // passo, p % passo, direcao, contagens[p]) for p in _bits_ativos(legal))
+            else:
+                posicoes.extend((p // passo, p % passo, direcao) for p in _bits_ativos(legal))
+        return posicoes
+
+
+def _bits_ativos(mascara):
+    """Posições dos bits 1 da máscara, em ordem crescente"""
+    # bin() começa pelo bit mais alto: invertido (sem o '0b'), o índice é a posição
+    return [p for p, bit in enumerate(bin(mascara)[:1:-1]) if bit == '1']
+
+
+# Estruturas que podem indexar a grade para a busca de posições
+BACKENDS = {
+    'linhas': IndiceLinhas,
+    'numpy': GradeNumpy,
+    'bits': GradeBits,
+}
+
+
+@functools.lru_cache(maxsize=32)
+def linhas_da_grade(tamanho):
+    """Células de cada linha de leitura da grade, nos quatro eixos
+    
+    A ordem é: horizontais, verticais, diagonais baixo-direita e diagonais
+    baixo-esquerda (veja indice_linhas_da_celula).
+    """
+    n = tamanho
+    linhas = [tuple((l, c) for c in range(n)) for l in range(n)]
+    linhas += [tuple((l, c) for l in range(n)) for c in range(n)]
+    for d in range(-(n - 1), n):
+        linhas.append(tuple((l, l + d) for l in range(max(0, -d), min(n, n - d))))
+    for soma in range(2 * n - 1):
+        linhas.append(tuple((l, soma - l) for l in range(max(0, soma - n + 1), min(n, soma + 1))))
+    return linhas
+
+
+def indice_linhas_da_celula(tamanho, linha, coluna):
+    """Índices (em linhas_da_grade) das quatro linhas de leitura que passam pela célula"""
+    n = tamanho
+    return (linha, n + coluna, 2 * n + (coluna - linha + n - 1), 2 * n + (2 * n - 1) + linha + coluna)
+
+
+class BuscadorPalavras:
+    """Autômato de Aho-Corasick para achar várias palavras de uma vez na grade
+    
+    Cada palavra entra no autômato também ao contrário, então percorrer as
+    linhas dos quatro eixos uma única vez cobre as oito direções.
+    """
+    
+    def __init__(self, palavras):
+        self.palavras = list(palavras)
+        self._transicoes = [{}]
+        self._falha = [0]
+        self._saidas = [()]
+        for indice, palavra in enumerate(self.palavras):
+            for texto, contraria in ((palavra, False), (palavra[::-1], True)):
+                estado = 0
+                for letra in texto:
+                    proximo = self._transicoes[estado].get(letra)
+                    if proximo is None:
+                        proximo = len(self._transicoes)
+                        self._transicoes[estado][letra] = proximo
+                        self._transicoes.append({})
+                        self._falha.append(0)
+                        self._saidas.append(())
+                    estado = proximo
+                self._saidas[estado] += ((indice, contraria, len(texto)),)
+        
+        # Ligações de falha em largura; cada estado herda as saídas do seu sufixo
+        fila = collections.deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for letra, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and letra not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                self._falha[proximo] = self._transicoes[falha].get(letra, 0)
+                self._saidas[proximo] += self._saidas[self._falha[proximo]]
+    
+    def buscar(self, grade, linhas):
+        """Ocorrências nas linhas de leitura dadas: lista de (índice da palavra, células)
+        
+        As células vêm na ordem de leitura da palavra. Células vazias (None)
+        interrompem qualquer ocorrência.
+        """
+        transicoes, falha, saidas = self._transicoes, self._falha, self._saidas
+        ocorrencias = []
+        for celulas in linhas:
+            estado = 0
+            for fim, (l, c) in enumerate(celulas):
+                letra = grade[l][c]
+                while estado and letra not in transicoes[estado]:
+                    estado = falha[estado]
+                estado = transicoes[estado].get(letra, 0)
+                for indice, contraria, comprimento in saidas[estado]:
+                    trecho = celulas[fim - comprimento + 1:fim + 1]
+                    ocorrencias.append((indice, trecho[::-1] if contraria else trecho))
+        return ocorrencias
+
+
+class BancoPalavras:
+    """Banco de palavras indexado por comprimento e pela letra em cada posição
+
+    As palavras de cada comprimento ficam numeradas em uma lista e, para cada
+    (posição, letra), um inteiro guarda como bits quais delas têm aquela letra
+    naquela posição. As palavras que cabem em uma janela da grade saem do AND
+    das máscaras das letras já gravadas nela. O banco é montado uma vez e pode
+    ser usado por qualquer número de puzzles.
+    """
+
+    def __init__(self, palavras, comprimento_minimo=COMPRIMENTO_MINIMO_BANCO):
+        inicio = time.perf_counter()
+        grupos = {}
+        vistas = set()
+        for original in palavras:
+            original = original.strip()
+            texto = remover_acentos(original.upper()).replace(" ", "")
+            if len(texto) < comprimento_minimo or not texto.isalpha() or texto in vistas:
+                continue
+            vistas.add(texto)
+            textos, originais = grupos.setdefault(len(texto), ([], []))
+            textos.append(texto)
+            originais.append(original)
+
+        self._textos = {}
+        self._originais = {}
+        self._mascaras = {}
+        self._todas = {}
+        for comprimento, (textos, originais) in sorted(grupos.items()):
+            # Os bits são montados em bytearrays e convertidos em inteiros no fim
+            num_bytes = (len(textos) + 7) // 8
+            buffers = [{} for _ in range(comprimento)]
+            for i, texto in enumerate(textos):
+                byte, bit = i >> 3, 1 << (i & 7)
+                for pos, letra in enumerate(texto):
+                    buffer = buffers[pos].get(letra)
+                    if buffer is None:
+                        buffer = buffers[pos][letra] = bytearray(num_bytes)
+                    buffer[byte] |= bit
+            self._textos[comprimento] = textos
+            self._originais[comprimento] = originais
+            self._mascaras[comprimento] = [{letra: int.from_bytes(buffer, 'little')
+                                            for letra, buffer in por_letra.items()}
+                                           for por_letra in buffers]
+            self._todas[comprimento] = (1 << len(textos)) - 1
+
+        self.comprimentos = sorted(self._textos)
+        self.tempo_construcao = time.perf_counter() - inicio
+        self.consultas = 0
+        self.tempo_consultas = 0.0
+
+    @classmethod
+    def de_arquivo(cls, caminho, comprimento_minimo=COMPRIMENTO_MINIMO_BANCO):
+        """Carrega um banco com uma palavra por linha (UTF-8)"""
+        with open(caminho, encoding='utf-8') as arquivo:
+            return cls(arquivo, comprimento_minimo)
+
+    def __len__(self):
+        return sum(len(textos) for textos in self._textos.values())
+
+    def candidatos(self, padrao):
+        """Máscara (int) das palavras do comprimento do padrão compatíveis com ele
+
+        O padrão é uma sequência com uma letra ou None (livre) por posição.
+        """
+        inicio = time.perf_counter()
+        comprimento = len(padrao)
+        resultado = self._todas.get(comprimento, 0)
+        if resultado:
+            mascaras = self._mascaras[comprimento]
+            for pos, letra in enumerate(padrao):
+                if letra is not None:
+                    resultado &= mascaras[pos].get(letra, 0)
+                    if not resultado:
+                        break
+        self.consultas += 1
+        self.tempo_consultas += time.perf_counter() - inicio
+        return resultado
+
+    def palavra(self, comprimento, indice):
+        """(texto normalizado, grafia original) da palavra de número indice"""
+        return self._textos[comprimento][indice], self._originais[comprimento][indice]
+
+    def buscar(self, padrao, limite=None):
+        """Grafias originais das palavras compatíveis com o padrão"""
+        mascara = self.candidatos(padrao)
+        originais = self._originais.get(len(padrao), [])
+        encontradas = []
+        while mascara and (limite is None or len(encontradas) < limite):
+            bit = mascara & -mascara
+            encontradas.append(originais[bit.bit_length() - 1])
+            mascara ^= bit
+        return encontradas
+
+    def sortear(self, mascara, rng):
+        """Número de uma palavra da máscara (a primeira a partir de uma posição sorteada)"""
+        inicio = rng.randrange(mascara.bit_length())
+        resto = mascara >> inicio
+        if not resto:
+            resto, inicio = mascara, 0
+        return inicio + (resto & -resto).bit_length() - 1
+
+    def estatisticas(self):
+        """Tamanho do banco, memória aproximada do índice e tempos de construção e consulta"""
+        memoria_indice = sum(sys.getsizeof(por_letra) + sum(sys.getsizeof(m) for m in por_letra.values())
+                             for mascaras in self._mascaras.values() for por_letra in mascaras)
+        memoria_palavras = sum(sys.getsizeof(lista) + sum(sys.getsizeof(t) for t in lista)
+                               for grupo in (self._textos, self._originais) for lista in grupo.values())
+        return {
+            'palavras': len(self),
+            'por_comprimento': {comprimento: len(textos) for comprimento, textos in self._textos.items()},
+            'memoria_indice_kb': memoria_indice / 1024.0,
+            'memoria_palavras_kb': memoria_palavras / 1024.0,
+            'tempo_construcao_s': self.tempo_construcao,
+            'consultas': self.consultas,
+            'tempo_medio_consulta_us': self.tempo_consultas / self.consultas * 1e6 if self.consultas else 0.0,
+        }
+
+
+# Fonte TrueType usada nas imagens (se não existir, usa a fonte padrão do Pillow)
+FONTE_JPEG = "arial.ttf"
+
+# Máscaras guardadas por atlas (uma por letra e fração de origem)
+GLIFOS_MAXIMOS_ATLAS = 2048
+
+# Fontes e atlas de letras já carregados neste processo, por tamanho
+_cache_fontes = {}
+_cache_atlas = {}
+
+
+def _carregar_fonte(tamanho):
+    """Carrega a fonte das imagens no tamanho pedido (uma única vez por processo)"""
+    fonte = _cache_fontes.get(tamanho)
+    if fonte is None:
+        from PIL import ImageFont
+        try:
+            fonte = ImageFont.truetype(FONTE_JPEG, tamanho)
+        except OSError:
+            fonte = ImageFont.load_default()
+        _cache_fontes[tamanho] = fonte
+    return fonte
+
+
+class AtlasGlifos:
+    """Letras de uma fonte pré-renderizadas como máscaras em tons de cinza
+
+    draw.text rasteriza a letra deslocada pela parte fracionária da origem e
+    cola a máscara na parte inteira. O atlas guarda a máscara de cada letra
+    por fração de origem, então colar uma letra dá os mesmos pixels de
+    draw.text sem refazer o layout nem a rasterização. Na grade as frações se
+    repetem de coluna em coluna e de linha em linha (e entre puzzles do mesmo
+    tamanho); ficam guardadas as GLIFOS_MAXIMOS_ATLAS usadas mais recentemente.
+    """
+
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self._medidas = {}
+        self._glifos = collections.OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def medidas(self, letra):
+        """(largura, altura) do textbbox da letra, usados para centralizá-la"""
+        medidas = self._medidas.get(letra)
+        if medidas is None:
+            bbox = self.fonte.getbbox(letra)
+            medidas = self._medidas[letra] = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        return medidas
+
+    def glifo(self, letra, fracao_x, fracao_y, um_bit=False):
+        """Devolve (máscara, margem) da letra desenhada na origem (margem + fração)
+
+        um_bit devolve a máscara sem tons intermediários, para imagens de 1 bit.
+        """
+        chave = (letra, fracao_x, fracao_y, um_bit)
+        glifo = self._glifos.get(chave)
+        if glifo is not None:
+            self._glifos.move_to_end(chave)
+            self.acertos += 1
+            return glifo
+        
+        self.falhas += 1
+        from PIL import Image, ImageDraw
+        bbox = self.fonte.getbbox(letra)
+        margem = 2 + max(0, -bbox[0], -bbox[1])
+        mascara = Image.new('L', (bbox[2] + 2 * margem, bbox[3] + 2 * margem), 0)
+        ImageDraw.Draw(mascara).text((margem + fracao_x, margem + fracao_y), letra, fill=255, font=self.fonte)
+        if um_bit:
+            # Em 1 bit, uma máscara com meios-tons deixaria a letra quase branca
+            mascara = mascara.point([0] * 128 + [255] * 128)
+        glifo = self._glifos[chave] = (mascara, margem)
+        if len(self._glifos) > GLIFOS_MAXIMOS_ATLAS:
+            self._glifos.popitem(last=False)
+        return glifo
+
+    def colar_centralizado(self, draw, letra, centro_x, centro_y):
+        """Desenha a letra em preto centralizada em (centro_x, centro_y), nos pixels de draw.text"""
+        largura, altura = self.medidas(letra)
+        # Mesma origem que draw.text recebia, separada em parte inteira e fração
+        x = centro_x - largura / 2
+        y = centro_y - altura / 2
+        mascara, margem = self.glifo(letra, x - int(x), y - int(y), draw.mode == '1')
+        draw.bitmap((int(x) - margem, int(y) - margem), mascara, fill='black')
+
+
+def _obter_atlas(tamanho):
+    """Atlas de letras da fonte das imagens no tamanho pedido (compartilhado no processo)"""
+    atlas = _cache_atlas.get(tamanho)
+    if atlas is None:
+        atlas = _cache_atlas[tamanho] = AtlasGlifos(_carregar_fonte(tamanho))
+    return atlas
+
+
+def _codificar_imagem(img, destino, formato='.jpeg', qualidade=QUALIDADE_JPEG, progressivo=False,
+                      dpi=DPI_IMAGEM):
+    """Salva uma página em PNG ou JPEG (destino: caminho ou arquivo aberto)
+
+    O PNG guarda a imagem no modo em que foi desenhada (1 bit, cinza ou
+    paleta). O JPEG só aceita cinza ou RGB: a página de 1 bit vira cinza e o
+    gabarito em paleta vira RGB apenas durante a codificação.
+    """
+    if formato == '.png':
+        img.save(destino, 'PNG', dpi=(dpi, dpi))
+        return
+    if img.mode == '1':
+        img = img.convert('L')
+    elif img.mode == 'P':
+        img = img.convert('RGB')
+    if progressivo:
+        img.save(destino, 'JPEG', quality=qualidade, optimize=True, progressive=True, dpi=(dpi, dpi))
+    else:
+        img.save(destino, 'JPEG', quality=qualidade, dpi=(dpi, dpi))
+
+
+def _salvar_imagens(paginas, formato='.jpeg', **opcoes):
+    """Codifica a lista de (imagem, destino); opcoes vão para _codificar_imagem
+
+    Páginas RGB são codificadas ao mesmo tempo. Nos modos econômicos elas são
+    codificadas uma de cada vez e retiradas da lista, para que cada imagem
+    possa ser liberada antes da próxima conversão (a paleta vira RGB no JPEG).
+    """
+    if len(paginas) == 1 or any(img.mode != 'RGB' for img, _ in paginas):
+        while paginas:
+            img, destino = paginas.pop(0)
+            _codificar_imagem(img, destino, formato, **opcoes)
+            del img
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(paginas)) as executor:
+        salvamentos = [executor.submit(_codificar_imagem, img, destino, formato, **opcoes)
+                       for img, destino in paginas]
+        for salvamento in salvamentos:
+            salvamento.result()
+
+
+def _renderizar_grade_congelada(grade, palavras_posicoes, formato, palavras_originais):
+    """Renderiza um formato a partir de uma grade já preenchida (roda no pool)"""
+    gerador = GeradorCacaPalavras()
+    gerador.grade = grade
+    gerador.tamanho = len(grade)
+    gerador.palavras_posicoes = palavras_posicoes
+    return gerador.renderizar_em_memoria(formato, palavras_originais)
 
-# Importações obrigatórias
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-except ImportError:
-    messagebox.showerror("Erro de Importação", 
-                        "Biblioteca 'reportlab' não encontrada!\n\n"
-                        "Instale usando: pip install reportlab")
-    exit()
-
-# Importações opcionais para JPEG
-try:
-    from PIL import Image, ImageDraw, ImageFont
-    PILLOW_DISPONIVEL = True
-except ImportError:
-    PILLOW_DISPONIVEL = False
-
-# Importações opcionais para DOCX
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.oxml.ns import qn
-    from docx.oxml import OxmlElement
-    DOCX_DISPONIVEL = True
-except ImportError:
-    DOCX_DISPONIVEL = False
 
 class GeradorCacaPalavras:
-    def __init__(self):
-        self.grade = []
+    def __init__(self, backend='linhas', semente=None):
+        """backend: 'linhas' (padrão), 'numpy' (grade em matriz uint8) ou 'bits' (máscaras de bits)
+        
+        Com a mesma semente, o mesmo gerador produz sempre o mesmo puzzle.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconhecido: {backend}")
+        self.backend = backend
+        self.semente = semente
+        # Gerador aleatório próprio: não depende nem interfere no estado global de random
+        self.rng = random.Random(semente)
+        # Índice da grade (no backend numpy também guarda as letras)
+        self._indice = None
+        self._grade = []
         self.palavras_posicoes = []
+        # Lista de palavras exibida nos arquivos (inclui as que não couberam)
+        self.palavras_originais = []
         self.tamanho = 0
+        # Quantas palavras colocadas passam por cada célula e, por célula, quais
+        # são elas (montados a partir de palavras_posicoes no primeiro uso)
+        self._contagens = None
+        self._palavras_celula = None
+        # Grade sem células vazias (preenchida ou carregada assim): as edições
+        # sorteiam letras para as células que liberam, com as mesmas bloqueadas
+        self._preenchida = False
+        self._bloqueadas = PALAVRAS_BLOQUEADAS
+        # Num puzzle preenchido: índice só com as letras das palavras (as edições
+        # podem cobrir o preenchimento) e (buscador, textos) da correção
+        self._indice_palavras = None
+        self._correcao = None
+    
+    @property
+    def grade(self):
+        """Grade como lista de listas (str ou None), usada pelos geradores de arquivo"""
+        if self.backend == 'numpy':
+            return self._indice.como_listas() if self._indice is not None else []
+        return self._grade
+    
+    @grade.setter
+    def grade(self, grade):
+        self._grade = grade
+        self._indice = GradeNumpy(grade) if self.backend == 'numpy' else None
+        self._contagens = None
+        self._palavras_celula = None
+        self._preenchida = bool(grade) and all(None not in linha for linha in grade)
+        self._indice_palavras = None
+        self._correcao = None
         
     def remover_acentos(self, texto):
         """Remove acentos de uma string"""
-        nfkd = unicodedata.normalize('NFKD', texto)
-        return ''.join([c for c in nfkd if not unicodedata.combining(c)])
+        return remover_acentos(texto)
     
     def criar_grade_vazia(self, tamanho):
         """Cria uma grade vazia preenchida com None"""
         self.tamanho = tamanho
         self.grade = [[None for _ in range(tamanho)] for _ in range(tamanho)]
         self.palavras_posicoes = []
+        self.palavras_originais = []
+    
+    def obter_indice(self):
+        """Devolve o índice de linhas da grade atual, construindo-o se necessário"""
+        if self._indice is None:
+            self._indice = BACKENDS[self.backend](self.grade)
+        return self._indice
+    
+    def listar_posicoes_validas(self, palavra, direcoes, contar_sobreposicoes=False):
+        """Lista todas as posições (linha, coluna, direcao) em que a palavra cabe
+        
+        A palavra pode ser uma string ou uma PalavraNormalizada.
+        """
+        palavra = normalizar_palavra(palavra)
+        if not palavra.texto or len(palavra) > self.tamanho:
+            return []
+        return self.obter_indice().posicoes_validas(palavra, direcoes, contar_sobreposicoes)
     
     def pode_colocar_palavra(self, palavra, linha, coluna, direcao):
         """Verifica se é possível colocar a palavra na posição e direção especificadas"""
-        palavra_sem_acento = self.remover_acentos(palavra.upper()).replace(" ", "")
-        tamanho_palavra = len(palavra_sem_acento)
-        
-        # Direções: 
-        # 0=horizontal direita, 1=horizontal esquerda, 
-        # 2=vertical baixo, 3=vertical cima
-        # 4=diagonal baixo-direita, 5=diagonal baixo-esquerda
-        # 6=diagonal cima-direita, 7=diagonal cima-esquerda
-        
-        if direcao == 0:  # Horizontal direita
-            if coluna + tamanho_palavra > self.tamanho:
+        if self.backend == 'bits':
+            # Algumas operações de deslocamento e AND nas máscaras das letras
+            return self.obter_indice().cabe(normalizar_palavra(palavra), linha, coluna, direcao)
+        palavra_sem_acento = normalizar_palavra(palavra).texto
+        passo_l, passo_c = DIRECOES[direcao]
+        ultima = len(palavra_sem_acento) - 1
+        
+        if not (0 <= linha + ultima * passo_l < self.tamanho and 0 <= coluna + ultima * passo_c < self.tamanho):
+            return False
+        
+        for i, letra in enumerate(palavra_sem_acento):
+            atual = self.grade[linha + i * passo_l][coluna + i * passo_c]
+            if atual is not None and atual != letra:
                 return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha][coluna + i] is not None and self.grade[linha][coluna + i] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 1:  # Horizontal esquerda
-            if coluna - tamanho_palavra + 1 < 0:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha][coluna - i] is not None and self.grade[linha][coluna - i] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 2:  # Vertical para baixo
-            if linha + tamanho_palavra > self.tamanho:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha + i][coluna] is not None and self.grade[linha + i][coluna] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 3:  # Vertical para cima
-            if linha - tamanho_palavra + 1 < 0:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha - i][coluna] is not None and self.grade[linha - i][coluna] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 4:  # Diagonal baixo-direita
-            if linha + tamanho_palavra > self.tamanho or coluna + tamanho_palavra > self.tamanho:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha + i][coluna + i] is not None and self.grade[linha + i][coluna + i] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 5:  # Diagonal baixo-esquerda
-            if linha + tamanho_palavra > self.tamanho or coluna - tamanho_palavra + 1 < 0:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha + i][coluna - i] is not None and self.grade[linha + i][coluna - i] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 6:  # Diagonal cima-direita
-            if linha - tamanho_palavra + 1 < 0 or coluna + tamanho_palavra > self.tamanho:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha - i][coluna + i] is not None and self.grade[linha - i][coluna + i] != palavra_sem_acento[i]:
-                    return False
-        
-        elif direcao == 7:  # Diagonal cima-esquerda
-            if linha - tamanho_palavra + 1 < 0 or coluna - tamanho_palavra + 1 < 0:
-                return False
-            for i in range(tamanho_palavra):
-                if self.grade[linha - i][coluna - i] is not None and self.grade[linha - i][coluna - i] != palavra_sem_acento[i]:
-                    return False
         
         return True
     
     def colocar_palavra(self, palavra, linha, coluna, direcao):
-        """Coloca a palavra na grade"""
-        palavra_sem_acento = self.remover_acentos(palavra.upper()).replace(" ", "")
-        tamanho_palavra = len(palavra_sem_acento)
-        posicoes = []
-        
-        if direcao == 0:  # Horizontal direita
-            for i in range(tamanho_palavra):
-                self.grade[linha][coluna + i] = palavra_sem_acento[i]
-                posicoes.append((linha, coluna + i))
-        
-        elif direcao == 1:  # Horizontal esquerda
-            for i in range(tamanho_palavra):
-                self.grade[linha][coluna - i] = palavra_sem_acento[i]
-                posicoes.append((linha, coluna - i))
-        
-        elif direcao == 2:  # Vertical para baixo
-            for i in range(tamanho_palavra):
-                self.grade[linha + i][coluna] = palavra_sem_acento[i]
-                posicoes.append((linha + i, coluna))
-        
-        elif direcao == 3:  # Vertical para cima
-            for i in range(tamanho_palavra):
-                self.grade[linha - i][coluna] = palavra_sem_acento[i]
-                posicoes.append((linha - i, coluna))
-        
-        elif direcao == 4:  # Diagonal baixo-direita
-            for i in range(tamanho_palavra):
-                self.grade[linha + i][coluna + i] = palavra_sem_acento[i]
-                posicoes.append((linha + i, coluna + i))
-        
-        elif direcao == 5:  # Diagonal baixo-esquerda
-            for i in range(tamanho_palavra):
-                self.grade[linha + i][coluna - i] = palavra_sem_acento[i]
-                posicoes.append((linha + i, coluna - i))
-        
-        elif direcao == 6:  # Diagonal cima-direita
-            for i in range(tamanho_palavra):
-                self.grade[linha - i][coluna + i] = palavra_sem_acento[i]
-                posicoes.append((linha - i, coluna + i))
-        
-        elif direcao == 7:  # Diagonal cima-esquerda
-            for i in range(tamanho_palavra):
-                self.grade[linha - i][coluna - i] = palavra_sem_acento[i]
-                posicoes.append((linha - i, coluna - i))
-        
-        self.palavras_posicoes.append({
-            'palavra': palavra,
-            'posicoes': posicoes
-        })
-    
-    def inserir_palavras(self, palavras, usar_diagonais=False, usar_contrarias=True):
-        """Tenta inserir todas as palavras na grade"""
-        palavras_nao_inseridas = []
-        
-        # Definir direções disponíveis
-        if usar_diagonais:
-            if usar_contrarias:
-                # Todas as direções (0-7)
-                direcoes_disponiveis = list(range(8))
-            else:
-                # Apenas direções "para frente": horizontal direita, vertical baixo, diagonais para baixo
-                direcoes_disponiveis = [0, 2, 4, 5]
+        """Coloca a palavra (string ou PalavraNormalizada) na grade"""
+        palavra = normalizar_palavra(palavra)
+        info = {'palavra': palavra.original, 'posicoes': []}
+        self._ocupar(info, palavra, linha, coluna, direcao)
+        self.palavras_posicoes.append(info)
+    
+    def remover_ultima_palavra(self):
+        """Desfaz a última palavra colocada e devolve (palavra, linha, coluna, direcao)"""
+        info = self.palavras_posicoes[-1]
+        self._liberar(info)
+        self.palavras_posicoes.pop()
+        return (info['palavra'],) + self._colocacao(info['posicoes'])
+    
+    def _obter_contagens(self):
+        """Contagem de palavras por célula, construída (com o índice célula -> palavras) se necessário"""
+        if self._contagens is None:
+            self._contagens = [[0] * self.tamanho for _ in range(self.tamanho)]
+            self._palavras_celula = {}
+            for info in self.palavras_posicoes:
+                self._registrar(info)
+        return self._contagens
+    
+    def _registrar(self, info):
+        """Soma a palavra às contagens e ao índice das células que ela ocupa"""
+        contagens = self._contagens
+        palavras_celula = self._palavras_celula
+        for celula in info['posicoes']:
+            contagens[celula[0]][celula[1]] += 1
+            palavras_celula.setdefault(celula, {})[id(info)] = info
+    
+    def _ocupar(self, info, palavra, linha, coluna, direcao):
+        """Grava as letras da PalavraNormalizada e registra as células em info['posicoes']"""
+        self._obter_contagens()
+        passo_l, passo_c = DIRECOES[direcao]
+        posicoes = [(linha + i * passo_l, coluna + i * passo_c) for i in range(len(palavra.texto))]
+        
+        if self.backend == 'numpy':
+            self._indice.colocar(palavra, linha, coluna, direcao)
         else:
-            if usar_contrarias:
-                # Apenas horizontal e vertical (todas)
-                direcoes_disponiveis = [0, 1, 2, 3]
+            indice = self._indice
+            for (l, c), letra in zip(posicoes, palavra.texto):
+                if self._grade[l][c] is None:
+                    self._grade[l][c] = letra
+                    if indice is not None:
+                        indice.escrever(l, c, letra)
+        
+        info['posicoes'] = posicoes
+        self._registrar(info)
+        if self._indice_palavras is not None:
+            for (l, c), letra in zip(posicoes, palavra.texto):
+                if self._contagens[l][c] == 1:
+                    self._indice_palavras.escrever(l, c, letra)
+    
+    def _liberar(self, info):
+        """Tira a palavra das contagens; as células que ficam sem nenhuma palavra são esvaziadas
+        
+        Devolve as células esvaziadas.
+        """
+        contagens = self._obter_contagens()
+        palavras_celula = self._palavras_celula
+        liberadas = []
+        for celula in info['posicoes']:
+            l, c = celula
+            contagens[l][c] -= 1
+            if contagens[l][c]:
+                del palavras_celula[celula][id(info)]
             else:
-                # Apenas horizontal direita e vertical para baixo
-                direcoes_disponiveis = [0, 2]
+                del palavras_celula[celula]
+                self._esvaziar_celula(l, c)
+                if self._indice_palavras is not None:
+                    self._indice_palavras.escrever(l, c, None)
+                liberadas.append(celula)
+        return liberadas
+    
+    def _esvaziar_celula(self, linha, coluna):
+        """Apaga a letra da célula (na grade e no índice)"""
+        self._escrever_celula(linha, coluna, None)
+    
+    def _escrever_celula(self, linha, coluna, letra):
+        """Grava a letra na célula (na grade e no índice)"""
+        if self.backend != 'numpy':
+            self._grade[linha][coluna] = letra
+        if self._indice is not None:
+            self._indice.escrever(linha, coluna, letra)
+    
+    def _indice_busca(self):
+        """Índice para procurar posições durante uma edição
+        
+        Num puzzle preenchido, as letras de preenchimento não impedem uma
+        palavra de entrar: a busca usa um índice só com as letras das palavras.
+        """
+        if not self._preenchida:
+            return self.obter_indice()
+        if self._indice_palavras is None:
+            contagens = self._obter_contagens()
+            grade = self.grade
+            self._indice_palavras = BACKENDS[self.backend](
+                [[letra if quantas else None for letra, quantas in zip(linha, linha_contagens)]
+                 for linha, linha_contagens in zip(grade, contagens)])
+        return self._indice_palavras
+    
+    def _cobrir_preenchimento(self, palavra, linha, coluna, direcao):
+        """Esvazia as letras de preenchimento onde a palavra vai entrar e devolve essas células"""
+        if not self._preenchida:
+            return []
+        contagens = self._obter_contagens()
+        passo_l, passo_c = DIRECOES[direcao]
+        cobertas = [(linha + i * passo_l, coluna + i * passo_c) for i in range(len(palavra.texto))]
+        cobertas = [(l, c) for l, c in cobertas if not contagens[l][c]]
+        for l, c in cobertas:
+            self._esvaziar_celula(l, c)
+        return cobertas
+    
+    def _repor_preenchimento(self, alteradas, conferir=()):
+        """Depois de uma edição num puzzle preenchido, sorteia letras para as células vazias
+        
+        Só as células alteradas pela edição são sorteadas, e a correção procura
+        ocorrências indesejadas só nos trechos de linha em volta delas (e das
+        células de conferir).
+        """
+        if not self._preenchida or not (alteradas or conferir):
+            return
+        letras = string.ascii_uppercase
+        contagens = self._contagens
+        for l, c in alteradas:
+            if not contagens[l][c]:
+                self._escrever_celula(l, c, self.rng.choice(letras))
+        self._corrigir_preenchimento(letras, em_volta_de=list(alteradas) + list(conferir))
+    
+    def _nova_para_correcao(self, palavra):
+        """Se, num puzzle preenchido, a PalavraNormalizada ainda não está entre as que a correção conhece
+        
+        Nesse caso o buscador guardado é descartado.
+        """
+        if not self._preenchida or len(palavra.texto) < 2:
+            return False
+        self._buscador_correcao()
+        if palavra.texto in self._correcao[1]:
+            return False
+        self._correcao = None
+        return True
+    
+    def _celulas_das_copias(self, palavra):
+        """Células de todas as ocorrências da PalavraNormalizada na grade preenchida
+        
+        Cópias que o preenchimento formou antes de a palavra entrar na lista
+        viram repetições; achá-las custa uma busca no índice da grade.
+        """
+        posicoes = self.obter_indice().posicoes_validas(palavra, range(len(DIRECOES)))
+        passos = range(len(palavra.texto))
+        return [(l + i * DIRECOES[d][0], c + i * DIRECOES[d][1]) for l, c, d in posicoes for i in passos]
+    
+    @staticmethod
+    def _colocacao(posicoes):
+        """(linha, coluna, direcao) de uma palavra a partir das suas células"""
+        (linha, coluna), direcao = posicoes[0], 0
+        if len(posicoes) > 1:
+            direcao = DIRECOES.index((posicoes[1][0] - linha, posicoes[1][1] - coluna))
+        return linha, coluna, direcao
+    
+    def _encontrar_colocada(self, palavra):
+        """Índice em palavras_posicoes da última palavra colocada com esse texto
+        
+        A grafia exata tem preferência; sem ela, a comparação é pelo texto
+        normalizado, como a palavra fica na grade: ' casa ' e 'Casa' acham a
+        palavra adicionada como 'casa'.
+        """
+        palavra = normalizar_palavra(palavra.strip() if isinstance(palavra, str) else palavra)
+        ordem = range(len(self.palavras_posicoes) - 1, -1, -1)
+        for k in ordem:
+            if self.palavras_posicoes[k]['palavra'] == palavra.original:
+                return k
+        for k in ordem:
+            if normalizar_palavra(self.palavras_posicoes[k]['palavra']).texto == palavra.texto:
+                return k
+        raise ValueError(f"A palavra não está na grade: {palavra.original}")
+    
+    def palavras_na_celula(self, linha, coluna):
+        """Palavras colocadas que passam pela célula"""
+        self._obter_contagens()
+        return [info['palavra'] for info in self._palavras_celula.get((linha, coluna), {}).values()]
+    
+    def adicionar_palavra(self, palavra, usar_diagonais=False, usar_contrarias=True, preferir_sobreposicoes=False):
+        """Coloca mais uma palavra na grade já montada, sem mexer nas outras
+        
+        Devolve a posição (linha, coluna, direcao), ou None se ela não couber
+        (nesse caso a palavra também não entra na lista).
+        """
+        palavra = normalizar_palavra(palavra.strip() if isinstance(palavra, str) else palavra)
+        direcoes = direcoes_disponiveis(usar_diagonais, usar_contrarias)
+        posicao = self._buscar_posicao(palavra, direcoes, preferir_sobreposicoes, indice=self._indice_busca())
+        if posicao is not None:
+            nova = self._nova_para_correcao(palavra)
+            cobertas = self._cobrir_preenchimento(palavra, *posicao)
+            self.colocar_palavra(palavra, *posicao)
+            self.palavras_originais.append(palavra.original)
+            self._repor_preenchimento(cobertas, self._celulas_das_copias(palavra) if nova else [])
+        return posicao
+    
+    def remover_palavra(self, palavra):
+        """Tira a palavra da grade e da lista e devolve a posição (linha, coluna, direcao) que ela ocupava
+        
+        Só ficam vazias as células que nenhuma outra palavra usa, então o custo
+        é proporcional ao comprimento da palavra; num puzzle já preenchido só
+        elas recebem letras novas, conferidas nos trechos de linha em volta.
+        Com a mesma palavra colocada mais de uma vez, sai a última. Lança
+        ValueError se ela não estiver na grade.
+        """
+        k = self._encontrar_colocada(palavra)
+        info = self.palavras_posicoes[k]
+        liberadas = self._liberar(info)
+        del self.palavras_posicoes[k]
+        self._repor_preenchimento(liberadas)
+        if info['palavra'] in self.palavras_originais:
+            self.palavras_originais.remove(info['palavra'])
+        return self._colocacao(info['posicoes'])
+    
+    def realocar_palavra(self, palavra, usar_diagonais=False, usar_contrarias=True):
+        """Move a palavra para outra posição sorteada, mantendo a ordem das palavras
+        
+        Devolve a nova posição (linha, coluna, direcao), ou None se ela não
+        couber em outro lugar (e então continua onde estava).
+        """
+        info = self.palavras_posicoes[self._encontrar_colocada(palavra)]
+        antiga = self._colocacao(info['posicoes'])
+        normalizada = normalizar_palavra(info['palavra'])
+        liberadas = self._liberar(info)
+        posicao = self._buscar_posicao(normalizada, direcoes_disponiveis(usar_diagonais, usar_contrarias),
+                                       evitar=antiga, indice=self._indice_busca())
+        cobertas = self._cobrir_preenchimento(normalizada, *(posicao or antiga))
+        self._ocupar(info, normalizada, *(posicao or antiga))
+        self._repor_preenchimento(liberadas + cobertas)
+        return posicao
+    
+    def limpar_preenchimento(self):
+        """Esvazia as células que nenhuma palavra usa (as letras de preenchimento)
+        
+        Depois, preencher_espacos_vazios() sorteia o preenchimento inteiro de
+        novo (as edições num puzzle preenchido só sorteiam as células que liberam).
+        """
+        self._preenchida = False
+        self._indice_palavras = None
+        self._correcao = None
+        contagens = self._obter_contagens()
+        grade = self.grade
+        for l, linha in enumerate(contagens):
+            for c, quantas in enumerate(linha):
+                if not quantas and grade[l][c] is not None:
+                    self._esvaziar_celula(l, c)
+    
+    def _sortear_posicao(self, palavra, direcoes, indice):
+        """Sorteia posições até achar uma legal ou desistir
+        
+        Como o sorteio é uniforme entre todas as (linha, coluna, direcao), a
+        posição aceita é uniforme entre as legais. Em grades grandes e pouco
+        ocupadas isso evita listar centenas de milhares de posições.
+        """
+        for _ in range(TENTATIVAS_SORTEIO):
+            linha = self.rng.randrange(self.tamanho)
+            coluna = self.rng.randrange(self.tamanho)
+            direcao = self.rng.choice(direcoes)
+            if indice.cabe(palavra, linha, coluna, direcao):
+                return linha, coluna, direcao
+        return None
+    
+    def _escolher_posicao(self, candidatas, preferir_sobreposicoes):
+        """Sorteia uma posição entre as candidatas (com ou sem preferência por cruzamentos)"""
+        if preferir_sobreposicoes:
+            maximo = max(p[3] for p in candidatas)
+            if maximo > 0:
+                candidatas = [p for p in candidatas if p[3] == maximo]
+        return self.rng.choice(candidatas)[:3]
+    
+    def _buscar_posicao(self, palavra, direcoes, preferir_sobreposicoes=False, evitar=None, indice=None):
+        """Posição legal sorteada para a PalavraNormalizada (diferente de evitar), ou None
+        
+        Sem indice, a busca usa o índice da grade (obter_indice).
+        """
+        if not palavra.texto or len(palavra) > self.tamanho:
+            return None
+        if indice is None:
+            indice = self.obter_indice()
+        posicao = None if preferir_sobreposicoes else self._sortear_posicao(palavra, direcoes, indice)
+        if posicao is None or posicao == evitar:
+            posicao = None
+            candidatas = indice.posicoes_validas(palavra, direcoes, preferir_sobreposicoes)
+            if evitar is not None:
+                candidatas = [p for p in candidatas if p[:3] != evitar]
+            if candidatas:
+                posicao = self._escolher_posicao(candidatas, preferir_sobreposicoes)
+        return posicao
+    
+    def _inserir_com_retrocesso(self, palavra, direcoes, max_retrocessos):
+        """Desfaz as últimas palavras e busca (com limite de passos) um arranjo em que todas caibam"""
+        profundidade = min(PROFUNDIDADE_RETROCESSO, len(self.palavras_posicoes))
+        if profundidade == 0:
+            return False
+        
+        removidas = [self.remover_ultima_palavra() for _ in range(profundidade)][::-1]
+        # A palavra que não coube escolhe primeiro; depois as removidas são recolocadas
+        pendentes = [palavra] + [r[0] for r in removidas]
+        passos = [0]
+        
+        def tentar(i):
+            if i == len(pendentes):
+                return True
+            candidatas = self.listar_posicoes_validas(pendentes[i], direcoes)
+            self.rng.shuffle(candidatas)
+            for linha, coluna, direcao in candidatas:
+                if passos[0] >= max_retrocessos:
+                    return False
+                passos[0] += 1
+                self.colocar_palavra(pendentes[i], linha, coluna, direcao)
+                if tentar(i + 1):
+                    return True
+                self.remover_ultima_palavra()
+            return False
+        
+        if tentar(0):
+            return True
+        
+        # Nenhum arranjo encontrado: restaura as palavras nas posições originais
+        for removida in removidas:
+            self.colocar_palavra(*removida)
+        return False
+    
+    def inserir_palavras(self, palavras, usar_diagonais=False, usar_contrarias=True,
+                         preferir_sobreposicoes=False, max_retrocessos=200, ao_progredir=None):
+        """Tenta inserir todas as palavras na grade
+        
+        Cada palavra vai para uma posição legal sorteada de modo uniforme:
+        primeiro por sorteio direto e, se ele falhar, pela lista completa de
+        posições legais. Se a palavra não couber em lugar nenhum, as últimas
+        palavras colocadas são reposicionadas em uma busca limitada a
+        max_retrocessos passos.
+        
+        ao_progredir(feitas, total), se informado, é chamado antes de cada
+        palavra; ele pode lançar GeracaoCancelada para interromper a inserção.
+        """
+        palavras_nao_inseridas = []
+        direcoes = direcoes_disponiveis(usar_diagonais, usar_contrarias)
+        palavras = list(palavras)
         
-        for palavra in palavras:
-            palavra_limpa = palavra.strip()
-            if not palavra_limpa:
+        for feitas, palavra in enumerate(palavras):
+            if ao_progredir:
+                ao_progredir(feitas, len(palavras))
+            
+            # Cada palavra é normalizada uma única vez (e reaproveitada entre puzzles)
+            palavra = normalizar_palavra(palavra.strip() if isinstance(palavra, str) else palavra)
+            if not palavra.original:
                 continue
-                
-            inserida = False
-            tentativas = 0
-            max_tentativas = 100
+            self.palavras_originais.append(palavra.original)
             
-            while not inserida and tentativas < max_tentativas:
-                linha = random.randint(0, self.tamanho - 1)
-                coluna = random.randint(0, self.tamanho - 1)
-                direcao = random.choice(direcoes_disponiveis)
-                
-                if self.pode_colocar_palavra(palavra_limpa, linha, coluna, direcao):
-                    self.colocar_palavra(palavra_limpa, linha, coluna, direcao)
-                    inserida = True
-                
-                tentativas += 1
+            if not palavra.texto or len(palavra) > self.tamanho:
+                palavras_nao_inseridas.append(palavra.original)
+                continue
             
-            if not inserida:
-                palavras_nao_inseridas.append(palavra_limpa)
+            posicao = self._buscar_posicao(palavra, direcoes, preferir_sobreposicoes)
+            if posicao is not None:
+                self.colocar_palavra(palavra, *posicao)
+            elif not (max_retrocessos and self._inserir_com_retrocesso(palavra, direcoes, max_retrocessos)):
+                palavras_nao_inseridas.append(palavra.original)
         
         return palavras_nao_inseridas
     
-    def preencher_espacos_vazios(self):
-        """Preenche os espaços vazios com letras aleatórias"""
+    def empacotar_palavras(self, banco, densidade=DENSIDADE_EMPACOTAMENTO, usar_diagonais=False,
+                           usar_contrarias=True, ao_progredir=None):
+        """Coloca palavras do BancoPalavras até cobrir a fração densidade das células
+        
+        A cada passo são sorteadas AMOSTRAS_EMPACOTAMENTO janelas (posição,
+        direção e comprimento); fica a que cruza mais letras já gravadas e
+        ainda tem palavras do banco que cabem nela. Duas palavras só dividem
+        células se estiverem em eixos diferentes, para que uma não fique
+        escondida dentro da outra. Devolve as palavras colocadas.
+        
+        ao_progredir(células ocupadas, alvo), se informado, é chamado a cada
+        palavra colocada e pode lançar GeracaoCancelada.
+        """
+        n = self.tamanho
+        direcoes = direcoes_disponiveis(usar_diagonais, usar_contrarias)
+        comprimentos = [c for c in banco.comprimentos if c <= n]
+        grade = self.grade
+        alvo = int(densidade * n * n + 0.5)
+        ocupadas = sum(letra is not None for linha in grade for letra in linha)
+        
+        # Eixos das palavras que passam por cada célula e palavras do banco já usadas
+        eixos_celula = {}
+        usadas = {}
+        for info in self.palavras_posicoes:
+            posicoes = info['posicoes']
+            if len(posicoes) > 1:
+                passo = (posicoes[1][0] - posicoes[0][0], posicoes[1][1] - posicoes[0][1])
+                eixo = EIXO_DIRECAO[DIRECOES.index(passo)][0]
+                for celula in posicoes:
+                    eixos_celula[celula] = eixos_celula.get(celula, 0) | (1 << eixo)
+            texto = normalizar_palavra(info['palavra']).texto
+            if len(texto) in banco.comprimentos:
+                usadas[len(texto)] = usadas.get(len(texto), 0) | banco.candidatos(texto)
+        
+        colocadas = []
+        falhas = 0
+        while comprimentos and ocupadas < alvo and falhas < FALHAS_EMPACOTAMENTO:
+            melhor = None
+            for _ in range(AMOSTRAS_EMPACOTAMENTO):
+                comprimento = self.rng.choice(comprimentos)
+                direcao = self.rng.choice(direcoes)
+                passo_l, passo_c = DIRECOES[direcao]
+                # Sorteia o início entre os que mantêm a palavra dentro da grade
+                folga_l = (comprimento - 1) * abs(passo_l)
+                folga_c = (comprimento - 1) * abs(passo_c)
+                linha = self.rng.randrange(n - folga_l) + (folga_l if passo_l < 0 else 0)
+                coluna = self.rng.randrange(n - folga_c) + (folga_c if passo_c < 0 else 0)
+                celulas = [(linha + i * passo_l, coluna + i * passo_c) for i in range(comprimento)]
+                bit_eixo = 1 << EIXO_DIRECAO[direcao][0]
+                if any(eixos_celula.get(celula, 0) & bit_eixo for celula in celulas):
+                    continue
+                padrao = [grade[l][c] for l, c in celulas]
+                cruzamentos = comprimento - padrao.count(None)
+                if cruzamentos == comprimento or (melhor is not None and cruzamentos <= melhor[0]):
+                    continue
+                mascara = banco.candidatos(padrao) & ~usadas.get(comprimento, 0)
+                if mascara:
+                    melhor = (cruzamentos, comprimento, direcao, celulas, mascara)
+            
+            if melhor is None:
+                falhas += 1
+                continue
+            falhas = 0
+            _, comprimento, direcao, celulas, mascara = melhor
+            indice = banco.sortear(mascara, self.rng)
+            usadas[comprimento] = usadas.get(comprimento, 0) | (1 << indice)
+            _, original = banco.palavra(comprimento, indice)
+            
+            ocupadas += sum(grade[l][c] is None for l, c in celulas)
+            self.colocar_palavra(original, celulas[0][0], celulas[0][1], direcao)
+            self.palavras_originais.append(original)
+            grade = self.grade
+            bit_eixo = 1 << EIXO_DIRECAO[direcao][0]
+            for celula in celulas:
+                eixos_celula[celula] = eixos_celula.get(celula, 0) | bit_eixo
+            colocadas.append(original)
+            if ao_progredir:
+                ao_progredir(ocupadas, alvo)
+        
+        return colocadas
+    
+    def preencher_espacos_vazios(self, bloqueadas=PALAVRAS_BLOQUEADAS):
+        """Preenche os espaços vazios com letras aleatórias
+        
+        Depois do sorteio, as letras de preenchimento que formam uma segunda
+        ocorrência de uma palavra da lista, ou uma palavra bloqueada, são
+        sorteadas de novo (só essas células).
+        """
         letras = string.ascii_uppercase
-        for i in range(self.tamanho):
-            for j in range(self.tamanho):
-                if self.grade[i][j] is None:
-                    self.grade[i][j] = random.choice(letras)
+        vazias = [(i, j) for i in range(self.tamanho) for j in range(self.tamanho) if self.grade[i][j] is None]
+        if self.backend == 'numpy':
+            self._indice.preencher_vazios(letras, self.rng.getrandbits(64))
+        else:
+            for i, j in vazias:
+                self.grade[i][j] = self.rng.choice(letras)
+            if vazias:
+                # O índice de antes do sorteio só tem as letras das palavras: é o das edições
+                self._indice_palavras, self._indice = self._indice, None
+        self._preenchida = True
+        self._bloqueadas = bloqueadas
+        self._correcao = None
+        self._corrigir_preenchimento(letras, set(vazias))
+    
+    def _buscador(self, bloqueadas=()):
+        """Buscador com as palavras colocadas seguidas das bloqueadas (textos normalizados)"""
+        textos = [normalizar_palavra(info['palavra']).texto for info in self.palavras_posicoes]
+        textos += [normalizar_palavra(p).texto for p in bloqueadas]
+        return BuscadorPalavras([t for t in textos if t])
+    
+    def encontrar_palavras(self, palavras=None, bloqueadas=()):
+        """Acha todas as ocorrências das palavras em qualquer uma das oito direções
+        
+        Sem palavras, procura as palavras colocadas. Devolve uma lista de
+        (palavra normalizada, células na ordem de leitura).
+        """
+        if palavras is None:
+            buscador = self._buscador(bloqueadas)
+        else:
+            textos = [normalizar_palavra(p).texto for p in list(palavras) + list(bloqueadas)]
+            buscador = BuscadorPalavras([t for t in textos if t])
+        ocorrencias = buscador.buscar(self.grade, linhas_da_grade(self.tamanho))
+        # Palíndromos aparecem nos dois sentidos: fica uma ocorrência por célula inicial
+        unicas = {(buscador.palavras[indice], celulas): None for indice, celulas in ocorrencias
+                  if celulas[0] <= celulas[-1] or buscador.palavras[indice] != buscador.palavras[indice][::-1]}
+        return list(unicas)
+    
+    def _buscador_correcao(self):
+        """Buscador das palavras colocadas e bloqueadas com mais de uma letra, ou None se não houver
+        
+        Fica guardado entre as edições; adicionar uma palavra que ele não
+        conhece o descarta (uma palavra removida pode continuar nele).
+        """
+        if self._correcao is None:
+            textos = [normalizar_palavra(info['palavra']).texto for info in self.palavras_posicoes]
+            textos += [normalizar_palavra(p).texto for p in self._bloqueadas]
+            # Palavras de uma letra sempre se repetem; não há o que corrigir
+            textos = list(dict.fromkeys(t for t in textos if len(t) > 1))
+            self._correcao = (BuscadorPalavras(textos) if textos else None, set(textos))
+        return self._correcao[0]
+    
+    def _ocorrencia_colocada(self, texto, celulas):
+        """Se a ocorrência é a de uma palavra colocada (com a mesma palavra repetida, qualquer uma)"""
+        conjunto = frozenset(celulas)
+        for info in self._palavras_celula.get(celulas[0], {}).values():
+            if (len(info['posicoes']) == len(celulas) and frozenset(info['posicoes']) == conjunto
+                    and normalizar_palavra(info['palavra']).texto == texto):
+                return True
+        return False
+    
+    def _trechos_em_volta(self, celulas, alcance):
+        """Trechos das linhas de leitura que passam pelas células, até alcance células de cada lado
+        
+        Trechos que se tocam na mesma linha viram um só; a ordem é a de
+        linhas_da_grade.
+        """
+        n = self.tamanho
+        linhas = linhas_da_grade(n)
+        por_linha = {}
+        for l, c in celulas:
+            for k in indice_linhas_da_celula(n, l, c):
+                inicio = linhas[k][0]
+                # Posição da célula dentro da linha (as horizontais andam pela coluna)
+                pos = c - inicio[1] if k < n else l - inicio[0]
+                por_linha.setdefault(k, []).append(pos)
+        trechos = []
+        for k in sorted(por_linha):
+            celulas_linha = linhas[k]
+            intervalos = []
+            for pos in sorted(por_linha[k]):
+                de, ate = max(0, pos - alcance), min(len(celulas_linha), pos + alcance + 1)
+                if intervalos and de <= intervalos[-1][1]:
+                    intervalos[-1][1] = ate
+                else:
+                    intervalos.append([de, ate])
+            trechos.extend(celulas_linha[de:ate] for de, ate in intervalos)
+        return trechos
+    
+    def _corrigir_preenchimento(self, letras, preenchidas=None, em_volta_de=None):
+        """Sorteia de novo as células de preenchimento que formam ocorrências indesejadas
+        
+        Sem em_volta_de, procura na grade inteira e só mexe nas células de
+        preenchidas. Depois de uma edição, procura só nos trechos de linha em
+        volta das células alteradas e pode mexer em qualquer letra de
+        preenchimento desses trechos.
+        """
+        buscador = self._buscador_correcao()
+        if buscador is None:
+            return
+        # Só uma ocorrência que passa por uma célula alterada pode ser nova
+        alcance = max(len(texto) for texto in buscador.palavras) - 1
+        contagens = self._obter_contagens()
+        if em_volta_de is None:
+            a_verificar = linhas_da_grade(self.tamanho)
+        else:
+            a_verificar = self._trechos_em_volta(em_volta_de, alcance)
+            preenchidas = {celula for trecho in a_verificar for celula in trecho
+                           if not contagens[celula[0]][celula[1]]}
+        
+        for _ in range(RODADAS_CORRECAO_PREENCHIMENTO):
+            grade = self.grade
+            alteradas = set()
+            for indice, celulas in buscador.buscar(grade, a_verificar):
+                if self._ocorrencia_colocada(buscador.palavras[indice], celulas):
+                    continue
+                livres = [celula for celula in celulas if celula in preenchidas]
+                if not livres or alteradas.intersection(livres):
+                    continue
+                l, c = self.rng.choice(livres)
+                letra = self.rng.choice([x for x in letras if x != grade[l][c]])
+                self._escrever_celula(l, c, letra)
+                alteradas.add((l, c))
+            if not alteradas:
+                return
+            a_verificar = self._trechos_em_volta(alteradas, alcance)
+    
+    def _lista_palavras(self, palavras_originais):
+        """Lista exibida nos arquivos: a informada ou a guardada no gerador"""
+        return self.palavras_originais if palavras_originais is None else palavras_originais
+    
+    def serializar(self, palavras_originais=None):
+        """Converte o puzzle para o formato binário compacto (bytes)
+        
+        Cada palavra colocada é guardada como linha, coluna, direção e
+        comprimento; as células são refeitas ao carregar.
+        """
+        palavras_originais = self._lista_palavras(palavras_originais)
+        try:
+            celulas = ''.join(letra or VAZIO for linha in self.grade for letra in linha).encode('latin-1')
+        except UnicodeEncodeError:
+            raise ValueError("A grade tem letras que não podem ser salvas no formato de puzzle")
+        
+        partes = [CABECALHO_PUZZLE.pack(MAGICO_PUZZLE, VERSAO_FORMATO_PUZZLE, self.tamanho,
+                                        len(self.palavras_posicoes), len(palavras_originais)),
+                  celulas]
+        for info in self.palavras_posicoes:
+            partes.append(REGISTRO_PALAVRA.pack(*self._colocacao(info['posicoes']), len(info['posicoes'])))
+        for texto in [info['palavra'] for info in self.palavras_posicoes] + list(palavras_originais):
+            codificado = texto.encode('utf-8')
+            partes.append(struct.pack('<H', len(codificado)))
+            partes.append(codificado)
+        return b''.join(partes)
+    
+    @staticmethod
+    def _ler_trecho(dados, deslocamento, comprimento):
+        """Trecho dos dados salvos e o deslocamento depois dele (ValueError se os dados acabarem antes)"""
+        fim = deslocamento + comprimento
+        if fim > len(dados):
+            raise ValueError("Puzzle salvo incompleto")
+        return dados[deslocamento:fim], fim
+    
+    @classmethod
+    def desserializar(cls, dados, backend='linhas'):
+        """Recria um gerador a partir de bytes (ou de um trecho de mmap) serializados"""
+        dados = memoryview(dados)
+        if len(dados) < CABECALHO_PUZZLE.size:
+            raise ValueError("Os dados não são um puzzle salvo")
+        magico, versao, tamanho, num_colocadas, num_originais = CABECALHO_PUZZLE.unpack_from(dados)
+        if magico != MAGICO_PUZZLE:
+            raise ValueError("Os dados não são um puzzle salvo")
+        if versao != VERSAO_FORMATO_PUZZLE:
+            raise ValueError(f"Versão {versao} do formato de puzzle não suportada")
+        
+        deslocamento = CABECALHO_PUZZLE.size
+        trecho, deslocamento = cls._ler_trecho(dados, deslocamento, tamanho * tamanho)
+        celulas = bytes(trecho).decode('latin-1')
+        trecho, deslocamento = cls._ler_trecho(dados, deslocamento, num_colocadas * REGISTRO_PALAVRA.size)
+        registros = list(REGISTRO_PALAVRA.iter_unpack(trecho))
+        
+        textos = []
+        for _ in range(num_colocadas + num_originais):
+            trecho, deslocamento = cls._ler_trecho(dados, deslocamento, 2)
+            (comprimento,) = struct.unpack('<H', trecho)
+            trecho, deslocamento = cls._ler_trecho(dados, deslocamento, comprimento)
+            textos.append(bytes(trecho).decode('utf-8'))
+        if deslocamento != len(dados):
+            raise ValueError("O puzzle salvo tem dados a mais no fim")
+        
+        gerador = cls(backend)
+        gerador.tamanho = tamanho
+        gerador.grade = [[letra if letra != VAZIO else None for letra in celulas[l:l + tamanho]]
+                         for l in range(0, tamanho * tamanho, tamanho)]
+        for (linha, coluna, direcao, comprimento), texto in zip(registros, textos):
+            if direcao >= len(DIRECOES) or not comprimento:
+                raise ValueError(f"Registro inválido para a palavra {texto!r}")
+            dl, dc = DIRECOES[direcao]
+            posicoes = [(linha + i * dl, coluna + i * dc) for i in range(comprimento)]
+            if not all(0 <= l < tamanho and 0 <= c < tamanho for l, c in (posicoes[0], posicoes[-1])):
+                raise ValueError(f"A palavra {texto!r} sai da grade")
+            gerador.palavras_posicoes.append({'palavra': texto, 'posicoes': posicoes})
+        gerador.palavras_originais = textos[num_colocadas:]
+        return gerador
+    
+    def salvar_puzzle(self, caminho, palavras_originais=None):
+        """Salva o puzzle em um arquivo no formato binário"""
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(self.serializar(palavras_originais))
+    
+    @classmethod
+    def carregar_puzzle(cls, caminho, backend='linhas'):
+        """Carrega um puzzle salvo com salvar_puzzle"""
+        with open(caminho, 'rb') as arquivo:
+            return cls.desserializar(arquivo.read(), backend)
     
-    def gerar_pdf(self, nome_arquivo, palavras_originais):
-        """Gera o PDF com o caça-palavras e o gabarito"""
+    def gerar_pdf(self, nome_arquivo, palavras_originais=None):
+        """Gera o PDF com o caça-palavras e o gabarito
+        
+        A grade é desenhada uma única vez como um form XObject, referenciado
+        pela página do caça-palavras e pela do gabarito; os destaques do
+        gabarito vão por cima, na própria página.
+        """
+        palavras_originais = self._lista_palavras(palavras_originais)
+        try:
+            from reportlab.lib.pagesizes import A4
+            from reportlab.pdfgen import canvas
+            from reportlab.lib import colors
+        except ImportError:
+            raise ImportError("Biblioteca 'reportlab' não encontrada! Use: pip install reportlab")
+        
         c = canvas.Canvas(nome_arquivo, pagesize=A4)
         largura, altura = A4
         
         # Calcular tamanho das células
+        margem, tamanho_celula, inicio_x, inicio_y = self._layout_pdf(largura, altura)
+        
+        cores_disponiveis = [
+            colors.red, colors.blue, colors.green, colors.orange,
+            colors.purple, colors.brown, colors.pink, colors.cyan,
+            colors.magenta, colors.yellow, colors.lightblue, colors.lightgreen
+        ]
+        
+        # Grades grandes demais para uma página são divididas em várias
+        if tamanho_celula < TAMANHO_MINIMO_CELULA_PDF:
+            self._gerar_pdf_mosaico(c, largura, altura, palavras_originais, cores_disponiveis)
+            c.save()
+            return True
+        
+        # Grade compartilhada pelas duas páginas
+        c.beginForm("grade")
+        self._desenhar_grade_pdf(c, 0, self.tamanho, 0, self.tamanho, inicio_x, inicio_y, tamanho_celula)
+        c.endForm()
+        
+        # PÁGINA 1: CAÇA-PALAVRAS (a lista continua em outra página se não couber)
+        restantes = self._desenhar_pagina_caca_pdf(c, "grade", "CAÇA-PALAVRAS", palavras_originais,
+                                                   largura, altura)
+        c.showPage()
+        if restantes:
+            self._desenhar_lista_palavras_pdf(c, largura, altura, margem, restantes)
+        
+        # PÁGINA 2: GABARITO
+        
+        c.setFont("Helvetica-Bold", 20)
+        c.drawCentredString(largura / 2, altura - 30, "GABARITO")
+        c.doForm("grade")
+        
+        # Destacar palavras com cores diferentes
+        self._desenhar_destaques_pdf(c, cores_disponiveis, (0, self.tamanho, 0, self.tamanho),
+                                     inicio_x, inicio_y, tamanho_celula)
+        
+        c.save()
+        return True
+    
+    def _layout_pdf(self, largura, altura):
+        """Margem, tamanho da célula e canto superior esquerdo da grade na página"""
         margem = 50
         espaco_disponivel = min(largura - 2 * margem, altura - 200)
         tamanho_celula = espaco_disponivel / self.tamanho
+        inicio_x = (largura - (tamanho_celula * self.tamanho)) / 2
+        inicio_y = altura - 100
+        return margem, tamanho_celula, inicio_x, inicio_y
+    
+    def _desenhar_pagina_caca_pdf(self, c, nome_form, titulo, palavras_originais, largura, altura):
+        """Título, grade (form XObject já definido) e lista de palavras em duas colunas
         
-        # PÁGINA 1: CAÇA-PALAVRAS
+        Listas longas usam até COLUNAS_MAXIMAS_LISTA colunas; devolve as
+        palavras que ainda assim não couberam na página.
+        """
+        margem, tamanho_celula, inicio_x, inicio_y = self._layout_pdf(largura, altura)
         c.setFont("Helvetica-Bold", 20)
-        c.drawCentredString(largura / 2, altura - 30, "CAÇA-PALAVRAS")
+        c.drawCentredString(largura / 2, altura - 30, titulo)
+        c.doForm(nome_form)
+        
+        # Lista de palavras
+        c.setFont("Helvetica-Bold", 14)
+        y_palavras = inicio_y - (self.tamanho * tamanho_celula) - 30
+        c.drawString(margem, y_palavras, "PALAVRAS:")
+        
+        c.setFont("Helvetica", 11)
+        y_atual = y_palavras - 20
+        linhas_cabem = max(1, int((y_atual - 30) // 15) + 1)
+        colunas = min(COLUNAS_MAXIMAS_LISTA, max(2, -(-len(palavras_originais) // linhas_cabem)))
+        largura_coluna = (largura - 2 * margem) / colunas
+        cabem = colunas * linhas_cabem
+        
+        for idx, palavra in enumerate(palavras_originais[:cabem]):
+            linha, coluna = divmod(idx, colunas)
+            c.drawString(margem + coluna * largura_coluna, y_atual - linha * 15, f"• {palavra}")
+        return palavras_originais[cabem:]
+    
+    def _desenhar_grade_pdf(self, c, l0, l1, c0, c1, inicio_x, inicio_y, tamanho_celula):
+        """Desenha as células [l0, l1) x [c0, c1) da grade
+        
+        As bordas saem em um único caminho de linhas horizontais e verticais e
+        as letras em um objeto de texto por linha da grade.
+        """
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        
+        x_fim = inicio_x + (c1 - c0) * tamanho_celula
+        y_fim = inicio_y - (l1 - l0) * tamanho_celula
+        caminho = c.beginPath()
+        for i in range(l1 - l0 + 1):
+            y = inicio_y - i * tamanho_celula
+            caminho.moveTo(inicio_x, y)
+            caminho.lineTo(x_fim, y)
+        for j in range(c1 - c0 + 1):
+            x = inicio_x + j * tamanho_celula
+            caminho.moveTo(x, inicio_y)
+            caminho.lineTo(x, y_fim)
+        c.drawPath(caminho, stroke=1, fill=0)
+        
+        # Letras centralizadas: a largura de cada letra é calculada uma vez só
+        tamanho_fonte = int(tamanho_celula * 0.6)
+        larguras = {}
+        for i in range(l0, l1):
+            texto = c.beginText()
+            texto.setFont("Helvetica", tamanho_fonte)
+            y = inicio_y - (i - l0) * tamanho_celula - tamanho_celula / 2 - int(tamanho_celula * 0.2)
+            for j in range(c0, c1):
+                letra = self.grade[i][j]
+                largura_letra = larguras.get(letra)
+                if largura_letra is None:
+                    largura_letra = larguras[letra] = stringWidth(letra, "Helvetica", tamanho_fonte)
+                texto.setTextOrigin(inicio_x + (j - c0 + 0.5) * tamanho_celula - largura_letra / 2, y)
+                texto.textOut(letra)
+            c.drawText(texto)
+    
+    def _desenhar_destaques_pdf(self, c, cores_disponiveis, bloco, inicio_x, inicio_y, tamanho_celula,
+                                recortar=False):
+        """Desenha o retângulo de cada palavra que aparece no bloco (l0, l1, c0, c1)
+        
+        Com recortar=True os destaques são cortados no limite do bloco, para
+        palavras que continuam em outra página.
+        """
+        l0, l1, c0, c1 = bloco
+        c.saveState()
+        if recortar:
+            recorte = c.beginPath()
+            recorte.rect(inicio_x, inicio_y - (l1 - l0) * tamanho_celula,
+                         (c1 - c0) * tamanho_celula, (l1 - l0) * tamanho_celula)
+            c.clipPath(recorte, stroke=0, fill=0)
+        c.setLineWidth(3)
+        
+        for idx, palavra_info in enumerate(self.palavras_posicoes):
+            posicoes = palavra_info['posicoes']
+            if len(posicoes) == 0:
+                continue
+            
+            # Calcular retângulo envolvente
+            linhas = [pos[0] for pos in posicoes]
+            colunas = [pos[1] for pos in posicoes]
+            
+            min_linha = min(linhas)
+            max_linha = max(linhas)
+            min_coluna = min(colunas)
+            max_coluna = max(colunas)
+            if max_linha < l0 or min_linha >= l1 or max_coluna < c0 or min_coluna >= c1:
+                continue
+            
+            c.setStrokeColor(cores_disponiveis[idx % len(cores_disponiveis)])
+            x1 = inicio_x + (min_coluna - c0) * tamanho_celula
+            y1 = inicio_y - (min_linha - l0) * tamanho_celula
+            largura_ret = (max_coluna - min_coluna + 1) * tamanho_celula
+            altura_ret = (max_linha - min_linha + 1) * tamanho_celula
+            
+            c.rect(x1, y1 - altura_ret, largura_ret, altura_ret, stroke=1, fill=0)
+        c.restoreState()
+    
+    def _blocos_mosaico(self, linhas_por_pagina, colunas_por_pagina):
+        """Divide a grade em blocos (linha_ini, linha_fim, coluna_ini, coluna_fim), um por página"""
+        return [(l0, min(l0 + linhas_por_pagina, self.tamanho), c0, min(c0 + colunas_por_pagina, self.tamanho))
+                for l0 in range(0, self.tamanho, linhas_por_pagina)
+                for c0 in range(0, self.tamanho, colunas_por_pagina)]
+    
+    def _gerar_pdf_mosaico(self, c, largura, altura, palavras_originais, cores_disponiveis):
+        """Gera o PDF de grades grandes dividindo a grade em páginas A4
+        
+        Cada página mostra um bloco da grade com a numeração das linhas e
+        colunas nas bordas. Depois vêm as páginas da lista de palavras e o
+        gabarito, dividido nos mesmos blocos. Cada bloco é um form XObject
+        usado tanto na página do caça-palavras quanto na do gabarito.
+        """
+        margem = 40
+        guia = 20  # espaço da numeração de linhas e colunas
+        tamanho_celula = TAMANHO_CELULA_MOSAICO_PDF
+        topo = altura - margem - 50
+        colunas_por_pagina = int((largura - 2 * margem - guia) // tamanho_celula)
+        linhas_por_pagina = int((topo - guia - margem) // tamanho_celula)
+        blocos = self._blocos_mosaico(linhas_por_pagina, colunas_por_pagina)
+        inicio_y = topo - guia
+        
+        def inicio_x_bloco(c0, c1):
+            return (largura - guia - (c1 - c0) * tamanho_celula) / 2 + guia
+        
+        for numero, (l0, l1, c0, c1) in enumerate(blocos, 1):
+            inicio_x = inicio_x_bloco(c0, c1)
+            c.beginForm(f"bloco{numero}")
+            
+            # Numeração das colunas (em cima) e das linhas (à esquerda)
+            c.setFont("Helvetica", tamanho_celula * 0.4)
+            for j in range(c0, c1):
+                c.drawCentredString(inicio_x + (j - c0 + 0.5) * tamanho_celula, inicio_y + 5, str(j + 1))
+            for i in range(l0, l1):
+                c.drawRightString(inicio_x - 4, inicio_y - (i - l0 + 0.6) * tamanho_celula, str(i + 1))
+            
+            self._desenhar_grade_pdf(c, l0, l1, c0, c1, inicio_x, inicio_y, tamanho_celula)
+            c.endForm()
+        
+        for titulo in ("CAÇA-PALAVRAS", "GABARITO"):
+            for numero, bloco in enumerate(blocos, 1):
+                l0, l1, c0, c1 = bloco
+                c.setFont("Helvetica-Bold", 20)
+                c.drawCentredString(largura / 2, altura - margem, titulo)
+                c.setFont("Helvetica", 10)
+                c.drawCentredString(largura / 2, altura - margem - 20,
+                                    f"Parte {numero}/{len(blocos)} - linhas {l0 + 1} a {l1}, "
+                                    f"colunas {c0 + 1} a {c1}")
+                c.doForm(f"bloco{numero}")
+                
+                if titulo == "GABARITO":
+                    self._desenhar_destaques_pdf(c, cores_disponiveis, bloco, inicio_x_bloco(c0, c1),
+                                                 inicio_y, tamanho_celula, recortar=True)
+                
+                c.showPage()
+            
+            if titulo == "CAÇA-PALAVRAS":
+                self._desenhar_lista_palavras_pdf(c, largura, altura, margem, palavras_originais)
+    
+    def _desenhar_lista_palavras_pdf(self, c, largura, altura, margem, palavras_originais):
+        """Lista de palavras em três colunas, continuando em quantas páginas forem necessárias"""
+        colunas = 3
+        espacamento = 14
+        linhas_por_pagina = int((altura - 2 * margem - 40) // espacamento)
+        por_pagina = colunas * linhas_por_pagina
+        largura_coluna = (largura - 2 * margem) / colunas
+        
+        for inicio in range(0, len(palavras_originais), por_pagina):
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(margem, altura - margem, "PALAVRAS:")
+            c.setFont("Helvetica", 10)
+            for k, palavra in enumerate(palavras_originais[inicio:inicio + por_pagina]):
+                coluna, linha = divmod(k, linhas_por_pagina)
+                c.drawString(margem + coluna * largura_coluna,
+                             altura - margem - 30 - linha * espacamento, f"• {palavra}")
+            c.showPage()
+    
+    def gerar_jpeg(self, nome_arquivo, palavras_originais=None, incluir_gabarito=True, modo='RGB',
+                   dpi=DPI_IMAGEM, qualidade=QUALIDADE_JPEG, progressivo=False):
+        """Gera imagem JPEG com o caça-palavras e opcionalmente o gabarito
+        
+        Com gabarito, as duas imagens são codificadas ao mesmo tempo.
+        progressivo=True grava o JPEG otimizado e progressivo (menor, mesma
+        qualidade). Veja renderizar_paginas_jpeg para modo e dpi.
+        """
+        return self._gerar_imagens(nome_arquivo, '.jpeg', palavras_originais, incluir_gabarito, modo, dpi,
+                                   qualidade=qualidade, progressivo=progressivo)
+    
+    def gerar_png(self, nome_arquivo, palavras_originais=None, incluir_gabarito=True, modo='L', dpi=DPI_IMAGEM):
+        """Gera imagem PNG com o caça-palavras e opcionalmente o gabarito (por padrão em tons de cinza)"""
+        return self._gerar_imagens(nome_arquivo, '.png', palavras_originais, incluir_gabarito, modo, dpi)
+    
+    def _gerar_imagens(self, nome_arquivo, formato, palavras_originais, incluir_gabarito, modo, dpi, **opcoes):
+        """Desenha as páginas e grava cada uma no formato pedido"""
+        if incluir_gabarito:
+            base_nome = nome_arquivo.rsplit('.', 1)[0]
+            destinos = [f"{base_nome}_caca{formato}", f"{base_nome}_gabarito{formato}"]
+        else:
+            destinos = [nome_arquivo]
+        # Só a lista guarda as imagens: cada uma é liberada assim que codificada
+        paginas = self.renderizar_paginas_jpeg(palavras_originais, incluir_gabarito, modo, dpi)
+        paginas = list(zip(paginas, destinos))
+        _salvar_imagens(paginas, formato, dpi=dpi, **opcoes)
+        return True
+    
+    def renderizar_em_memoria(self, formato, palavras_originais=None, incluir_gabarito=True, **opcoes_imagem):
+        """Gera o arquivo do formato pedido sem gravar em disco
+        
+        Devolve uma lista de (sufixo, bytes); o sufixo completa o nome do
+        arquivo sem extensão (o JPEG ou PNG com gabarito rende duas imagens).
+        opcoes_imagem (modo, dpi, qualidade, progressivo) valem para JPEG e PNG.
+        """
+        import io
+        if formato in FORMATOS_IMAGEM:
+            modo = opcoes_imagem.pop('modo', None) or ('RGB' if formato == '.jpeg' else 'L')
+            dpi = opcoes_imagem.setdefault('dpi', DPI_IMAGEM)
+            if formato == '.png':
+                opcoes_imagem = {'dpi': dpi}
+            sufixos = [f'_caca{formato}', f'_gabarito{formato}'] if incluir_gabarito else [formato]
+            buffers = [io.BytesIO() for _ in sufixos]
+            # Só a lista guarda as imagens: cada uma é liberada assim que codificada
+            paginas = self.renderizar_paginas_jpeg(palavras_originais, incluir_gabarito, modo, dpi)
+            paginas = list(zip(paginas, buffers))
+            _salvar_imagens(paginas, formato, **opcoes_imagem)
+            return [(sufixo, buffer.getvalue()) for sufixo, buffer in zip(sufixos, buffers)]
+        
+        buffer = io.BytesIO()
+        if formato == '.pdf':
+            self.gerar_pdf(buffer, palavras_originais)
+        elif formato == '.docx':
+            self.gerar_docx(buffer, palavras_originais)
+        else:
+            raise ValueError(f"Formato desconhecido: {formato}")
+        return [(formato, buffer.getvalue())]
+    
+    def formatos_disponiveis(self):
+        """Formatos que podem ser gerados para esta grade (bibliotecas instaladas e tamanho)"""
+        formatos = ['.pdf']
+        if self.tamanho <= TAMANHO_MAXIMO_JPEG_DOCX:
+            if PILLOW_DISPONIVEL:
+                formatos.append('.jpeg')
+            if DOCX_DISPONIVEL:
+                formatos.append('.docx')
+        return formatos
+    
+    def renderizar_todos_em_memoria(self, palavras_originais=None, usar_processos=True):
+        """Gera todos os formatos disponíveis da mesma grade ao mesmo tempo
+        
+        Cada formato roda em um processo (ou thread, com usar_processos=False)
+        sobre uma cópia congelada da grade e das posições, então o tempo total
+        fica próximo ao do formato mais lento. Devolve a lista de (sufixo, bytes).
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        formatos = self.formatos_disponiveis()
+        palavras_originais = self._lista_palavras(palavras_originais)
+        grade = [list(linha) for linha in self.grade]
+        posicoes = [{'palavra': info['palavra'], 'posicoes': list(info['posicoes'])}
+                    for info in self.palavras_posicoes]
+        
+        executor_classe = ProcessPoolExecutor if usar_processos else ThreadPoolExecutor
+        with executor_classe(max_workers=len(formatos)) as executor:
+            futuros = [executor.submit(_renderizar_grade_congelada, grade, posicoes, formato, palavras_originais)
+                       for formato in formatos]
+            return [arquivo for futuro in futuros for arquivo in futuro.result()]
+    
+    def gerar_todos_formatos(self, nome_arquivo, palavras_originais=None, usar_processos=True):
+        """Gera PDF, JPEG (com gabarito) e DOCX do mesmo puzzle; devolve os arquivos gravados"""
+        base_nome = os.path.splitext(nome_arquivo)[0]
+        arquivos = []
+        for sufixo, conteudo in self.renderizar_todos_em_memoria(palavras_originais, usar_processos):
+            with open(base_nome + sufixo, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            arquivos.append(base_nome + sufixo)
+        return arquivos
+    
+    def renderizar_paginas_jpeg(self, palavras_originais=None, incluir_gabarito=True, modo='RGB', dpi=DPI_IMAGEM):
+        """Desenha as páginas da imagem e devolve (caça-palavras, gabarito ou None)
+        
+        A grade é desenhada uma única vez; o gabarito parte de uma cópia dela,
+        com os destaques desenhados por cima. modo é 'RGB', 'L' (cinza) ou '1'
+        (preto e branco); fora do RGB o gabarito sai em paleta ('P'). dpi
+        muda a resolução da página A4 (300 por padrão; 100 ou 150 bastam para
+        pré-visualizações).
+        """
+        palavras_originais = self._lista_palavras(palavras_originais)
+        if modo not in MODOS_IMAGEM:
+            raise ValueError(f"Modo de imagem desconhecido: {modo}")
+        try:
+            from PIL import Image, ImageDraw
+        except ImportError:
+            raise ImportError("Biblioteca PIL/Pillow não está instalada. Use: pip install Pillow")
+        
+        # Medidas em 300 DPI, convertidas para a resolução pedida
+        escala = dpi / DPI_IMAGEM
+        
+        # Dimensões da imagem
+        largura_img = round(2480 * escala)  # A4
+        altura_img = round(3508 * escala)
+        
+        # Criar imagem para caça-palavras
+        img = Image.new(modo, (largura_img, altura_img), 'white')
+        draw = ImageDraw.Draw(img)
+        
+        # Fontes e letras da grade ficam em cache entre as chamadas
+        fonte_titulo = _carregar_fonte(round(80 * escala))
+        fonte_palavra = _carregar_fonte(round(40 * escala))
+        atlas = _obter_atlas(int(1500 * escala / self.tamanho))
+        
+        # Calcular dimensões da grade
+        margem = 200 * escala
+        espaco_disponivel = min(largura_img - 2 * margem, altura_img - 800 * escala)
+        tamanho_celula = espaco_disponivel / self.tamanho
+        
+        inicio_x = (largura_img - (tamanho_celula * self.tamanho)) / 2
+        inicio_y = 300 * escala
         
-        # Desenhar a grade
-        inicio_x = (largura - (tamanho_celula * self.tamanho)) / 2
-        inicio_y = altura - 100
+        # Desenhar grade
+        self._desenhar_celulas_jpeg(img, draw, atlas, inicio_x, inicio_y, tamanho_celula,
+                                    max(1, round(2 * escala)))
         
-        c.setFont("Helvetica", int(tamanho_celula * 0.6))
+        # O gabarito reaproveita a grade já desenhada
+        img_gab = None
+        if incluir_gabarito:
+            img_gab = img.copy() if modo == 'RGB' else self._paleta_gabarito(img)
         
-        for i in range(self.tamanho):
-            for j in range(self.tamanho):
-                x = inicio_x + j * tamanho_celula
-                y = inicio_y - i * tamanho_celula
-                
-                # Desenhar borda da célula
-                c.rect(x, y - tamanho_celula, tamanho_celula, tamanho_celula)
-                
-                # Desenhar letra centralizada
-                letra = self.grade[i][j]
-                texto_x = x + tamanho_celula / 2
-                texto_y = y - tamanho_celula / 2 - int(tamanho_celula * 0.2)
-                c.drawCentredString(texto_x, texto_y, letra)
+        # Título
+        self._desenhar_titulo_jpeg(draw, "CAÇA-PALAVRAS", fonte_titulo, largura_img, 100 * escala)
         
         # Lista de palavras
-        c.setFont("Helvetica-Bold", 14)
-        y_palavras = inicio_y - (self.tamanho * tamanho_celula) - 30
-        c.drawString(margem, y_palavras, "PALAVRAS:")
+        y_palavras = inicio_y + (self.tamanho * tamanho_celula) + 80 * escala
+        draw.text((margem, y_palavras), "PALAVRAS:", fill='black', font=fonte_palavra)
         
-        c.setFont("Helvetica", 11)
-        y_atual = y_palavras - 20
-        x_coluna1 = margem
-        x_coluna2 = largura / 2
-        coluna_atual = 0
+        y_atual = y_palavras + 60 * escala
+        # Listas longas usam mais colunas e, se ainda não couberem, letras menores
+        espacamento = 50 * escala
+        linhas_cabem = max(1, int((altura_img - 100 * escala - y_atual) // espacamento))
+        colunas = min(COLUNAS_MAXIMAS_LISTA, max(2, -(-len(palavras_originais) // linhas_cabem)))
+        if len(palavras_originais) > colunas * linhas_cabem:
+            reducao = colunas * linhas_cabem / len(palavras_originais)
+            espacamento *= reducao
+            fonte_palavra = _carregar_fonte(max(1, int(40 * escala * reducao)))
+        largura_coluna = (largura_img - 2 * margem) / colunas
         
         for idx, palavra in enumerate(palavras_originais):
-            if coluna_atual == 0:
-                c.drawString(x_coluna1, y_atual, f"• {palavra}")
-            else:
-                c.drawString(x_coluna2, y_atual, f"• {palavra}")
-            
-            coluna_atual = 1 - coluna_atual
-            if coluna_atual == 0:
-                y_atual -= 15
-        
-        # PÁGINA 2: GABARITO
-        c.showPage()
-        
-        c.setFont("Helvetica-Bold", 20)
-        c.drawCentredString(largura / 2, altura - 30, "GABARITO")
+            linha, coluna = divmod(idx, colunas)
+            draw.text((margem + coluna * largura_coluna, y_atual + linha * espacamento), f"• {palavra}",
+                      fill='black', font=fonte_palavra)
         
-        # Desenhar a grade novamente
-        c.setFont("Helvetica", int(tamanho_celula * 0.6))
-        
-        for i in range(self.tamanho):
-            for j in range(self.tamanho):
-                x = inicio_x + j * tamanho_celula
-                y = inicio_y - i * tamanho_celula
-                
-                # Desenhar borda da célula
-                c.rect(x, y - tamanho_celula, tamanho_celula, tamanho_celula)
-                
-                # Desenhar letra
-                letra = self.grade[i][j]
-                texto_x = x + tamanho_celula / 2
-                texto_y = y - tamanho_celula / 2 - int(tamanho_celula * 0.2)
-                c.drawCentredString(texto_x, texto_y, letra)
+        if img_gab is None:
+            return img, None
         
-        # Destacar palavras com cores diferentes
-        cores_disponiveis = [
-            colors.red, colors.blue, colors.green, colors.orange,
-            colors.purple, colors.brown, colors.pink, colors.cyan,
-            colors.magenta, colors.yellow, colors.lightblue, colors.lightgreen
-        ]
+        draw_gab = ImageDraw.Draw(img_gab)
+        # Na paleta o preto é o índice 0 e as cores vêm depois dos tons de cinza
+        preto = 'black' if modo == 'RGB' else 0
+        self._desenhar_titulo_jpeg(draw_gab, "GABARITO", fonte_titulo, largura_img, 100 * escala, preto)
         
+        # Destacar palavras
+        largura_destaque = max(1, round(5 * escala))
         for idx, palavra_info in enumerate(self.palavras_posicoes):
-            cor = cores_disponiveis[idx % len(cores_disponiveis)]
-            c.setStrokeColor(cor)
-            c.setLineWidth(3)
-            
+            indice_cor = idx % len(CORES_GABARITO_IMAGEM)
+            cor = CORES_GABARITO_IMAGEM[indice_cor] if modo == 'RGB' else TONS_CINZA_PALETA + indice_cor
             posicoes = palavra_info['posicoes']
+            
             if len(posicoes) > 0:
-                # Calcular retângulo envolvente
                 linhas = [pos[0] for pos in posicoes]
                 colunas = [pos[1] for pos in posicoes]
                 
@@ -339,155 +2173,59 @@ class GeradorCacaPalavras:
                 max_coluna = max(colunas)
                 
                 x1 = inicio_x + min_coluna * tamanho_celula
-                y1 = inicio_y - min_linha * tamanho_celula
-                largura_ret = (max_coluna - min_coluna + 1) * tamanho_celula
-                altura_ret = (max_linha - min_linha + 1) * tamanho_celula
+                y1 = inicio_y + min_linha * tamanho_celula
+                x2 = inicio_x + (max_coluna + 1) * tamanho_celula
+                y2 = inicio_y + (max_linha + 1) * tamanho_celula
                 
-                c.rect(x1, y1 - altura_ret, largura_ret, altura_ret, stroke=1, fill=0)
+                draw_gab.rectangle([x1, y1, x2, y2], outline=cor, width=largura_destaque)
         
-        c.save()
-        return True
+        return img, img_gab
     
-    def gerar_jpeg(self, nome_arquivo, palavras_originais, incluir_gabarito=True):
-        """Gera imagem JPEG com o caça-palavras e opcionalmente o gabarito"""
-        if not PILLOW_DISPONIVEL:
-            raise ImportError("Biblioteca PIL/Pillow não está instalada. Use: pip install Pillow")
-        
-        # Dimensões da imagem
-        largura_img = 2480  # A4 em 300 DPI
-        altura_img = 3508
-        
-        # Criar imagem para caça-palavras
-        img = Image.new('RGB', (largura_img, altura_img), 'white')
-        draw = ImageDraw.Draw(img)
-        
-        # Tentar carregar fonte, usar padrão se não encontrar
-        try:
-            fonte_titulo = ImageFont.truetype("arial.ttf", 80)
-            fonte_celula = ImageFont.truetype("arial.ttf", int(1500 / self.tamanho))
-            fonte_palavra = ImageFont.truetype("arial.ttf", 40)
-        except:
-            fonte_titulo = ImageFont.load_default()
-            fonte_celula = ImageFont.load_default()
-            fonte_palavra = ImageFont.load_default()
-        
-        # Título
-        titulo = "CAÇA-PALAVRAS"
+    @staticmethod
+    def _paleta_gabarito(img):
+        """Cópia da página ('L' ou '1') em paleta: 16 tons de cinza seguidos das cores dos destaques"""
+        if img.mode == '1':
+            img = img.convert('L')
+        # Cada tom de cinza vira o índice do tom mais próximo; putpalette transforma a cópia 'L' em 'P'
+        passo = 256 // TONS_CINZA_PALETA
+        copia = img.point([valor // passo for valor in range(256)])
+        paleta = []
+        for tom in range(TONS_CINZA_PALETA):
+            paleta += [tom * 255 // (TONS_CINZA_PALETA - 1)] * 3
+        for cor in CORES_GABARITO_IMAGEM:
+            paleta += cor
+        copia.putpalette(paleta)
+        return copia
+    
+    def _desenhar_titulo_jpeg(self, draw, titulo, fonte_titulo, largura_img, y=100, cor='black'):
+        """Título centralizado no topo da imagem"""
         bbox = draw.textbbox((0, 0), titulo, font=fonte_titulo)
         titulo_largura = bbox[2] - bbox[0]
-        draw.text((largura_img/2 - titulo_largura/2, 100), titulo, fill='black', font=fonte_titulo)
-        
-        # Calcular dimensões da grade
-        margem = 200
-        espaco_disponivel = min(largura_img - 2 * margem, altura_img - 800)
-        tamanho_celula = espaco_disponivel / self.tamanho
-        
-        inicio_x = (largura_img - (tamanho_celula * self.tamanho)) / 2
-        inicio_y = 300
-        
-        # Desenhar grade
+        draw.text((largura_img/2 - titulo_largura/2, y), titulo, fill=cor, font=fonte_titulo)
+    
+    def _desenhar_celulas_jpeg(self, img, draw, atlas, inicio_x, inicio_y, tamanho_celula, largura_borda=2):
+        """Desenha bordas e letras da grade, colando as letras pré-renderizadas do atlas"""
         for i in range(self.tamanho):
             for j in range(self.tamanho):
                 x = inicio_x + j * tamanho_celula
                 y = inicio_y + i * tamanho_celula
                 
                 # Desenhar borda
-                draw.rectangle([x, y, x + tamanho_celula, y + tamanho_celula], outline='black', width=2)
+                draw.rectangle([x, y, x + tamanho_celula, y + tamanho_celula], outline='black',
+                               width=largura_borda)
                 
                 # Desenhar letra
-                letra = self.grade[i][j]
-                bbox = draw.textbbox((0, 0), letra, font=fonte_celula)
-                letra_largura = bbox[2] - bbox[0]
-                letra_altura = bbox[3] - bbox[1]
-                texto_x = x + tamanho_celula/2 - letra_largura/2
-                texto_y = y + tamanho_celula/2 - letra_altura/2
-                draw.text((texto_x, texto_y), letra, fill='black', font=fonte_celula)
-        
-        # Lista de palavras
-        y_palavras = inicio_y + (self.tamanho * tamanho_celula) + 80
-        draw.text((margem, y_palavras), "PALAVRAS:", fill='black', font=fonte_palavra)
-        
-        y_atual = y_palavras + 60
-        x_coluna1 = margem
-        x_coluna2 = largura_img / 2
-        coluna_atual = 0
-        
-        for palavra in palavras_originais:
-            if coluna_atual == 0:
-                draw.text((x_coluna1, y_atual), f"• {palavra}", fill='black', font=fonte_palavra)
-            else:
-                draw.text((x_coluna2, y_atual), f"• {palavra}", fill='black', font=fonte_palavra)
-            
-            coluna_atual = 1 - coluna_atual
-            if coluna_atual == 0:
-                y_atual += 50
-        
-        # Salvar primeira imagem
-        if incluir_gabarito:
-            base_nome = nome_arquivo.rsplit('.', 1)[0]
-            img.save(f"{base_nome}_caca.jpeg", 'JPEG', quality=95)
-            
-            # Criar imagem do gabarito
-            img_gab = Image.new('RGB', (largura_img, altura_img), 'white')
-            draw_gab = ImageDraw.Draw(img_gab)
-            
-            # Título gabarito
-            titulo_gab = "GABARITO"
-            bbox = draw_gab.textbbox((0, 0), titulo_gab, font=fonte_titulo)
-            titulo_largura = bbox[2] - bbox[0]
-            draw_gab.text((largura_img/2 - titulo_largura/2, 100), titulo_gab, fill='black', font=fonte_titulo)
-            
-            # Desenhar grade
-            for i in range(self.tamanho):
-                for j in range(self.tamanho):
-                    x = inicio_x + j * tamanho_celula
-                    y = inicio_y + i * tamanho_celula
-                    
-                    draw_gab.rectangle([x, y, x + tamanho_celula, y + tamanho_celula], outline='black', width=2)
-                    
-                    letra = self.grade[i][j]
-                    bbox = draw_gab.textbbox((0, 0), letra, font=fonte_celula)
-                    letra_largura = bbox[2] - bbox[0]
-                    letra_altura = bbox[3] - bbox[1]
-                    texto_x = x + tamanho_celula/2 - letra_largura/2
-                    texto_y = y + tamanho_celula/2 - letra_altura/2
-                    draw_gab.text((texto_x, texto_y), letra, fill='black', font=fonte_celula)
-            
-            # Destacar palavras
-            cores_rgb = [
-                (255, 0, 0), (0, 0, 255), (0, 128, 0), (255, 165, 0),
-                (128, 0, 128), (165, 42, 42), (255, 192, 203), (0, 255, 255)
-            ]
-            
-            for idx, palavra_info in enumerate(self.palavras_posicoes):
-                cor = cores_rgb[idx % len(cores_rgb)]
-                posicoes = palavra_info['posicoes']
-                
-                if len(posicoes) > 0:
-                    linhas = [pos[0] for pos in posicoes]
-                    colunas = [pos[1] for pos in posicoes]
-                    
-                    min_linha = min(linhas)
-                    max_linha = max(linhas)
-                    min_coluna = min(colunas)
-                    max_coluna = max(colunas)
-                    
-                    x1 = inicio_x + min_coluna * tamanho_celula
-                    y1 = inicio_y + min_linha * tamanho_celula
-                    x2 = inicio_x + (max_coluna + 1) * tamanho_celula
-                    y2 = inicio_y + (max_linha + 1) * tamanho_celula
-                    
-                    draw_gab.rectangle([x1, y1, x2, y2], outline=cor, width=5)
-            
-            img_gab.save(f"{base_nome}_gabarito.jpeg", 'JPEG', quality=95)
-        else:
-            img.save(nome_arquivo, 'JPEG', quality=95)
-        
-        return True
+                atlas.colar_centralizado(draw, self.grade[i][j], x + tamanho_celula / 2, y + tamanho_celula / 2)
     
-    def gerar_docx(self, nome_arquivo, palavras_originais):
+    def gerar_docx(self, nome_arquivo, palavras_originais=None):
         """Gera documento DOCX com o caça-palavras e o gabarito em tabelas"""
-        if not DOCX_DISPONIVEL:
+        palavras_originais = self._lista_palavras(palavras_originais)
+        try:
+            from docx import Document
+            from docx.shared import Inches, Pt, RGBColor
+            from docx.enum.style import WD_STYLE_TYPE
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
+        except ImportError:
             raise ImportError("Biblioteca python-docx não está instalada. Use: pip install python-docx")
         
         doc = Document()
@@ -500,43 +2238,30 @@ class GeradorCacaPalavras:
             section.left_margin = Inches(0.5)
             section.right_margin = Inches(0.5)
         
+        # Calcular tamanho ideal das células
+        largura_celula = 6.5 / self.tamanho  # Total de 6.5 polegadas
+        tamanho_fonte = max(8, min(16, int(200 / self.tamanho)))
+        
+        # Estilos compartilhados pelas células, em vez de formatar cada run
+        estilo_celula = doc.styles.add_style('CelulaGrade', WD_STYLE_TYPE.PARAGRAPH)
+        estilo_celula.base_style = doc.styles['Normal']
+        estilo_celula.font.name = 'Arial'
+        estilo_celula.font.size = Pt(tamanho_fonte)
+        estilo_celula.font.bold = True
+        estilo_celula.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        estilo_celula.paragraph_format.space_before = Pt(0)
+        estilo_celula.paragraph_format.space_after = Pt(0)
+        
+        # Letras das palavras no gabarito em vermelho
+        estilo_destaque = doc.styles.add_style('LetraGabarito', WD_STYLE_TYPE.CHARACTER)
+        estilo_destaque.font.color.rgb = RGBColor(255, 0, 0)
+        
         # PÁGINA 1: CAÇA-PALAVRAS
         titulo = doc.add_heading('CAÇA-PALAVRAS', 0)
         titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
         # Criar tabela para a grade
-        tabela = doc.add_table(rows=self.tamanho, cols=self.tamanho)
-        tabela.style = 'Table Grid'
-        tabela.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Calcular tamanho ideal das células
-        largura_celula = 6.5 / self.tamanho  # Total de 6.5 polegadas
-        
-        # Configurar células
-        for i in range(self.tamanho):
-            row = tabela.rows[i]
-            row.height = Inches(largura_celula)  # Células quadradas
-            
-            for j in range(self.tamanho):
-                celula = row.cells[j]
-                celula.width = Inches(largura_celula)
-                celula.text = self.grade[i][j]
-                
-                # Centralizar texto vertical e horizontalmente
-                celula.vertical_alignment = 1  # 1 = CENTER
-                paragrafo = celula.paragraphs[0]
-                paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Formatar fonte
-                run = paragrafo.runs[0]
-                tamanho_fonte = max(8, min(16, int(200 / self.tamanho)))
-                run.font.size = Pt(tamanho_fonte)
-                run.font.bold = True
-                run.font.name = 'Arial'
-                
-                # Ajustar espaçamento do parágrafo
-                paragrafo.paragraph_format.space_before = Pt(0)
-                paragrafo.paragraph_format.space_after = Pt(0)
+        self._adicionar_tabela_grade_docx(doc, largura_celula)
         
         # Lista de palavras
         doc.add_paragraph()
@@ -563,59 +2288,624 @@ class GeradorCacaPalavras:
         titulo_gab = doc.add_heading('GABARITO', 0)
         titulo_gab.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # Criar tabela para o gabarito
-        tabela_gab = doc.add_table(rows=self.tamanho, cols=self.tamanho)
-        tabela_gab.style = 'Table Grid'
-        tabela_gab.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
         # Marcar células que fazem parte das palavras
         celulas_palavras = set()
         for palavra_info in self.palavras_posicoes:
             for pos in palavra_info['posicoes']:
                 celulas_palavras.add(pos)
         
-        # Configurar células do gabarito
-        for i in range(self.tamanho):
-            row = tabela_gab.rows[i]
-            row.height = Inches(largura_celula)
-            
-            for j in range(self.tamanho):
-                celula = row.cells[j]
-                celula.width = Inches(largura_celula)
-                celula.text = self.grade[i][j]
-                
-                # Centralizar texto
-                celula.vertical_alignment = 1
-                paragrafo = celula.paragraphs[0]
-                paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Formatar fonte
-                run = paragrafo.runs[0]
-                run.font.size = Pt(tamanho_fonte)
-                run.font.bold = True
-                run.font.name = 'Arial'
-                
-                # Destacar células com palavras em vermelho
-                if (i, j) in celulas_palavras:
-                    run.font.color.rgb = RGBColor(255, 0, 0)
-                    # Destacar fundo da célula
-                    shading_elm = OxmlElement('w:shd')
-                    shading_elm.set(qn('w:fill'), 'FFFF00')  # Amarelo
-                    celula._element.get_or_add_tcPr().append(shading_elm)
-                
-                # Ajustar espaçamento
-                paragrafo.paragraph_format.space_before = Pt(0)
-                paragrafo.paragraph_format.space_after = Pt(0)
+        # Criar tabela para o gabarito (células das palavras com fundo amarelo)
+        self._adicionar_tabela_grade_docx(doc, largura_celula, celulas_palavras)
         
         doc.save(nome_arquivo)
         return True
+    
+    def _adicionar_tabela_grade_docx(self, doc, largura_celula, celulas_destacadas=frozenset()):
+        """Adiciona a tabela da grade montando o XML de todas as linhas de uma vez
+        
+        O python-docx cria apenas a tabela vazia (estilo, alinhamento e
+        colunas). As linhas saem de um modelo de célula que usa os estilos
+        CelulaGrade e LetraGabarito, com um único parse para a tabela inteira.
+        """
+        from xml.sax.saxutils import escape
+        from docx.enum.table import WD_TABLE_ALIGNMENT
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import nsdecls
+        from docx.shared import Inches
+        
+        tabela = doc.add_table(rows=0, cols=self.tamanho)
+        tabela.style = 'Table Grid'
+        tabela.alignment = WD_TABLE_ALIGNMENT.CENTER
+        
+        # Células quadradas: mesma medida (em twips) para altura e largura
+        medida = Inches(largura_celula).twips
+        inicio_linha = f'<w:tr><w:trPr><w:trHeight w:val="{medida}"/></w:trPr>'
+        modelo_celula = ('<w:tc><w:tcPr><w:tcW w:w="%d" w:type="dxa"/>%%s<w:vAlign w:val="center"/></w:tcPr>'
+                         '<w:p><w:pPr><w:pStyle w:val="CelulaGrade"/></w:pPr><w:r>%%s<w:t>%%s</w:t></w:r></w:p></w:tc>'
+                         % medida)
+        fundo_destaque = '<w:shd w:val="clear" w:color="auto" w:fill="FFFF00"/>'
+        letra_destaque = '<w:rPr><w:rStyle w:val="LetraGabarito"/></w:rPr>'
+        
+        partes = [f'<w:tbl {nsdecls("w")}>']
+        for i in range(self.tamanho):
+            partes.append(inicio_linha)
+            for j in range(self.tamanho):
+                letra = escape(self.grade[i][j])
+                if (i, j) in celulas_destacadas:
+                    partes.append(modelo_celula % (fundo_destaque, letra_destaque, letra))
+                else:
+                    partes.append(modelo_celula % ('', '', letra))
+            partes.append('</w:tr>')
+        partes.append('</w:tbl>')
+        
+        tabela._tbl.extend(list(parse_xml(''.join(partes))))
+        return tabela
+    
+    
+def salvar_colecao_puzzles(caminho, geradores):
+    """Grava vários puzzles em um único arquivo, com um índice para acesso direto"""
+    blocos = [gerador.serializar() for gerador in geradores]
+    deslocamento = CABECALHO_COLECAO.size + ENTRADA_COLECAO.size * len(blocos)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(CABECALHO_COLECAO.pack(MAGICO_COLECAO, VERSAO_FORMATO_PUZZLE, len(blocos)))
+        for bloco in blocos:
+            arquivo.write(ENTRADA_COLECAO.pack(deslocamento, len(bloco)))
+            deslocamento += len(bloco)
+        for bloco in blocos:
+            arquivo.write(bloco)
+
+
+class ColecaoPuzzles:
+    """Coleção gravada por salvar_colecao_puzzles, lida por mmap
+    
+    Só o índice é lido ao abrir; cada puzzle é decodificado quando acessado.
+    """
+    
+    def __init__(self, caminho, backend='linhas'):
+        import mmap
+        self.caminho = caminho
+        self.backend = backend
+        self._arquivo = open(caminho, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivo vazio não pode ser mapeado
+            self._arquivo.close()
+            raise ValueError("O arquivo não é uma coleção de puzzles")
+        magico, versao, quantidade = (CABECALHO_COLECAO.unpack_from(self._mapa)
+                                      if len(self._mapa) >= CABECALHO_COLECAO.size else (b'', 0, 0))
+        if magico != MAGICO_COLECAO:
+            self.fechar()
+            raise ValueError("O arquivo não é uma coleção de puzzles")
+        if versao != VERSAO_FORMATO_PUZZLE:
+            self.fechar()
+            raise ValueError(f"Versão {versao} do formato de puzzle não suportada")
+        self._entradas = list(ENTRADA_COLECAO.iter_unpack(
+            self._mapa[CABECALHO_COLECAO.size:CABECALHO_COLECAO.size + ENTRADA_COLECAO.size * quantidade]))
+    
+    def __len__(self):
+        return len(self._entradas)
+    
+    def __getitem__(self, indice):
+        deslocamento, comprimento = self._entradas[indice]
+        with memoryview(self._mapa) as mapa:
+            return GeradorCacaPalavras.desserializar(mapa[deslocamento:deslocamento + comprimento],
+                                                     self.backend)
+    
+    def __iter__(self):
+        for indice in range(len(self)):
+            yield self[indice]
+    
+    def fechar(self):
+        """Libera o mapeamento e o arquivo"""
+        self._mapa.close()
+        self._arquivo.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def _arranjo(gerador):
+    """Palavras colocadas do gerador como [(palavra, linha, coluna, direcao)]"""
+    return [(info['palavra'],) + gerador._colocacao(info['posicoes']) for info in gerador.palavras_posicoes]
+
+
+def _tentar_tamanho(palavras, tamanho, usar_diagonais, usar_contrarias, rng, backend, parcial=None):
+    """Tenta arranjar as palavras na grade; devolve (gerador ou None, maior arranjo parcial)
+    
+    parcial é o arranjo das primeiras palavras deixado por uma grade menor que
+    falhou: ele cabe em qualquer grade maior, então a primeira tentativa parte
+    dele e só posiciona as palavras que faltam.
+    """
+    maior_parcial = None
+    for tentativa in range(TENTATIVAS_TAMANHO_AUTOMATICO):
+        gerador = GeradorCacaPalavras(backend, semente=rng.getrandbits(64))
+        gerador.criar_grade_vazia(tamanho)
+        inicio = 0
+        if tentativa == 0 and parcial:
+            for colocacao in parcial:
+                gerador.colocar_palavra(*colocacao)
+            inicio = len(parcial)
+        for palavra in palavras[inicio:]:
+            if gerador.inserir_palavras([palavra], usar_diagonais, usar_contrarias,
+                                        max_retrocessos=RETROCESSOS_TAMANHO_AUTOMATICO):
+                break
+        else:
+            return gerador, None
+        if maior_parcial is None or len(gerador.palavras_posicoes) > len(maior_parcial):
+            maior_parcial = _arranjo(gerador)
+    
+    # Grades apertadas raramente fecham por sorteio: a última tentativa é a busca completa
+    gerador = _busca_completa(palavras, tamanho, direcoes_disponiveis(usar_diagonais, usar_contrarias),
+                              rng, backend, PASSOS_BUSCA_TAMANHO_AUTOMATICO)
+    return gerador, (maior_parcial if gerador is None else None)
+
+
+def _busca_completa(palavras, tamanho, direcoes, rng, backend, limite):
+    """Busca com retrocesso por todas as posições legais, limitada a `limite` colocações
+    
+    As palavras entram na ordem dada; para cada uma são testadas primeiro as
+    posições que cruzam mais letras já gravadas, como pedem as grades
+    apertadas. Devolve o gerador com todas as palavras ou None.
+    """
+    gerador = GeradorCacaPalavras(backend, semente=rng.getrandbits(64))
+    gerador.criar_grade_vazia(tamanho)
+    # Posições ainda não testadas de cada palavra já colocada
+    pendentes = []
+    candidatas = None
+    passos = 0
+    while len(pendentes) < len(palavras):
+        if candidatas is None:
+            candidatas = gerador.listar_posicoes_validas(palavras[len(pendentes)], direcoes, True)
+            rng.shuffle(candidatas)
+            # Saem do fim da lista primeiro: mais cruzamentos e, no empate, mais perto
+            # do canto superior esquerdo, para as palavras se juntarem em um canto
+            candidatas.sort(key=lambda posicao: (posicao[3], -posicao[0] - posicao[1]))
+        if candidatas and passos < limite:
+            linha, coluna, direcao, _ = candidatas.pop()
+            gerador.colocar_palavra(palavras[len(pendentes)], linha, coluna, direcao)
+            passos += 1
+            pendentes.append(candidatas)
+            candidatas = None
+        elif pendentes and passos < limite:
+            gerador.remover_ultima_palavra()
+            candidatas = pendentes.pop()
+        else:
+            return None
+    return gerador
+
+
+def _recortar(gerador, minimo, rng, backend):
+    """Leva o arranjo para a menor grade quadrada que contém as palavras (se for menor que a atual)"""
+    celulas = [celula for info in gerador.palavras_posicoes for celula in info['posicoes']]
+    if not celulas:
+        return gerador
+    primeira_linha = min(l for l, _ in celulas)
+    primeira_coluna = min(c for _, c in celulas)
+    lado = max(minimo, max(l for l, _ in celulas) - primeira_linha + 1,
+               max(c for _, c in celulas) - primeira_coluna + 1)
+    if lado >= gerador.tamanho:
+        return gerador
+    recortado = GeradorCacaPalavras(backend, semente=rng.getrandbits(64))
+    recortado.criar_grade_vazia(lado)
+    for palavra, linha, coluna, direcao in _arranjo(gerador):
+        recortado.colocar_palavra(palavra, linha - primeira_linha, coluna - primeira_coluna, direcao)
+    return recortado
+
+
+def buscar_tamanho_minimo(palavras, usar_diagonais=False, usar_contrarias=True, semente=None, backend='linhas'):
+    """Procura a menor grade em que todas as palavras cabem
+    
+    Cada tamanho é testado com alguns sorteios, da palavra mais longa para a
+    mais curta, e o teste para na primeira palavra que não couber; se todos
+    falharem, ainda há uma busca completa com limite de passos. Um limite
+    superior é achado a partir da área das letras e depois refinado por
+    busca binária. Os testes reaproveitam o trabalho dos anteriores: um
+    arranjo que coube é recortado para o quadrado que as palavras ocupam (o
+    que já baixa o limite), e o arranjo parcial de um tamanho que falhou é o
+    ponto de partida do próximo tamanho maior. Devolve (gerador com as
+    palavras já colocadas na ordem da entrada, palavras não inseridas); o
+    tamanho escolhido fica em gerador.tamanho.
+    """
+    rng = random.Random(semente)
+    originais = [p.strip() for p in palavras if p.strip()]
+    normalizadas = [normalizar_palavra(p) for p in originais]
+    validas = sorted((p for p in normalizadas if p.texto), key=len, reverse=True)
+    maior = len(validas[0]) if validas else 0
+    
+    def concluir(gerador, nao_inseridas):
+        gerador.palavras_originais = originais
+        # Gabarito e cores seguem a ordem da entrada, como em inserir_palavras
+        indices = {}
+        for k in range(len(originais) - 1, -1, -1):
+            indices.setdefault(originais[k], []).append(k)
+        gerador.palavras_posicoes.sort(key=lambda info: indices[info['palavra']].pop())
+        return gerador, nao_inseridas
+    
+    inicio = max(TAMANHO_MINIMO, maior)
+    if inicio > TAMANHO_MAXIMO:
+        gerador = GeradorCacaPalavras(backend, semente=rng.getrandbits(64))
+        gerador.criar_grade_vazia(TAMANHO_MAXIMO)
+        return concluir(gerador, gerador.inserir_palavras(originais, usar_diagonais, usar_contrarias))
+    
+    # Limite superior: começa pela área das letras e cresce até tudo caber
+    total_letras = sum(len(p) for p in validas)
+    alto = min(TAMANHO_MAXIMO, max(inicio, int(total_letras ** 0.5) + 1))
+    baixo = inicio
+    parcial = None
+    while True:
+        melhor, parcial_alto = _tentar_tamanho(validas, alto, usar_diagonais, usar_contrarias, rng, backend, parcial)
+        if melhor is not None:
+            break
+        if alto == TAMANHO_MAXIMO:
+            gerador = GeradorCacaPalavras(backend, semente=rng.getrandbits(64))
+            gerador.criar_grade_vazia(TAMANHO_MAXIMO)
+            return concluir(gerador, gerador.inserir_palavras(validas, usar_diagonais, usar_contrarias))
+        parcial = parcial_alto
+        baixo = alto + 1
+        alto = min(TAMANHO_MAXIMO, max(alto + 1, alto * 5 // 4))
+    melhor = _recortar(melhor, inicio, rng, backend)
+    alto = melhor.tamanho
+    
+    # Busca binária entre o maior tamanho que falhou e o menor que coube
+    while baixo < alto:
+        meio = (baixo + alto) // 2
+        gerador, parcial_meio = _tentar_tamanho(validas, meio, usar_diagonais, usar_contrarias, rng, backend, parcial)
+        if gerador is not None:
+            melhor = _recortar(gerador, inicio, rng, backend)
+            alto = melhor.tamanho
+        else:
+            parcial = parcial_meio
+            baixo = meio + 1
+    
+    nao_inseridas = [p.original for p in normalizadas if not p.texto]
+    return concluir(melhor, nao_inseridas)
+
+
+def posicionar_puzzle(palavras, tamanho, usar_diagonais=False, usar_contrarias=True, semente=None):
+    """Cria o gerador e coloca as palavras; devolve (gerador, palavras não inseridas)
+    
+    Com tamanho TAMANHO_AUTOMATICO, usa a menor grade em que todas cabem.
+    """
+    if tamanho == TAMANHO_AUTOMATICO:
+        return buscar_tamanho_minimo(palavras, usar_diagonais, usar_contrarias, semente)
+    gerador = GeradorCacaPalavras(semente=semente)
+    gerador.criar_grade_vazia(tamanho)
+    return gerador, gerador.inserir_palavras(palavras, usar_diagonais, usar_contrarias)
+
+
+def _cores_gabarito_pdf():
+    """Cores dos destaques do gabarito no PDF"""
+    from reportlab.lib import colors
+    return [
+        colors.red, colors.blue, colors.green, colors.orange,
+        colors.purple, colors.brown, colors.pink, colors.cyan,
+        colors.magenta, colors.yellow, colors.lightblue, colors.lightgreen
+    ]
+
+
+def _desenhar_caderno_pdf(c, puzzles, primeiro_numero, paginas_puzzles, gabaritos_por_pagina):
+    """Desenha no canvas as páginas de puzzles e/ou os gabaritos de uma sequência de puzzles
+    
+    A grade de cada puzzle vira um form XObject; quando as páginas do puzzle
+    e do gabarito estão no mesmo documento, o gabarito reusa o mesmo form,
+    reduzido. Só um puzzle por vez fica na memória.
+    """
+    from reportlab.lib.pagesizes import A4
+    largura, altura = A4
+    margem = 40
+    cores = _cores_gabarito_pdf()
+    quantidade = len(puzzles)
+    
+    def definir_grade(gerador, numero):
+        _, tamanho_celula, inicio_x, inicio_y = gerador._layout_pdf(largura, altura)
+        if tamanho_celula < TAMANHO_MINIMO_CELULA_PDF:
+            raise ValueError(f"O puzzle {numero} ({gerador.tamanho}x{gerador.tamanho}) não cabe em "
+                             "uma página do caderno; use gerar_pdf para grades grandes")
+        c.beginForm(f"grade{numero}")
+        gerador._desenhar_grade_pdf(c, 0, gerador.tamanho, 0, gerador.tamanho, inicio_x, inicio_y, tamanho_celula)
+        c.endForm()
+    
+    if paginas_puzzles:
+        for k in range(quantidade):
+            gerador, numero = puzzles[k], primeiro_numero + k
+            definir_grade(gerador, numero)
+            restantes = gerador._desenhar_pagina_caca_pdf(c, f"grade{numero}", f"CAÇA-PALAVRAS {numero}",
+                                                          gerador.palavras_originais, largura, altura)
+            c.showPage()
+            if restantes:
+                gerador._desenhar_lista_palavras_pdf(c, largura, altura, 50, restantes)
+    
+    if not gabaritos_por_pagina:
+        return
+    
+    # Apêndice: os gabaritos reduzidos, em uma grade de colunas x linhas por página
+    colunas = max(1, round(gabaritos_por_pagina ** 0.5))
+    linhas = -(-gabaritos_por_pagina // colunas)
+    largura_vaga = (largura - 2 * margem) / colunas
+    altura_vaga = (altura - 2 * margem - 30) / linhas
+    for inicio in range(0, quantidade, gabaritos_por_pagina):
+        c.setFont("Helvetica-Bold", 20)
+        c.drawCentredString(largura / 2, altura - margem, "GABARITOS")
+        for vaga in range(min(gabaritos_por_pagina, quantidade - inicio)):
+            gerador, numero = puzzles[inicio + vaga], primeiro_numero + inicio + vaga
+            if not paginas_puzzles:
+                definir_grade(gerador, numero)
+            linha, coluna = divmod(vaga, colunas)
+            x_vaga = margem + coluna * largura_vaga
+            y_vaga = altura - margem - 30 - (linha + 1) * altura_vaga
+            
+            c.setFont("Helvetica-Bold", 11)
+            c.drawCentredString(x_vaga + largura_vaga / 2, y_vaga + altura_vaga - 14, f"Nº {numero}")
+            
+            # Reduz a grade (desenhada para a página inteira) até caber na vaga
+            _, tamanho_celula, inicio_x, inicio_y = gerador._layout_pdf(largura, altura)
+            lado = tamanho_celula * gerador.tamanho
+            escala = min(largura_vaga - 10, altura_vaga - 25) / lado
+            c.saveState()
+            c.translate(x_vaga + (largura_vaga - lado * escala) / 2, y_vaga + 5)
+            c.scale(escala, escala)
+            c.translate(-inicio_x, -(inicio_y - lado))
+            c.doForm(f"grade{numero}")
+            gerador._desenhar_destaques_pdf(c, cores, (0, gerador.tamanho, 0, gerador.tamanho),
+                                            inicio_x, inicio_y, tamanho_celula)
+            c.restoreState()
+        c.showPage()
+
+
+def _gerar_parte_caderno(caminho, origem, inicio, fim, paginas_puzzles, gabaritos_por_pagina):
+    """Gera uma parte do caderno em um arquivo (roda no pool de processos)
+    
+    origem é o caminho de uma ColecaoPuzzles ou a lista dos puzzles serializados.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(caminho, pagesize=A4)
+    if isinstance(origem, str):
+        with ColecaoPuzzles(origem) as colecao:
+            puzzles = _FatiaPuzzles(colecao, inicio, fim)
+            _desenhar_caderno_pdf(c, puzzles, inicio + 1, paginas_puzzles, gabaritos_por_pagina)
+    else:
+        puzzles = _FatiaPuzzles([GeradorCacaPalavras.desserializar(dados) for dados in origem], 0, len(origem))
+        _desenhar_caderno_pdf(c, puzzles, inicio + 1, paginas_puzzles, gabaritos_por_pagina)
+    c.save()
+    return caminho
+
+
+class _FatiaPuzzles:
+    """Trecho [inicio, fim) de uma sequência de puzzles, sem copiar a sequência"""
+    
+    def __init__(self, puzzles, inicio, fim):
+        self.puzzles, self.inicio, self.fim = puzzles, inicio, fim
+    
+    def __len__(self):
+        return self.fim - self.inicio
+    
+    def __getitem__(self, indice):
+        return self.puzzles[self.inicio + indice]
+
+
+def gerar_caderno_pdf(nome_arquivo, puzzles, gabaritos_por_pagina=GABARITOS_POR_PAGINA,
+                      puzzles_por_parte=None, processos=None):
+    """Gera um caderno em PDF: uma página por puzzle e, no fim, o apêndice de gabaritos
+    
+    puzzles é uma sequência de geradores já preenchidos (uma lista ou uma
+    ColecaoPuzzles, que é lida aos poucos). Com puzzles_por_parte, o caderno
+    é dividido em partes geradas em paralelo e unidas com pypdf; sem pypdf
+    instalado, tudo é gerado em um único documento.
+    """
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+    except ImportError:
+        raise ImportError("Biblioteca 'reportlab' não encontrada! Use: pip install reportlab")
+    gabaritos_por_pagina = max(1, int(gabaritos_por_pagina))
+    quantidade = len(puzzles)
+    
+    if not puzzles_por_parte or puzzles_por_parte >= quantidade or not PYPDF_DISPONIVEL:
+        c = canvas.Canvas(nome_arquivo, pagesize=A4)
+        _desenhar_caderno_pdf(c, puzzles, 1, True, gabaritos_por_pagina)
+        c.save()
+        return True
+    
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from pypdf import PdfWriter
+    
+    # As partes do apêndice começam em um múltiplo de gabaritos_por_pagina
+    puzzles_por_parte = -(-puzzles_por_parte // gabaritos_por_pagina) * gabaritos_por_pagina
+    faixas = [(inicio, min(inicio + puzzles_por_parte, quantidade))
+              for inicio in range(0, quantidade, puzzles_por_parte)]
+    pasta = tempfile.mkdtemp(prefix="caderno_")
+    try:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = []
+            for tipo, (paginas_puzzles, gabaritos) in enumerate(((True, 0), (False, gabaritos_por_pagina))):
+                for inicio, fim in faixas:
+                    if isinstance(puzzles, ColecaoPuzzles):
+                        origem = puzzles.caminho
+                    else:
+                        origem = [puzzles[k].serializar() for k in range(inicio, fim)]
+                    caminho = os.path.join(pasta, f"parte_{tipo}_{inicio:09d}.pdf")
+                    futuros.append(executor.submit(_gerar_parte_caderno, caminho, origem, inicio, fim,
+                                                   paginas_puzzles, gabaritos))
+            partes = [futuro.result() for futuro in futuros]
+        
+        escritor = PdfWriter()
+        for parte in partes:
+            escritor.append(parte)
+        escritor.write(nome_arquivo)
+        escritor.close()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return True
+
+
+class CacheSaidas:
+    """Cache em disco dos arquivos gerados, com descarte LRU pelo tamanho total
+    
+    A chave é o hash de tudo que define o arquivo (palavras, tamanho, direções,
+    semente, formato e opções de renderização). Só puzzles com semente são
+    guardados: sem ela cada pedido sorteia um puzzle novo.
+    """
+    
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_MAXIMO_CACHE_SAIDAS):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self._trava = threading.Lock()
+        self.acertos = self.falhas = self.descartes = 0
+        
+        # Entradas já gravadas, da usada há mais tempo para a mais recente
+        os.makedirs(diretorio, exist_ok=True)
+        existentes = []
+        for nome in os.listdir(diretorio):
+            if nome.endswith('.saida'):
+                info = os.stat(os.path.join(diretorio, nome))
+                existentes.append((info.st_mtime, nome[:-len('.saida')], info.st_size))
+        self._entradas = collections.OrderedDict((chave, tamanho) for _, chave, tamanho in sorted(existentes))
+        self._tamanho_total = sum(self._entradas.values())
+    
+    @staticmethod
+    def chave(palavras, tamanho, usar_diagonais, usar_contrarias, semente, formato, **opcoes):
+        """Hash que identifica os arquivos de um pedido"""
+        import hashlib
+        import json
+        # Os acentos continuam na chave porque aparecem na lista de palavras
+        palavras = [p.strip() for p in palavras if p.strip()]
+        descricao = json.dumps([VERSAO_CACHE_SAIDAS, palavras, tamanho, bool(usar_diagonais),
+                                bool(usar_contrarias), semente, formato, sorted(opcoes.items())],
+                               ensure_ascii=False)
+        return hashlib.sha256(descricao.encode('utf-8')).hexdigest()
+    
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + '.saida')
+    
+    def obter(self, chave):
+        """Devolve os arquivos guardados [(sufixo, bytes)] ou None"""
+        with self._trava:
+            if chave not in self._entradas:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+        try:
+            with open(self._caminho(chave), 'rb') as arquivo:
+                dados = arquivo.read()
+            os.utime(self._caminho(chave))
+        except OSError:
+            # Apagado por fora do cache: conta como falha
+            with self._trava:
+                self._tamanho_total -= self._entradas.pop(chave, 0)
+                self.acertos -= 1
+                self.falhas += 1
+            return None
+        
+        arquivos = []
+        (quantidade,) = struct.unpack_from('<H', dados)
+        deslocamento = 2
+        for _ in range(quantidade):
+            tamanho_sufixo, tamanho_conteudo = struct.unpack_from('<HQ', dados, deslocamento)
+            deslocamento += struct.calcsize('<HQ')
+            sufixo = dados[deslocamento:deslocamento + tamanho_sufixo].decode('utf-8')
+            deslocamento += tamanho_sufixo
+            arquivos.append((sufixo, dados[deslocamento:deslocamento + tamanho_conteudo]))
+            deslocamento += tamanho_conteudo
+        return arquivos
+    
+    def guardar(self, chave, arquivos):
+        """Grava os arquivos de um pedido e descarta os mais antigos se passar do limite"""
+        partes = [struct.pack('<H', len(arquivos))]
+        for sufixo, conteudo in arquivos:
+            sufixo = sufixo.encode('utf-8')
+            partes += [struct.pack('<HQ', len(sufixo), len(conteudo)), sufixo, conteudo]
+        dados = b''.join(partes)
+        if len(dados) > self.tamanho_maximo:
+            return
+        
+        # Grava em um arquivo temporário e renomeia: leitores nunca veem metade do arquivo
+        temporario = f"{self._caminho(chave)}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, self._caminho(chave))
+        
+        with self._trava:
+            self._tamanho_total += len(dados) - self._entradas.pop(chave, 0)
+            self._entradas[chave] = len(dados)
+            while self._tamanho_total > self.tamanho_maximo:
+                antiga, tamanho = self._entradas.popitem(last=False)
+                self._tamanho_total -= tamanho
+                self.descartes += 1
+                try:
+                    os.remove(self._caminho(antiga))
+                except OSError:
+                    pass
+    
+    def gerar(self, palavras, tamanho, usar_diagonais=False, usar_contrarias=True, semente=None,
+              formato='.pdf', incluir_gabarito=True, bloqueadas=PALAVRAS_BLOQUEADAS, **opcoes_imagem):
+        """Devolve os arquivos do puzzle [(sufixo, bytes)], gerando só se não estiverem no cache
+        
+        opcoes_imagem (modo, dpi, qualidade, progressivo) valem para JPEG e PNG.
+        """
+        chave = None
+        if semente is not None:
+            chave = self.chave(palavras, tamanho, usar_diagonais, usar_contrarias, semente, formato,
+                               incluir_gabarito=incluir_gabarito, bloqueadas=list(bloqueadas), **opcoes_imagem)
+            arquivos = self.obter(chave)
+            if arquivos is not None:
+                return arquivos
+        
+        gerador, _ = posicionar_puzzle(palavras, tamanho, usar_diagonais, usar_contrarias, semente)
+        gerador.preencher_espacos_vazios(bloqueadas)
+        if formato == FORMATO_TODOS:
+            arquivos = gerador.renderizar_todos_em_memoria(usar_processos=False)
+        else:
+            arquivos = gerador.renderizar_em_memoria(formato, incluir_gabarito=incluir_gabarito, **opcoes_imagem)
+        
+        if chave is not None:
+            self.guardar(chave, arquivos)
+        return arquivos
+    
+    def estatisticas(self):
+        """Acertos, falhas, taxa de acerto e ocupação do cache"""
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acertos': self.acertos / consultas if consultas else 0.0,
+                'descartes': self.descartes,
+                'entradas': len(self._entradas),
+                'bytes': self._tamanho_total,
+                'tamanho_maximo': self.tamanho_maximo,
+            }
+
+
+def _diferenca_palavras(anteriores, atuais):
+    """Devolve (removidas, adicionadas) entre duas listas de palavras, contando repetições
+    
+    As adicionadas seguem a ordem em que aparecem na lista atual.
+    """
+    antes = collections.Counter(anteriores)
+    sobrando = collections.Counter(atuais) - antes
+    adicionadas = []
+    for palavra in atuais:
+        if sobrando[palavra]:
+            sobrando[palavra] -= 1
+            adicionadas.append(palavra)
+    removidas = list((antes - collections.Counter(atuais)).elements())
+    return removidas, adicionadas
 
 
 class InterfaceApp:
     def __init__(self, root):
+        _importar_tkinter()
         self.root = root
         self.root.title("Gerador de Caça-Palavras")
-        self.root.geometry("600x750")
+        self.root.geometry("1040x800")
         self.root.resizable(False, False)
         
         # Variável para armazenar o diretório selecionado
@@ -651,6 +2941,17 @@ class InterfaceApp:
             'border': '#3c3c3c'
         }
         
+        # Prévia da grade à direita, desenhada direto no canvas (sem gerar arquivo)
+        self.frame_previa = tk.Frame(root)
+        self.frame_previa.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 20), pady=20)
+        
+        self.label_previa = tk.Label(self.frame_previa, text="Prévia", font=("Arial", 10), anchor=tk.W)
+        self.label_previa.pack(fill=tk.X)
+        
+        self.canvas_previa = tk.Canvas(self.frame_previa, width=TAMANHO_PREVIA_PX, height=TAMANHO_PREVIA_PX,
+                                       highlightthickness=0)
+        self.canvas_previa.pack(pady=5)
+        
         # Frame superior com título e tema
         frame_topo = tk.Frame(root)
         frame_topo.pack(fill=tk.X, padx=20, pady=5)
@@ -667,15 +2968,15 @@ class InterfaceApp:
                          font=("Arial", 10), pady=5)
         self.subtitulo.pack()
         
-        # Botão de tema no canto superior direito
-        self.btn_tema = tk.Checkbutton(root, text="🌙 Tema Escuro", 
+        # Botão de tema no canto superior direito, acima da prévia
+        self.btn_tema = tk.Checkbutton(self.frame_previa, text="🌙 Tema Escuro", 
                                        variable=self.tema_escuro,
                                        command=self.alternar_tema,
                                        font=("Arial", 9),
                                        relief=tk.FLAT,
                                        highlightthickness=0,
                                        bd=0)
-        self.btn_tema.place(x=470, y=10)
+        self.btn_tema.pack(anchor=tk.E, before=self.label_previa)
         
         # Armazenar referência ao frame_topo para aplicar tema
         self.frame_topo = frame_topo
@@ -693,7 +2994,7 @@ class InterfaceApp:
         self.entry_tamanho.pack(side=tk.LEFT, padx=10)
         self.entry_tamanho.insert(0, "18x18")
         
-        self.label_exemplo_tamanho = tk.Label(self.frame_tamanho, text="(ex: 18x18, 15x15)", 
+        self.label_exemplo_tamanho = tk.Label(self.frame_tamanho, text="(ex: 18x18, 15x15 ou auto)", 
                 font=("Arial", 9))
         self.label_exemplo_tamanho.pack(side=tk.LEFT)
         
@@ -762,6 +3063,8 @@ class InterfaceApp:
             formatos_disponiveis.append(".jpeg")
         if DOCX_DISPONIVEL:
             formatos_disponiveis.append(".docx")
+        if len(formatos_disponiveis) > 1:
+            formatos_disponiveis.append(FORMATO_TODOS)
         
         self.formato_var = tk.StringVar(value=".pdf")
         self.combo_formato = ttk.Combobox(self.frame_arquivo, textvariable=self.formato_var,
@@ -806,10 +3109,46 @@ class InterfaceApp:
                                    bg="#4CAF50", fg="white",
                                    pady=10, cursor="hand2",
                                    command=self.gerar_caca_palavras)
-        self.btn_gerar.pack(pady=15, padx=20, fill=tk.X)
+        self.btn_gerar.pack(pady=(15, 5), padx=20, fill=tk.X)
+        
+        # Progresso da geração (executada em segundo plano)
+        self.frame_progresso = tk.Frame(root)
+        self.frame_progresso.pack(fill=tk.X, padx=20)
+        
+        self.label_progresso = tk.Label(self.frame_progresso, text="", font=("Arial", 9),
+                                        anchor=tk.W, width=40)
+        self.label_progresso.pack(side=tk.LEFT)
+        
+        self.btn_cancelar = tk.Button(self.frame_progresso, text="Cancelar", font=("Arial", 9),
+                                      state=tk.DISABLED, command=self.cancelar_geracao)
+        self.btn_cancelar.pack(side=tk.RIGHT)
+        
+        self.barra_progresso = ttk.Progressbar(self.frame_progresso, mode='determinate', maximum=1.0)
+        self.barra_progresso.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
+        
+        # Mensagens da thread de geração, lidas periodicamente pela interface
+        self.fila_geracao = queue.Queue()
+        self.cancelamento = threading.Event()
+        
+        # Prévia: uma thread por vez, com fila própria; o estado guarda o gerador
+        # da última prévia para só inserir as palavras novas
+        self.fila_previa = queue.Queue()
+        self._previa_agendada = None
+        self._previa_rodando = False
+        self._previa_pendente = False
+        self._estado_previa = None
+        # Ids dos textos das células no canvas e as letras que eles mostram
+        self._itens_previa = []
+        self._letras_previa = []
+        
+        self.text_palavras.bind('<<Modified>>', self._ao_modificar_palavras)
+        self.entry_tamanho.bind('<KeyRelease>', self._agendar_previa)
+        self.var_diagonais.trace_add('write', self._agendar_previa)
+        self.var_contrarias.trace_add('write', self._agendar_previa)
         
         # Aplicar tema inicial
         self.aplicar_tema()
+        self._agendar_previa()
     
     def aplicar_tema(self):
         """Aplica o tema (claro ou escuro) em todos os widgets"""
@@ -846,6 +3185,14 @@ class InterfaceApp:
         self.frame_palavras.config(bg=cores['bg'])
         self.frame_arquivo.config(bg=cores['bg'])
         self.frame_destino.config(bg=cores['bg'])
+        self.frame_progresso.config(bg=cores['bg'])
+        self.frame_previa.config(bg=cores['bg'])
+        
+        # Prévia
+        self.canvas_previa.config(bg=cores['entry_bg'])
+        self.canvas_previa.itemconfigure('celula', outline=cores['border'])
+        self.canvas_previa.itemconfigure('letra', fill=cores['entry_fg'])
+        self.canvas_previa.itemconfigure('aviso', fill=cores['label_info'])
         
         # Labels
         self.label_tamanho.config(bg=cores['bg'], fg=cores['fg'])
@@ -856,6 +3203,8 @@ class InterfaceApp:
         self.label_formato.config(bg=cores['bg'], fg=cores['fg'])
         self.label_salvar.config(bg=cores['bg'], fg=cores['fg'])
         self.label_destino.config(bg=cores['bg'], fg=cores['label_link'])
+        self.label_progresso.config(bg=cores['bg'], fg=cores['label_info'])
+        self.label_previa.config(bg=cores['bg'], fg=cores['fg'])
         
         # Checkbuttons - configuração especial para não mostrar caixa branca
         self.check_diagonais.config(
@@ -903,6 +3252,10 @@ class InterfaceApp:
                              activebackground=cores['button_bg'],
                              relief=tk.FLAT, bd=0,
                              highlightthickness=0)
+        self.btn_cancelar.config(bg=cores['button_bg'], fg=cores['button_fg'],
+                                 activebackground=cores['button_bg'],
+                                 relief=tk.FLAT, bd=0,
+                                 highlightthickness=0)
     
     def alternar_tema(self):
         """Alterna entre tema claro e escuro"""
@@ -924,20 +3277,14 @@ class InterfaceApp:
         """Função chamada ao clicar no botão gerar"""
         try:
             # Validar tamanho da grade
-            tamanho_texto = self.entry_tamanho.get().strip()
-            if 'x' in tamanho_texto.lower():
-                partes = tamanho_texto.lower().split('x')
-                tamanho = int(partes[0].strip())
-            else:
-                tamanho = int(tamanho_texto)
+            tamanho = self._ler_tamanho()
             
-            if tamanho < 5 or tamanho > 30:
-                messagebox.showerror("Erro", "O tamanho da grade deve estar entre 5 e 30")
+            if tamanho != TAMANHO_AUTOMATICO and (tamanho < TAMANHO_MINIMO or tamanho > TAMANHO_MAXIMO):
+                messagebox.showerror("Erro", f"O tamanho da grade deve estar entre {TAMANHO_MINIMO} e {TAMANHO_MAXIMO}")
                 return
             
             # Obter palavras
-            texto_palavras = self.text_palavras.get("1.0", tk.END)
-            palavras = [p.strip() for p in texto_palavras.split('\n') if p.strip()]
+            palavras = self._ler_palavras()
             
             if len(palavras) == 0:
                 messagebox.showerror("Erro", "Por favor, insira pelo menos uma palavra")
@@ -947,78 +3294,360 @@ class InterfaceApp:
             nome_arquivo = self.entry_arquivo.get().strip()
             formato = self.formato_var.get()
             
-            # Adicionar extensão se não tiver
-            if not nome_arquivo.endswith(formato):
-                if '.' in nome_arquivo:
-                    nome_arquivo = nome_arquivo.rsplit('.', 1)[0]
-                nome_arquivo += formato
+            # Separar o nome da extensão (cada formato acrescenta a sua ao salvar)
+            if '.' in nome_arquivo:
+                nome_arquivo = nome_arquivo.rsplit('.', 1)[0]
+            
+            if tamanho != TAMANHO_AUTOMATICO and tamanho > TAMANHO_MAXIMO_JPEG_DOCX and formato != '.pdf':
+                messagebox.showerror("Erro", f"Grades maiores que {TAMANHO_MAXIMO_JPEG_DOCX}x{TAMANHO_MAXIMO_JPEG_DOCX} "
+                                             "só podem ser salvas em PDF")
+                return
             
-            # Criar o caminho completo
-            caminho_completo = os.path.join(self.diretorio_destino, nome_arquivo)
+            # Criar o caminho completo (sem extensão)
+            base_nome = os.path.join(self.diretorio_destino, nome_arquivo)
             
             # Obter opções
             usar_diagonais = self.var_diagonais.get()
             usar_contrarias = self.var_contrarias.get()
             
-            # Gerar caça-palavras
+            # Gerar caça-palavras em segundo plano
             self.btn_gerar.config(state=tk.DISABLED, text="GERANDO...")
-            self.root.update()
-            
-            gerador = GeradorCacaPalavras()
-            gerador.criar_grade_vazia(tamanho)
-            
-            palavras_nao_inseridas = gerador.inserir_palavras(palavras, usar_diagonais, usar_contrarias)
-            
-            if palavras_nao_inseridas:
-                resposta = messagebox.askyesno(
-                    "Aviso",
-                    f"As seguintes palavras não puderam ser inseridas:\n\n" +
-                    "\n".join(palavras_nao_inseridas) +
-                    "\n\nDeseja continuar mesmo assim?"
-                )
-                if not resposta:
-                    self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
-                    return
-            
-            gerador.preencher_espacos_vazios()
-            
-            # Gerar arquivo no formato escolhido
-            if formato == '.pdf':
-                gerador.gerar_pdf(caminho_completo, palavras)
-            elif formato == '.jpeg':
-                if not PILLOW_DISPONIVEL:
-                    raise ImportError("Biblioteca Pillow não instalada. Use: pip install Pillow")
-                gerador.gerar_jpeg(caminho_completo, palavras, incluir_gabarito=True)
-                # Atualizar mensagem para JPEG (gera 2 arquivos)
-                base_nome = caminho_completo.rsplit('.', 1)[0]
-                caminho_completo = f"{base_nome}_caca.jpeg e {base_nome}_gabarito.jpeg"
-            elif formato == '.docx':
-                if not DOCX_DISPONIVEL:
-                    raise ImportError("Biblioteca python-docx não instalada. Use: pip install python-docx")
-                gerador.gerar_docx(caminho_completo, palavras)
-            
-            self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
-            
-            messagebox.showinfo("Sucesso", 
-                              f"Caça-palavras gerado com sucesso!\n\n" +
-                              f"Arquivo: {caminho_completo}\n" +
-                              f"Palavras inseridas: {len(palavras) - len(palavras_nao_inseridas)}/{len(palavras)}")
+            self.btn_cancelar.config(state=tk.NORMAL)
+            self.cancelamento = threading.Event()
+            self.trabalho = {'base_nome': base_nome, 'formato': formato, 'palavras': palavras}
+            self._iniciar_etapa(self._posicionar_palavras, tamanho, palavras, usar_diagonais, usar_contrarias)
             
         except ValueError as e:
             messagebox.showerror("Erro", "Por favor, insira um tamanho válido (ex: 18x18)")
-            self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
-        except ImportError as e:
+    
+    def _ler_tamanho(self):
+        """Lê o tamanho digitado (ex: 18x18, 18 ou auto); lança ValueError se inválido"""
+        tamanho_texto = self.entry_tamanho.get().strip()
+        if tamanho_texto.lower() == TAMANHO_AUTOMATICO:
+            return TAMANHO_AUTOMATICO
+        if 'x' in tamanho_texto.lower():
+            partes = tamanho_texto.lower().split('x')
+            return int(partes[0].strip())
+        return int(tamanho_texto)
+    
+    def _ler_palavras(self):
+        """Palavras digitadas, uma por linha, sem linhas vazias"""
+        texto_palavras = self.text_palavras.get("1.0", tk.END)
+        return [p.strip() for p in texto_palavras.split('\n') if p.strip()]
+    
+    def cancelar_geracao(self):
+        """Pede para a thread de geração parar na próxima etapa"""
+        self.cancelamento.set()
+        self.btn_cancelar.config(state=tk.DISABLED)
+        self.label_progresso.config(text="Cancelando...")
+    
+    def _iniciar_etapa(self, etapa, *args):
+        """Executa uma etapa da geração em uma thread e acompanha o progresso"""
+        threading.Thread(target=self._executar_etapa, args=(etapa,) + args, daemon=True).start()
+        self.root.after(INTERVALO_PROGRESSO_MS, self._verificar_fila)
+    
+    def _executar_etapa(self, etapa, *args):
+        """Roda na thread de geração; erros e cancelamentos voltam pela fila"""
+        try:
+            etapa(*args)
+        except GeracaoCancelada:
+            self.fila_geracao.put(('cancelado',))
+        except Exception as e:
+            self.fila_geracao.put(('erro', e))
+    
+    def _informar(self, texto, fracao):
+        """Envia o progresso para a interface (chamado na thread de geração)"""
+        if self.cancelamento.is_set():
+            raise GeracaoCancelada()
+        self.fila_geracao.put(('progresso', texto, fracao))
+    
+    def _posicionar_palavras(self, tamanho, palavras, usar_diagonais, usar_contrarias):
+        """Primeira etapa: cria a grade e insere as palavras"""
+        if tamanho == TAMANHO_AUTOMATICO:
+            self._informar("Procurando o menor tamanho de grade...", 0.0)
+            gerador, palavras_nao_inseridas = buscar_tamanho_minimo(palavras, usar_diagonais, usar_contrarias)
+            self.fila_geracao.put(('posicionado', gerador, palavras_nao_inseridas))
+            return
+        
+        self._informar("Posicionando palavras...", 0.0)
+        gerador = GeradorCacaPalavras()
+        gerador.criar_grade_vazia(tamanho)
+        
+        def ao_progredir(feitas, total):
+            self._informar(f"Posicionando palavras ({feitas}/{total})...", 0.4 * feitas / total)
+        
+        palavras_nao_inseridas = gerador.inserir_palavras(palavras, usar_diagonais, usar_contrarias,
+                                                          ao_progredir=ao_progredir)
+        self.fila_geracao.put(('posicionado', gerador, palavras_nao_inseridas))
+    
+    def _gerar_arquivo(self, gerador, formato, base_nome, palavras):
+        """Segunda etapa: preenche a grade, renderiza em memória e salva"""
+        self._informar("Preenchendo espaços vazios...", 0.4)
+        gerador.preencher_espacos_vazios()
+        
+        if formato == FORMATO_TODOS:
+            self._informar("Gerando PDF, JPEG e DOCX...", 0.5)
+            arquivos = gerador.renderizar_todos_em_memoria(palavras)
+        else:
+            self._informar("Gerando o arquivo...", 0.5)
+            arquivos = gerador.renderizar_em_memoria(formato, palavras, incluir_gabarito=True)
+        
+        # Último ponto de cancelamento: nada é gravado pela metade
+        self._informar("Salvando...", 0.9)
+        caminhos = []
+        for sufixo, conteudo in arquivos:
+            with open(base_nome + sufixo, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            caminhos.append(base_nome + sufixo)
+        self.fila_geracao.put(('concluido', caminhos))
+    
+    def _verificar_fila(self):
+        """Trata as mensagens da thread de geração (roda na thread da interface)"""
+        try:
+            while True:
+                mensagem = self.fila_geracao.get_nowait()
+                tipo = mensagem[0]
+                if tipo == 'progresso':
+                    self.label_progresso.config(text=mensagem[1])
+                    self.barra_progresso['value'] = mensagem[2]
+                elif tipo == 'posicionado':
+                    self._confirmar_palavras_nao_inseridas(*mensagem[1:])
+                    return
+                elif tipo == 'concluido':
+                    self._concluir_geracao(mensagem[1])
+                    return
+                elif tipo == 'cancelado':
+                    self._finalizar_geracao("Geração cancelada")
+                    return
+                elif tipo == 'erro':
+                    self._mostrar_erro_geracao(mensagem[1])
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(INTERVALO_PROGRESSO_MS, self._verificar_fila)
+    
+    def _confirmar_palavras_nao_inseridas(self, gerador, palavras_nao_inseridas):
+        """Entre o posicionamento e a renderização, confirma se deve continuar"""
+        self.trabalho['palavras_nao_inseridas'] = palavras_nao_inseridas
+        self.trabalho['tamanho'] = gerador.tamanho
+        if gerador.tamanho > TAMANHO_MAXIMO_JPEG_DOCX and self.trabalho['formato'] != '.pdf':
+            self._finalizar_geracao("")
+            messagebox.showerror("Erro", f"As palavras precisam de uma grade {gerador.tamanho}x{gerador.tamanho}; "
+                                         f"grades maiores que {TAMANHO_MAXIMO_JPEG_DOCX}x{TAMANHO_MAXIMO_JPEG_DOCX} "
+                                         "só podem ser salvas em PDF")
+            return
+        if palavras_nao_inseridas:
+            resposta = messagebox.askyesno(
+                "Aviso",
+                f"As seguintes palavras não puderam ser inseridas:\n\n" +
+                "\n".join(palavras_nao_inseridas) +
+                "\n\nDeseja continuar mesmo assim?"
+            )
+            if not resposta:
+                self._finalizar_geracao("Geração cancelada")
+                return
+        if self.cancelamento.is_set():
+            self._finalizar_geracao("Geração cancelada")
+            return
+        
+        self._iniciar_etapa(self._gerar_arquivo, gerador, self.trabalho['formato'],
+                            self.trabalho['base_nome'], self.trabalho['palavras'])
+    
+    def _concluir_geracao(self, caminhos):
+        """Mostra o resultado da geração"""
+        self._finalizar_geracao("Concluído", 1.0)
+        palavras = self.trabalho['palavras']
+        palavras_nao_inseridas = self.trabalho['palavras_nao_inseridas']
+        messagebox.showinfo("Sucesso", 
+                          f"Caça-palavras gerado com sucesso!\n\n" +
+                          f"Arquivo: {' e '.join(caminhos)}\n" +
+                          f"Tamanho da grade: {self.trabalho['tamanho']}x{self.trabalho['tamanho']}\n" +
+                          f"Palavras inseridas: {len(palavras) - len(palavras_nao_inseridas)}/{len(palavras)}")
+    
+    def _mostrar_erro_geracao(self, erro):
+        """Mostra um erro ocorrido na thread de geração"""
+        self._finalizar_geracao("")
+        if isinstance(erro, ImportError):
             messagebox.showerror("Biblioteca Faltando", 
-                               f"Erro: {str(e)}\n\n"
+                               f"Erro: {str(erro)}\n\n"
                                "Por favor, instale as bibliotecas necessárias usando:\n"
                                "pip install reportlab Pillow python-docx")
-            self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
+        else:
+            messagebox.showerror("Erro", f"Ocorreu um erro ao gerar o arquivo:\n\n{str(erro)}")
+    
+    def _finalizar_geracao(self, texto, fracao=0.0):
+        """Libera os botões ao fim da geração"""
+        self.label_progresso.config(text=texto)
+        self.barra_progresso['value'] = fracao
+        self.btn_cancelar.config(state=tk.DISABLED)
+        self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
+    
+    def _ao_modificar_palavras(self, event=None):
+        """Chamado a cada edição da lista de palavras (inclusive colar e apagar)"""
+        if not self.text_palavras.edit_modified():
+            return
+        self.text_palavras.edit_modified(False)
+        self._agendar_previa()
+    
+    def _agendar_previa(self, *args):
+        """Adia o recálculo da prévia até o usuário parar de digitar"""
+        if self._previa_agendada is not None:
+            self.root.after_cancel(self._previa_agendada)
+        self._previa_agendada = self.root.after(ATRASO_PREVIA_MS, self._iniciar_previa)
+    
+    def _pedido_previa(self):
+        """Lê (tamanho, palavras, opções) da janela; None se não há o que desenhar"""
+        try:
+            tamanho = self._ler_tamanho()
+        except ValueError:
+            tamanho = None
+        if tamanho != TAMANHO_AUTOMATICO and (tamanho is None or not TAMANHO_MINIMO <= tamanho <= TAMANHO_MAXIMO):
+            self._mostrar_aviso_previa("Prévia: tamanho inválido")
+            return None
+        if tamanho != TAMANHO_AUTOMATICO and tamanho > TAMANHO_MAXIMO_PREVIA:
+            self._mostrar_aviso_previa(f"Prévia: grades maiores que {TAMANHO_MAXIMO_PREVIA}x{TAMANHO_MAXIMO_PREVIA} "
+                                       "não são desenhadas")
+            return None
+        return tamanho, self._ler_palavras(), (self.var_diagonais.get(), self.var_contrarias.get())
+    
+    def _iniciar_previa(self):
+        """Dispara o recálculo da prévia em segundo plano (ou o deixa pendente)"""
+        self._previa_agendada = None
+        if self._previa_rodando:
+            self._previa_pendente = True
+            return
+        pedido = self._pedido_previa()
+        if pedido is None:
+            return
+        estado = self._estado_previa
+        # Nada mudou desde a última prévia desenhada e não há palavras para tentar de novo
+        if (self._itens_previa and estado is not None and not estado['nao_inseridas']
+                and pedido == (estado['tamanho'], estado['palavras'], estado['opcoes'])):
+            return
+        self._previa_rodando = True
+        threading.Thread(target=self._executar_previa, args=(estado, pedido), daemon=True).start()
+        self.root.after(INTERVALO_PROGRESSO_MS, self._verificar_previa)
+    
+    def _executar_previa(self, anterior, pedido):
+        """Roda na thread da prévia; o resultado volta pela fila da prévia"""
+        try:
+            self.fila_previa.put(('previa',) + self._calcular_previa(anterior, *pedido))
         except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao gerar o arquivo:\n\n{str(e)}")
-            self.btn_gerar.config(state=tk.NORMAL, text="GERAR CAÇA-PALAVRAS")
-
+            self.fila_previa.put(('erro', e))
+    
+    def _calcular_previa(self, anterior, tamanho, palavras, opcoes):
+        """Atualiza a grade da prévia anterior quando possível; senão posiciona tudo de novo
+        
+        Devolve (novo estado, cópia das letras da grade).
+        """
+        estado = None
+        if anterior is not None and anterior['tamanho'] == tamanho and anterior['opcoes'] == opcoes:
+            estado = self._atualizar_previa(anterior, palavras)
+        if estado is None:
+            gerador, nao_inseridas = posicionar_puzzle(palavras, tamanho, *opcoes)
+            estado = {'gerador': gerador, 'nao_inseridas': nao_inseridas}
+        estado.update(tamanho=tamanho, palavras=palavras, opcoes=opcoes)
+        return estado, [linha[:] for linha in estado['gerador'].grade]
+    
+    def _atualizar_previa(self, anterior, palavras):
+        """Aplica só a diferença de palavras à grade anterior; None se for preciso recomeçar"""
+        gerador = anterior['gerador']
+        nao_inseridas = list(anterior['nao_inseridas'])
+        removidas, adicionadas = _diferenca_palavras(anterior['palavras'], palavras)
+        
+        for palavra in removidas:
+            if palavra in nao_inseridas:
+                nao_inseridas.remove(palavra)
+                gerador.palavras_originais.remove(palavra)
+            else:
+                gerador.remover_palavra(palavra)
+        
+        # As que não couberam antes voltam para a fila: uma remoção pode ter aberto espaço
+        for palavra in nao_inseridas:
+            gerador.palavras_originais.remove(palavra)
+        nao_inseridas = gerador.inserir_palavras(nao_inseridas + adicionadas, *anterior['opcoes'])
+        # No tamanho automático, uma palavra que não coube pede uma grade maior
+        if (anterior['tamanho'] == TAMANHO_AUTOMATICO
+                and any(normalizar_palavra(p).texto for p in nao_inseridas)):
+            return None
+        return {'gerador': gerador, 'nao_inseridas': nao_inseridas}
+    
+    def _verificar_previa(self):
+        """Desenha o resultado da thread da prévia (roda na thread da interface)"""
+        try:
+            mensagem = self.fila_previa.get_nowait()
+        except queue.Empty:
+            self.root.after(INTERVALO_PROGRESSO_MS, self._verificar_previa)
+            return
+        
+        if mensagem[0] == 'previa':
+            self._estado_previa, grade = mensagem[1:]
+            self._desenhar_previa(grade)
+        else:
+            # O gerador anterior pode ter ficado pela metade: a próxima prévia recomeça
+            self._estado_previa = None
+            self._mostrar_aviso_previa(f"Prévia indisponível: {mensagem[1]}")
+        
+        self._previa_rodando = False
+        if self._previa_pendente:
+            self._previa_pendente = False
+            self._iniciar_previa()
+    
+    def _desenhar_previa(self, grade):
+        """Atualiza no canvas só as células cuja letra mudou"""
+        tamanho = len(grade)
+        if tamanho > TAMANHO_MAXIMO_PREVIA:
+            self._mostrar_aviso_previa(f"Prévia: as palavras precisam de uma grade {tamanho}x{tamanho}")
+            return
+        if tamanho != len(self._itens_previa):
+            self._montar_grade_previa(tamanho)
+        
+        itemconfigure = self.canvas_previa.itemconfigure
+        for itens, desenhadas, linha in zip(self._itens_previa, self._letras_previa, grade):
+            for c, letra in enumerate(linha):
+                if letra != desenhadas[c]:
+                    itemconfigure(itens[c], text=letra or '')
+                    desenhadas[c] = letra
+        
+        estado = self._estado_previa
+        total = len(estado['gerador'].palavras_originais)
+        self.label_previa.config(text=f"Prévia {tamanho}x{tamanho}: "
+                                      f"{total - len(estado['nao_inseridas'])}/{total} palavras posicionadas")
+    
+    def _montar_grade_previa(self, tamanho):
+        """Cria as células (vazias) da prévia; só roda quando o tamanho muda"""
+        cores = self.cores_escuro if self.tema_escuro.get() else self.cores_claro
+        canvas = self.canvas_previa
+        canvas.delete('all')
+        celula = TAMANHO_PREVIA_PX // tamanho
+        inicio = (TAMANHO_PREVIA_PX - celula * tamanho) // 2
+        # Tamanho negativo: fonte em pixels, proporcional à célula
+        fonte = ("Arial", -max(6, int(celula * 0.6)), "bold")
+        self._itens_previa = []
+        for l in range(tamanho):
+            y = inicio + l * celula
+            itens = []
+            for c in range(tamanho):
+                x = inicio + c * celula
+                canvas.create_rectangle(x, y, x + celula, y + celula, outline=cores['border'], tags='celula')
+                itens.append(canvas.create_text(x + celula / 2, y + celula / 2, text='', font=fonte,
+                                                fill=cores['entry_fg'], tags='letra'))
+            self._itens_previa.append(itens)
+        self._letras_previa = [[None] * tamanho for _ in range(tamanho)]
+    
+    def _mostrar_aviso_previa(self, texto):
+        """Troca a grade da prévia por um aviso"""
+        cores = self.cores_escuro if self.tema_escuro.get() else self.cores_claro
+        self.canvas_previa.delete('all')
+        self._itens_previa = []
+        self._letras_previa = []
+        self.canvas_previa.create_text(TAMANHO_PREVIA_PX / 2, TAMANHO_PREVIA_PX / 2, text=texto,
+                                       width=TAMANHO_PREVIA_PX - 40, font=("Arial", 10),
+                                       fill=cores['label_info'], tags='aviso')
+        self.label_previa.config(text="Prévia")
 
 if __name__ == "__main__":
+    _importar_tkinter()
     root = tk.Tk()
     app = InterfaceApp(root)
     root.mainloop()
\ No newline at end of file
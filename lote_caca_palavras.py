@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Geração de Caça-Palavras em lote pela linha de comando
+
+Uso:
+python lote_caca_palavras.py manifesto.json --saida pasta [--processos N]
+python lote_caca_palavras.py puzzles.jsonl --saida pasta --checkpoint progresso.json
+
+O manifesto pode ser um JSON com uma lista de puzzles (ou um objeto com a chave
+"puzzles"), um JSONL com um puzzle por linha ou um CSV com cabeçalho (no CSV as
+palavras vão separadas por ";"). Cada puzzle aceita:
+    nome             nome do arquivo de saída (sem extensão)
+    palavras         lista de palavras
+    tamanho          tamanho da grade (padrão: 18) ou "auto" para a menor grade possível
+    usar_diagonais   incluir diagonais (padrão: false)
+    usar_contrarias  permitir palavras ao contrário (padrão: true)
+    formato          ".pdf", ".jpeg", ".png", ".docx" ou "todos" (padrão: ".pdf")
+    modo_imagem      JPEG/PNG: "RGB", "L" (cinza) ou "1" (preto e branco); padrão RGB no JPEG e L no PNG
+    dpi              JPEG/PNG: resolução da página (padrão: 300)
+    qualidade        JPEG: qualidade de 1 a 95 (padrão: 95)
+    progressivo      JPEG: grava otimizado e progressivo (padrão: false)
+    incluir_gabarito JPEG/PNG: grava também a imagem do gabarito (padrão: true)
+    semente          semente aleatória para reproduzir o puzzle (opcional)
+    bloqueadas       palavras que não podem aparecer nas letras de preenchimento
+    banco            arquivo com uma palavra por linha para completar a grade (opcional)
+    densidade        fração da grade a cobrir com palavras do banco (padrão: 0.6)
+
+Os puzzles são distribuídos entre processos (por padrão, um por núcleo).
+JSONL e CSV são lidos aos poucos e só uma janela limitada de puzzles fica em
+andamento, então o uso de memória não cresce com o tamanho da entrada. Com
+--checkpoint, a última linha concluída é salva e uma nova execução retoma a
+partir dela.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+from gerador_caca_palavras import (posicionar_puzzle, estatisticas_normalizacao, BancoPalavras,
+                                   FORMATO_TODOS, PALAVRAS_BLOQUEADAS, TAMANHO_MINIMO, TAMANHO_MAXIMO,
+                                   TAMANHO_MAXIMO_JPEG_DOCX, TAMANHO_AUTOMATICO, DENSIDADE_EMPACOTAMENTO,
+                                   FORMATOS_IMAGEM, MODOS_IMAGEM, DPI_IMAGEM, QUALIDADE_JPEG)
+
+FORMATOS = ('.pdf', '.jpeg', '.png', '.docx', FORMATO_TODOS)
+
+# Resoluções aceitas para as imagens
+DPI_MINIMO = 50
+DPI_MAXIMO = 600
+
+# Puzzles em andamento por processo (a janela limita a memória usada)
+PUZZLES_POR_PROCESSO = 4
+
+# Intervalo mínimo (s) entre gravações do checkpoint
+INTERVALO_CHECKPOINT = 0.5
+
+VALORES_VERDADEIROS = ('1', 'true', 'sim', 's', 'yes', 'y')
+VALORES_FALSOS = ('0', 'false', 'não', 'nao', 'n', 'no')
+
+# Bancos de palavras já montados neste processo (cada processo do pool monta o seu uma vez)
+_BANCOS = {}
+
+
+def normalizar_especificacao(spec, indice):
+    """Valida um puzzle do manifesto e preenche os valores padrão"""
+    palavras = [str(p).strip() for p in spec.get('palavras', []) if str(p).strip()]
+    banco = spec.get('banco')
+    if not palavras and not banco:
+        raise ValueError("o puzzle não tem palavras")
+    densidade = float(spec.get('densidade', DENSIDADE_EMPACOTAMENTO))
+    if not 0 < densidade <= 1:
+        raise ValueError("a densidade deve estar entre 0 e 1")
+
+    formato = str(spec.get('formato', '.pdf')).lower()
+    if not formato.startswith('.') and formato != FORMATO_TODOS:
+        formato = '.' + formato
+    if formato == '.jpg':
+        formato = '.jpeg'
+    if formato not in FORMATOS:
+        raise ValueError(f"formato desconhecido: {formato}")
+
+    tamanho = spec.get('tamanho', 18)
+    if str(tamanho).lower() == TAMANHO_AUTOMATICO:
+        if not palavras:
+            raise ValueError("o tamanho automático precisa de uma lista de palavras")
+        tamanho = TAMANHO_AUTOMATICO
+    else:
+        tamanho = int(tamanho)
+        if tamanho < TAMANHO_MINIMO or tamanho > TAMANHO_MAXIMO:
+            raise ValueError(f"o tamanho da grade deve estar entre {TAMANHO_MINIMO} e {TAMANHO_MAXIMO}")
+        verificar_tamanho_formato(tamanho, formato)
+
+    return {
+        'nome': str(spec.get('nome') or f"caca_palavras_{indice + 1:04d}"),
+        'palavras': palavras,
+        'tamanho': tamanho,
+        'usar_diagonais': ler_booleano(spec, 'usar_diagonais', False),
+        'usar_contrarias': ler_booleano(spec, 'usar_contrarias', True),
+        'formato': formato,
+        'incluir_gabarito': ler_booleano(spec, 'incluir_gabarito', True),
+        'semente': spec.get('semente'),
+        'bloqueadas': [str(p).strip() for p in spec.get('bloqueadas', PALAVRAS_BLOQUEADAS) if str(p).strip()],
+        'banco': os.path.abspath(banco) if banco else None,
+        'densidade': densidade,
+        'imagem': normalizar_opcoes_imagem(spec, formato),
+    }
+
+
+def ler_booleano(spec, chave, padrao):
+    """Lê uma opção verdadeiro/falso do puzzle
+    
+    Aceita booleanos, 0/1 e os textos de VALORES_VERDADEIROS e VALORES_FALSOS
+    (como no CSV); qualquer outro valor é erro, em vez de virar True.
+    """
+    valor = spec.get(chave, padrao)
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, int) and valor in (0, 1):
+        return bool(valor)
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in VALORES_VERDADEIROS:
+            return True
+        if texto in VALORES_FALSOS:
+            return False
+    raise ValueError(f"{chave} deve ser verdadeiro ou falso, não {valor!r}")
+
+
+def normalizar_opcoes_imagem(spec, formato):
+    """Opções de gerar_jpeg/gerar_png do puzzle (vazio para os outros formatos)"""
+    if formato not in FORMATOS_IMAGEM:
+        return {}
+    modo = str(spec.get('modo_imagem') or ('RGB' if formato == '.jpeg' else 'L')).upper()
+    if modo not in MODOS_IMAGEM:
+        raise ValueError(f"modo de imagem desconhecido: {modo}")
+    dpi = int(spec.get('dpi', DPI_IMAGEM))
+    if dpi < DPI_MINIMO or dpi > DPI_MAXIMO:
+        raise ValueError(f"o dpi deve estar entre {DPI_MINIMO} e {DPI_MAXIMO}")
+    opcoes = {'modo': modo, 'dpi': dpi}
+    if formato == '.jpeg':
+        qualidade = int(spec.get('qualidade', QUALIDADE_JPEG))
+        if qualidade < 1 or qualidade > 95:
+            raise ValueError("a qualidade do JPEG deve estar entre 1 e 95")
+        opcoes.update(qualidade=qualidade, progressivo=ler_booleano(spec, 'progressivo', False))
+    return opcoes
+
+
+def verificar_tamanho_formato(tamanho, formato):
+    """JPEG e DOCX só aceitam grades de até TAMANHO_MAXIMO_JPEG_DOCX"""
+    if tamanho > TAMANHO_MAXIMO_JPEG_DOCX and formato != '.pdf':
+        raise ValueError(f"grades maiores que {TAMANHO_MAXIMO_JPEG_DOCX}x{TAMANHO_MAXIMO_JPEG_DOCX} "
+                         "só podem ser salvas em PDF")
+
+
+def obter_banco(caminho):
+    """Banco de palavras do arquivo, montado uma única vez por processo"""
+    banco = _BANCOS.get(caminho)
+    if banco is None:
+        banco = _BANCOS[caminho] = BancoPalavras.de_arquivo(caminho)
+    return banco
+
+
+def memoria_pico_mb():
+    """Pico de memória residente do processo (MB); None onde o módulo resource não existe"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0)
+
+
+def gerar_puzzle(spec, diretorio_saida):
+    """Gera um puzzle do manifesto (executado nos processos do pool)"""
+    inicio = time.perf_counter()
+    resultado = {'nome': spec['nome'], 'ok': False}
+    try:
+        gerador, nao_inseridas = posicionar_puzzle(spec['palavras'], spec['tamanho'], spec['usar_diagonais'],
+                                                   spec['usar_contrarias'], spec['semente'])
+        verificar_tamanho_formato(gerador.tamanho, spec['formato'])
+        do_banco = []
+        if spec['banco']:
+            do_banco = gerador.empacotar_palavras(obter_banco(spec['banco']), spec['densidade'],
+                                                  spec['usar_diagonais'], spec['usar_contrarias'])
+        gerador.preencher_espacos_vazios(spec['bloqueadas'])
+        palavras = gerador.palavras_originais
+
+        caminho = os.path.join(diretorio_saida, spec['nome'] + spec['formato'])
+        if spec['formato'] == '.pdf':
+            gerador.gerar_pdf(caminho, palavras)
+            arquivos = [caminho]
+        elif spec['formato'] in FORMATOS_IMAGEM:
+            if spec['formato'] == '.jpeg':
+                gerador.gerar_jpeg(caminho, palavras, spec['incluir_gabarito'], **spec['imagem'])
+            else:
+                gerador.gerar_png(caminho, palavras, spec['incluir_gabarito'], **spec['imagem'])
+            arquivos = [caminho]
+            if spec['incluir_gabarito']:
+                base_nome = caminho.rsplit('.', 1)[0]
+                arquivos = [f"{base_nome}_caca{spec['formato']}", f"{base_nome}_gabarito{spec['formato']}"]
+        elif spec['formato'] == '.docx':
+            gerador.gerar_docx(caminho, palavras)
+            arquivos = [caminho]
+        else:
+            # Já estamos em um processo do pool: os formatos rodam em threads
+            arquivos = gerador.gerar_todos_formatos(os.path.join(diretorio_saida, spec['nome']),
+                                                    palavras, usar_processos=False)
+
+        resultado.update(ok=True, arquivos=arquivos, palavras_nao_inseridas=nao_inseridas,
+                         palavras_do_banco=do_banco)
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+    resultado['tempo'] = time.perf_counter() - inicio
+    # Pico do processo do pool até aqui: ajuda a dimensionar processos por contêiner
+    resultado['memoria_pico_mb'] = memoria_pico_mb()
+    # O cache de normalização é compartilhado por todos os puzzles do mesmo processo
+    resultado['cache_normalizacao'] = estatisticas_normalizacao()
+    return resultado
+
+
+def carregar_manifesto(caminho):
+    """Lê o manifesto JSON e devolve a lista de puzzles"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        dados = json.load(arquivo)
+    if isinstance(dados, dict):
+        dados = dados.get('puzzles', [])
+    if not isinstance(dados, list):
+        raise ValueError("o manifesto deve ser uma lista de puzzles")
+    return dados
+
+
+def _linha_csv(linha):
+    """Converte uma linha do CSV no formato de puzzle do manifesto"""
+    spec = {chave.strip(): valor.strip() for chave, valor in linha.items()
+            if chave and valor is not None and valor.strip()}
+    spec['palavras'] = [p for p in spec.get('palavras', '').split(';') if p.strip()]
+    if 'bloqueadas' in spec:
+        spec['bloqueadas'] = [p for p in spec['bloqueadas'].split(';') if p.strip()]
+    for chave in ('usar_diagonais', 'usar_contrarias', 'incluir_gabarito', 'progressivo'):
+        if chave in spec:
+            spec[chave] = ler_booleano(spec, chave, None)
+    if 'semente' in spec:
+        spec['semente'] = int(spec['semente'])
+    if 'densidade' in spec:
+        spec['densidade'] = float(spec['densidade'])
+    return spec
+
+
+def ler_especificacoes(caminho):
+    """Lê os puzzles aos poucos; gera (número da linha, puzzle ou exceção)
+    
+    Linhas com erro de leitura viram a exceção, para serem relatadas sem
+    interromper o lote.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.jsonl':
+        with open(caminho, encoding='utf-8') as arquivo:
+            for numero, texto in enumerate(arquivo, 1):
+                if not texto.strip():
+                    continue
+                try:
+                    yield numero, json.loads(texto)
+                except ValueError as e:
+                    yield numero, ValueError(f"JSON inválido: {e}")
+    elif extensao == '.csv':
+        with open(caminho, encoding='utf-8', newline='') as arquivo:
+            for numero, linha in enumerate(csv.DictReader(arquivo), 1):
+                try:
+                    yield numero, _linha_csv(linha)
+                except ValueError as e:
+                    yield numero, e
+    else:
+        yield from enumerate(carregar_manifesto(caminho), 1)
+
+
+class ProgressoLote:
+    """Guarda a última linha até a qual todos os puzzles já terminaram
+    
+    Os puzzles terminam fora de ordem; só as linhas concluídas acima dessa
+    marca ficam na memória, e elas nunca passam do tamanho da janela.
+    """
+
+    def __init__(self, caminho=None, entrada=None):
+        self.caminho = caminho
+        self.entrada = os.path.abspath(entrada) if entrada else None
+        self.linha = 0
+        self._concluidas = set()
+        self._gravado_em = 0.0
+        if caminho and os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+            if self.entrada and dados.get('entrada') != self.entrada:
+                raise ValueError(f"o checkpoint {caminho} é de outro arquivo: {dados.get('entrada')}")
+            self.linha = int(dados.get('linha', 0))
+
+    def concluir(self, linha):
+        """Marca a linha como concluída e avança a marca se possível"""
+        self._concluidas.add(linha)
+        while self.linha + 1 in self._concluidas:
+            self.linha += 1
+            self._concluidas.remove(self.linha)
+        if time.monotonic() - self._gravado_em >= INTERVALO_CHECKPOINT:
+            self.gravar()
+
+    def gravar(self):
+        """Grava o checkpoint (por substituição, para não ficar pela metade)"""
+        if not self.caminho:
+            return
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'entrada': self.entrada, 'linha': self.linha}, arquivo)
+        os.replace(temporario, self.caminho)
+        self._gravado_em = time.monotonic()
+
+
+def executar_lote_streaming(especificacoes, diretorio_saida, processos=None, janela=None,
+                            progresso=None, ao_concluir=None):
+    """Gera os puzzles de um iterável de (linha, puzzle) sem carregá-lo inteiro
+    
+    No máximo `janela` puzzles ficam em andamento; um novo só é lido quando
+    outro termina. Os resultados vão para ao_concluir e não são acumulados.
+    Linhas até progresso.linha são puladas (retomada).
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    processos = processos or os.cpu_count()
+    janela = janela or processos * PUZZLES_POR_PROCESSO
+    progresso = progresso or ProgressoLote()
+    inicio = progresso.linha
+
+    def concluir(linha, resultado):
+        resultado['linha'] = linha
+        if ao_concluir:
+            ao_concluir(resultado)
+        progresso.concluir(linha)
+
+    try:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            em_andamento = {}
+            for linha, spec in especificacoes:
+                if linha <= inicio:
+                    continue
+                try:
+                    if isinstance(spec, Exception):
+                        raise spec
+                    valida = normalizar_especificacao(spec, linha - 1)
+                except (ValueError, TypeError) as e:
+                    nome = spec.get('nome') if isinstance(spec, dict) else None
+                    concluir(linha, {'nome': nome or f"#{linha}", 'ok': False,
+                                     'erro': f"manifesto inválido: {e}", 'tempo': 0.0})
+                    continue
+
+                if len(em_andamento) >= janela:
+                    prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        concluir(em_andamento.pop(futuro), futuro.result())
+                em_andamento[executor.submit(gerar_puzzle, valida, diretorio_saida)] = linha
+
+            for futuro in as_completed(list(em_andamento)):
+                concluir(em_andamento.pop(futuro), futuro.result())
+    finally:
+        # Também após uma interrupção: a marca só inclui linhas realmente concluídas
+        progresso.gravar()
+
+
+def executar_lote(especificacoes, diretorio_saida, processos=None, ao_concluir=None):
+    """Gera todos os puzzles de uma lista e devolve os resultados"""
+    resultados = []
+
+    def coletar(resultado):
+        resultados.append(resultado)
+        if ao_concluir:
+            ao_concluir(resultado)
+
+    executar_lote_streaming(enumerate(especificacoes, 1), diretorio_saida, processos,
+                            ao_concluir=coletar)
+    return resultados
+
+
+def imprimir_resultado(resultado):
+    """Mostra uma linha de progresso por puzzle"""
+    if resultado['ok']:
+        extra = ""
+        if resultado.get('palavras_do_banco'):
+            extra += f" (+{len(resultado['palavras_do_banco'])} palavras do banco)"
+        if resultado['palavras_nao_inseridas']:
+            extra += f" (não inseridas: {', '.join(resultado['palavras_nao_inseridas'])})"
+        print(f"[ok]   {resultado['nome']} em {resultado['tempo']:.2f}s{extra}")
+    else:
+        print(f"[erro] {resultado['nome']}: {resultado['erro']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera caça-palavras em lote a partir de um manifesto")
+    parser.add_argument("manifesto", help="arquivo JSON, JSONL ou CSV com os puzzles")
+    parser.add_argument("--saida", default=".", help="pasta onde os arquivos serão salvos")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--janela", type=int, default=None,
+                        help=f"puzzles em andamento ao mesmo tempo (padrão: {PUZZLES_POR_PROCESSO} por processo)")
+    parser.add_argument("--checkpoint", help="arquivo de progresso para retomar o lote após uma interrupção")
+    parser.add_argument("--relatorio", help="salva o resultado de cada puzzle em JSONL, à medida que terminam")
+    args = parser.parse_args(argv)
+
+    progresso = ProgressoLote(args.checkpoint, args.manifesto)
+    if progresso.linha:
+        print(f"Retomando após a linha {progresso.linha}")
+
+    contagem = {'total': 0, 'falhas': 0}
+    relatorio = open(args.relatorio, 'a' if progresso.linha else 'w', encoding='utf-8') if args.relatorio else None
+
+    def ao_concluir(resultado):
+        contagem['total'] += 1
+        contagem['falhas'] += not resultado['ok']
+        imprimir_resultado(resultado)
+        if relatorio:
+            relatorio.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+    inicio = time.perf_counter()
+    try:
+        executar_lote_streaming(ler_especificacoes(args.manifesto), args.saida, args.processos,
+                                args.janela, progresso, ao_concluir)
+    finally:
+        if relatorio:
+            relatorio.close()
+    duracao = time.perf_counter() - inicio
+
+    total, falhas = contagem['total'], contagem['falhas']
+    print(f"\n{total - falhas}/{total} puzzles gerados em {duracao:.2f}s "
+          f"({total / duracao if duracao > 0 else 0:.1f} puzzles/s)")
+
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
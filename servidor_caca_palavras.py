@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Serviço HTTP local do Gerador de Caça-Palavras (somente biblioteca padrão)
+
+Uso:
+python servidor_caca_palavras.py [--porta 8765] [--processos N] [--fila N] [--cache pasta]
+
+POST /gerar recebe um JSON com as mesmas chaves de um puzzle do manifesto do
+lote (palavras, tamanho, usar_diagonais, usar_contrarias, formato, semente,
+bloqueadas, nome, modo_imagem, dpi, qualidade, progressivo, incluir_gabarito) e
+devolve o arquivo gerado. Quando o formato rende mais de um arquivo (JPEG ou
+PNG com gabarito, ou "todos"), a resposta é um ZIP. Os arquivos são montados
+em memória; só o cache opcional (--cache) grava em disco.
+
+GET /metricas devolve, em JSON, a ocupação da fila, os contadores de pedidos
+e a latência de cada etapa (espera na fila, posicionamento, preenchimento,
+renderização e envio).
+
+Os puzzles são gerados em um pool de processos. Quando há mais pedidos em
+andamento do que o limite da fila, o serviço responde 429 em vez de acumular
+pedidos na memória.
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gerador_caca_palavras import posicionar_puzzle, CacheSaidas, FORMATO_TODOS, TAMANHO_MAXIMO_CACHE_SAIDAS
+from lote_caca_palavras import normalizar_especificacao, verificar_tamanho_formato
+
+PORTA_PADRAO = 8765
+
+# Maior corpo de pedido aceito (bytes)
+TAMANHO_MAXIMO_PEDIDO = 1024 * 1024
+
+# Tempo máximo (s) esperando um puzzle antes de responder 504
+TEMPO_LIMITE_GERACAO = 120
+
+# Quantas medições por etapa entram nas métricas
+JANELA_METRICAS = 1000
+
+ETAPAS = ('fila', 'posicionamento', 'preenchimento', 'renderizacao', 'envio', 'total')
+
+TIPOS_CONTEUDO = {
+    '.pdf': 'application/pdf',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.zip': 'application/zip',
+}
+
+
+def gerar_em_processo(spec, enviado_em):
+    """Gera o puzzle em um processo do pool; devolve (arquivos, não inseridas, tempos)"""
+    inicio = time.time()
+    tempos = {'fila': inicio - enviado_em}
+
+    gerador, nao_inseridas = posicionar_puzzle(spec['palavras'], spec['tamanho'], spec['usar_diagonais'],
+                                               spec['usar_contrarias'], spec['semente'])
+    verificar_tamanho_formato(gerador.tamanho, spec['formato'])
+    marca = time.time()
+    tempos['posicionamento'] = marca - inicio
+
+    gerador.preencher_espacos_vazios(spec['bloqueadas'])
+    tempos['preenchimento'] = time.time() - marca
+    marca = time.time()
+
+    if spec['formato'] == FORMATO_TODOS:
+        # Já estamos em um processo do pool: os formatos rodam em threads
+        arquivos = gerador.renderizar_todos_em_memoria(usar_processos=False)
+    else:
+        arquivos = gerador.renderizar_em_memoria(spec['formato'], incluir_gabarito=spec['incluir_gabarito'],
+                                                 **spec['imagem'])
+    tempos['renderizacao'] = time.time() - marca
+    return arquivos, nao_inseridas, tempos
+
+
+def empacotar(nome, arquivos):
+    """Devolve (nome do arquivo, tipo, bytes) da resposta; vários arquivos viram um ZIP"""
+    if len(arquivos) == 1:
+        sufixo, conteudo = arquivos[0]
+        extensao = '.' + sufixo.rsplit('.', 1)[-1]
+        return nome + sufixo, TIPOS_CONTEUDO.get(extensao, 'application/octet-stream'), conteudo
+
+    buffer = io.BytesIO()
+    # PDF, JPEG e DOCX já são comprimidos
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as pacote:
+        for sufixo, conteudo in arquivos:
+            pacote.writestr(nome + sufixo, conteudo)
+    return nome + '.zip', TIPOS_CONTEUDO['.zip'], buffer.getvalue()
+
+
+class Metricas:
+    """Contadores de pedidos e latências recentes de cada etapa"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.contadores = {'pedidos': 0, 'concluidos': 0, 'rejeitados': 0,
+                           'invalidos': 0, 'erros': 0, 'cache': 0}
+        self.latencias = {etapa: deque(maxlen=JANELA_METRICAS) for etapa in ETAPAS}
+
+    def contar(self, nome):
+        with self._trava:
+            self.contadores[nome] += 1
+
+    def registrar(self, tempos):
+        """Guarda as latências (em segundos) de um pedido"""
+        with self._trava:
+            for etapa, duracao in tempos.items():
+                self.latencias[etapa].append(duracao)
+
+    def resumo(self):
+        """Contadores e, por etapa, média, p50, p95 e máximo em milissegundos"""
+        with self._trava:
+            latencias = {}
+            for etapa, valores in self.latencias.items():
+                if not valores:
+                    latencias[etapa] = None
+                    continue
+                ordenados = sorted(valores)
+                latencias[etapa] = {
+                    'amostras': len(ordenados),
+                    'media_ms': statistics.fmean(ordenados) * 1000,
+                    'p50_ms': ordenados[len(ordenados) // 2] * 1000,
+                    'p95_ms': ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))] * 1000,
+                    'max_ms': ordenados[-1] * 1000,
+                }
+            return {'contadores': dict(self.contadores), 'latencias': latencias}
+
+
+class ServidorCacaPalavras(ThreadingHTTPServer):
+    """Servidor HTTP com o pool de geração, o limite da fila e as métricas"""
+
+    daemon_threads = True
+
+    def __init__(self, endereco, processos=None, limite_fila=None, cache=None):
+        super().__init__(endereco, ManipuladorPedidos)
+        self.processos = processos or os.cpu_count() or 1
+        self.limite_fila = limite_fila or self.processos * 2
+        self.pool = ProcessPoolExecutor(max_workers=self.processos)
+        self.cache = cache
+        self.metricas = Metricas()
+        self._trava = threading.Lock()
+        self.em_andamento = 0
+
+    def reservar_vaga(self):
+        """Ocupa uma vaga da fila; False quando ela está cheia"""
+        with self._trava:
+            if self.em_andamento >= self.limite_fila:
+                return False
+            self.em_andamento += 1
+            return True
+
+    def liberar_vaga(self):
+        with self._trava:
+            self.em_andamento -= 1
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ManipuladorPedidos(BaseHTTPRequestHandler):
+    """Trata POST /gerar e GET /metricas"""
+
+    server_version = "CacaPalavras/1.0"
+
+    def log_message(self, formato, *args):
+        # O log de cada pedido fica nas métricas
+        pass
+
+    def _responder_json(self, status, dados, cabecalhos=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path != '/metricas':
+            self._responder_json(404, {'erro': 'caminho desconhecido'})
+            return
+        servidor = self.server
+        resumo = servidor.metricas.resumo()
+        resumo['fila'] = {'em_andamento': servidor.em_andamento, 'limite': servidor.limite_fila,
+                          'processos': servidor.processos}
+        if servidor.cache is not None:
+            resumo['cache'] = servidor.cache.estatisticas()
+        self._responder_json(200, resumo)
+
+    def do_POST(self):
+        if self.path != '/gerar':
+            self._responder_json(404, {'erro': 'caminho desconhecido'})
+            return
+        servidor = self.server
+        servidor.metricas.contar('pedidos')
+        inicio = time.time()
+
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            tamanho = -1
+        if tamanho < 0 or tamanho > TAMANHO_MAXIMO_PEDIDO:
+            servidor.metricas.contar('invalidos')
+            self._responder_json(413, {'erro': 'pedido muito grande'})
+            return
+        try:
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not isinstance(dados, dict):
+                raise ValueError("o pedido deve ser um objeto JSON")
+            if 'banco' in dados:
+                # O banco é um arquivo local: o serviço não lê caminhos vindos do pedido
+                raise ValueError("a chave banco só é aceita na geração em lote")
+            spec = normalizar_especificacao(dict(dados, nome=dados.get('nome') or 'caca_palavras'), 0)
+        except (ValueError, TypeError) as e:
+            servidor.metricas.contar('invalidos')
+            self._responder_json(400, {'erro': str(e)})
+            return
+
+        chave = None
+        arquivos = None
+        if servidor.cache is not None and spec['semente'] is not None:
+            chave = servidor.cache.chave(spec['palavras'], spec['tamanho'], spec['usar_diagonais'],
+                                         spec['usar_contrarias'], spec['semente'], spec['formato'],
+                                         incluir_gabarito=spec['incluir_gabarito'], bloqueadas=spec['bloqueadas'],
+                                         **spec['imagem'])
+            arquivos = servidor.cache.obter(chave)
+
+        tempos = {}
+        if arquivos is not None:
+            servidor.metricas.contar('cache')
+        else:
+            if not servidor.reservar_vaga():
+                servidor.metricas.contar('rejeitados')
+                self._responder_json(429, {'erro': 'fila cheia, tente novamente'}, {'Retry-After': '1'})
+                return
+            try:
+                futuro = servidor.pool.submit(gerar_em_processo, spec, time.time())
+            except Exception as e:
+                servidor.liberar_vaga()
+                servidor.metricas.contar('erros')
+                self._responder_json(500, {'erro': f"{type(e).__name__}: {e}"})
+                return
+            # A vaga só volta quando o processo termina: um pedido que estourou o
+            # tempo limite continua ocupando o pool até o fim
+            futuro.add_done_callback(lambda _: servidor.liberar_vaga())
+            try:
+                arquivos, _, tempos = futuro.result(timeout=TEMPO_LIMITE_GERACAO)
+            except ValueError as e:
+                # Ex.: tamanho automático maior do que o formato aceita
+                servidor.metricas.contar('invalidos')
+                self._responder_json(400, {'erro': str(e)})
+                return
+            except TimeoutError:
+                # Se ainda estava na fila do pool, nem chega a rodar
+                futuro.cancel()
+                servidor.metricas.contar('erros')
+                self._responder_json(504, {'erro': 'tempo limite de geração excedido'})
+                return
+            except Exception as e:
+                servidor.metricas.contar('erros')
+                self._responder_json(500, {'erro': f"{type(e).__name__}: {e}"})
+                return
+            if chave is not None:
+                servidor.cache.guardar(chave, arquivos)
+
+        marca = time.time()
+        # O nome vai no cabeçalho HTTP: fica só com caracteres ASCII seguros
+        nome, tipo, conteudo = empacotar(re.sub(r'[^\w.-]', '_', spec['nome'], flags=re.ASCII), arquivos)
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.send_header('Content-Disposition', f'attachment; filename="{nome}"')
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+        tempos['envio'] = time.time() - marca
+        tempos['total'] = time.time() - inicio
+        servidor.metricas.registrar(tempos)
+        servidor.metricas.contar('concluidos')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local do Gerador de Caça-Palavras")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: somente local)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--processos", type=int, default=None,
+                        help="processos de geração (padrão: todos os núcleos)")
+    parser.add_argument("--fila", type=int, default=None,
+                        help="pedidos em andamento antes de responder 429 (padrão: 2 por processo)")
+    parser.add_argument("--cache", help="pasta do cache de arquivos gerados (pedidos com semente)")
+    parser.add_argument("--cache-mb", type=int, default=TAMANHO_MAXIMO_CACHE_SAIDAS // (1024 * 1024),
+                        help="tamanho máximo do cache em MB")
+    args = parser.parse_args(argv)
+
+    cache = CacheSaidas(args.cache, args.cache_mb * 1024 * 1024) if args.cache else None
+    servidor = ServidorCacaPalavras((args.host, args.porta), args.processos, args.fila, cache)
+    print(f"Servindo em http://{args.host}:{servidor.server_address[1]} "
+          f"({servidor.processos} processos, fila de {servidor.limite_fila})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
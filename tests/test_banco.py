@@ -0,0 +1,82 @@
+import random
+import unittest
+
+import gerador_caca_palavras as g
+
+
+def vocabulario(quantidade, semente=0):
+    """Palavras sorteadas com poucas letras, para que se cruzem bastante"""
+    rng = random.Random(semente)
+    return [''.join(rng.choice('AEIOSRLNTC') for _ in range(rng.randint(3, 7))) for _ in range(quantidade)]
+
+
+class TestBancoPalavras(unittest.TestCase):
+
+    def test_ignora_curtas_repetidas_e_invalidas(self):
+        banco = g.BancoPalavras(['Pé', 'maçã', 'MACA', 'abacaxi\n', 'guarda-chuva', 'uva', '  '])
+        self.assertEqual(len(banco), 3)
+        self.assertEqual(banco.buscar([None] * 4), ['maçã'])
+        self.assertEqual(banco.buscar(list('ABACAXI')), ['abacaxi'])
+
+    def test_busca_igual_a_forca_bruta(self):
+        palavras = vocabulario(300)
+        banco = g.BancoPalavras(palavras)
+        distintas = list(dict.fromkeys(palavras))
+        rng = random.Random(1)
+        for _ in range(200):
+            comprimento = rng.randint(3, 7)
+            padrao = [rng.choice('AEIOSRLNTC') if rng.random() < 0.3 else None for _ in range(comprimento)]
+            esperadas = [p for p in distintas if len(p) == comprimento
+                         and all(letra is None or letra == p[i] for i, letra in enumerate(padrao))]
+            self.assertEqual(sorted(banco.buscar(padrao)), sorted(esperadas), padrao)
+
+
+class TestEmpacotamento(unittest.TestCase):
+
+    def verificar(self, gerador, banco, colocadas, usar_diagonais, usar_contrarias):
+        direcoes = [g.DIRECOES[d] for d in g.direcoes_disponiveis(usar_diagonais, usar_contrarias)]
+        por_palavra = {info['palavra']: info for info in gerador.palavras_posicoes}
+        self.assertEqual(len(set(colocadas)), len(colocadas))
+        eixos = {}
+        for info in gerador.palavras_posicoes:
+            texto = g.normalizar_palavra(info['palavra']).texto
+            posicoes = info['posicoes']
+            passo = (posicoes[1][0] - posicoes[0][0], posicoes[1][1] - posicoes[0][1])
+            self.assertIn(passo, direcoes, info['palavra'])
+            # A palavra cabe na grade, em células seguidas, e as letras gravadas são as dela
+            for i, (l, c) in enumerate(posicoes):
+                self.assertTrue(0 <= l < gerador.tamanho and 0 <= c < gerador.tamanho, info['palavra'])
+                self.assertEqual((l, c), (posicoes[0][0] + i * passo[0], posicoes[0][1] + i * passo[1]))
+                self.assertEqual(gerador.grade[l][c], texto[i], info['palavra'])
+            # Duas palavras no mesmo eixo nunca dividem células
+            eixo = g.EIXO_DIRECAO[g.DIRECOES.index(passo)][0]
+            for celula in posicoes:
+                self.assertNotIn(eixo, eixos.setdefault(celula, set()), info['palavra'])
+                eixos[celula].add(eixo)
+        for original in colocadas:
+            self.assertIn(original, por_palavra)
+            self.assertEqual(banco.buscar(list(g.normalizar_palavra(original).texto)), [original])
+
+    def test_palavras_colocadas_cabem_na_grade(self):
+        banco = g.BancoPalavras(vocabulario(400))
+        for semente in range(6):
+            usar_diagonais, usar_contrarias = semente % 2 == 0, semente % 3 != 0
+            gerador = g.GeradorCacaPalavras(semente=semente)
+            gerador.criar_grade_vazia(10)
+            gerador.inserir_palavras(['TRILHO', 'SALTO'], usar_diagonais, usar_contrarias)
+            colocadas = gerador.empacotar_palavras(banco, 0.7, usar_diagonais, usar_contrarias)
+            self.assertTrue(colocadas)
+            self.assertEqual(gerador.palavras_originais[2:], colocadas)
+            self.verificar(gerador, banco, colocadas, usar_diagonais, usar_contrarias)
+
+    def test_densidade_alcancada(self):
+        banco = g.BancoPalavras(vocabulario(400))
+        gerador = g.GeradorCacaPalavras(semente=3)
+        gerador.criar_grade_vazia(8)
+        gerador.empacotar_palavras(banco, 0.5, True, True)
+        ocupadas = sum(letra is not None for linha in gerador.grade for letra in linha)
+        self.assertGreaterEqual(ocupadas, 32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import gerador_caca_palavras as g
+
+
+def arquivos(tamanho, letra=b'x'):
+    """Saída falsa de um pedido, com conteúdo de `tamanho` bytes"""
+    return [('.png', letra * tamanho)]
+
+
+class TestCacheSaidas(unittest.TestCase):
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.pasta = self._pasta.name
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def test_acerto_e_falha(self):
+        cache = g.CacheSaidas(self.pasta)
+        chave = cache.chave(['CASA', 'BOLA'], 10, False, True, 1, '.png')
+        self.assertIsNone(cache.obter(chave))
+        cache.guardar(chave, arquivos(100))
+        self.assertEqual(cache.obter(chave), arquivos(100))
+        self.assertEqual((cache.acertos, cache.falhas), (1, 1))
+
+    def test_descarte_lru_pelo_tamanho(self):
+        # Cada entrada ocupa 100 bytes de conteúdo mais o cabeçalho; cabem três
+        cache = g.CacheSaidas(self.pasta, tamanho_maximo=400)
+        for chave in ('a', 'b', 'c'):
+            cache.guardar(chave, arquivos(100))
+        self.assertIsNotNone(cache.obter('a'))
+        cache.guardar('d', arquivos(100))
+        # 'b' é a usada há mais tempo, porque 'a' acabou de ser lida
+        self.assertIsNone(cache.obter('b'))
+        for chave in ('a', 'c', 'd'):
+            self.assertIsNotNone(cache.obter(chave), chave)
+        self.assertEqual(cache.descartes, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.pasta, 'b.saida')))
+        self.assertLessEqual(cache.estatisticas()['bytes'], 400)
+
+    def test_entrada_maior_que_o_limite_nao_e_guardada(self):
+        cache = g.CacheSaidas(self.pasta, tamanho_maximo=50)
+        cache.guardar('a', arquivos(100))
+        self.assertIsNone(cache.obter('a'))
+        self.assertEqual(os.listdir(self.pasta), [])
+
+    def test_persistencia_entre_instancias(self):
+        cache = g.CacheSaidas(self.pasta, tamanho_maximo=400)
+        for indice, chave in enumerate(('a', 'b', 'c')):
+            cache.guardar(chave, arquivos(100, bytes([65 + indice])))
+            # A ordem LRU de uma nova instância vem da data de modificação
+            os.utime(os.path.join(self.pasta, chave + '.saida'), (1000 + indice, 1000 + indice))
+
+        outro = g.CacheSaidas(self.pasta, tamanho_maximo=400)
+        self.assertEqual(outro.obter('b'), arquivos(100, b'B'))
+        outro.guardar('d', arquivos(100))
+        self.assertIsNone(outro.obter('a'))
+        self.assertEqual(outro.obter('c'), arquivos(100, b'C'))
+
+    def test_versao_invalida_as_chaves(self):
+        cache = g.CacheSaidas(self.pasta)
+        pedido = (['CASA', 'BOLA'], 10, False, True, 1, '.png')
+        chave = cache.chave(*pedido)
+        cache.guardar(chave, arquivos(100))
+        self.assertEqual(cache.chave(*pedido), chave)
+        with mock.patch.object(g, 'VERSAO_CACHE_SAIDAS', g.VERSAO_CACHE_SAIDAS + 1):
+            nova = cache.chave(*pedido)
+        self.assertNotEqual(nova, chave)
+        self.assertIsNone(cache.obter(nova))
+
+    def test_chave_depende_das_opcoes(self):
+        pedido = (['CASA', 'BOLA'], 10, False, True, 1, '.png')
+        chave = g.CacheSaidas.chave(*pedido, incluir_gabarito=True)
+        self.assertNotEqual(chave, g.CacheSaidas.chave(*pedido, incluir_gabarito=False))
+        self.assertNotEqual(chave, g.CacheSaidas.chave(['CASA', 'BOLA'], 10, False, True, 2, '.png',
+                                                       incluir_gabarito=True))
+
+    @unittest.skipUnless(g.PILLOW_DISPONIVEL, "Pillow não instalado")
+    def test_gerar_reaproveita_o_arquivo(self):
+        cache = g.CacheSaidas(self.pasta)
+        primeiro = cache.gerar(['CASA', 'BOLA'], 8, semente=3, formato='.png', dpi=50)
+        with mock.patch.object(g, 'posicionar_puzzle', side_effect=AssertionError("gerou de novo")):
+            self.assertEqual(cache.gerar(['CASA', 'BOLA'], 8, semente=3, formato='.png', dpi=50), primeiro)
+        self.assertEqual(cache.acertos, 1)
+
+        # Sem semente cada pedido é um puzzle novo: nada é guardado
+        cache.gerar(['CASA', 'BOLA'], 8, formato='.png', dpi=50)
+        self.assertEqual(len(os.listdir(self.pasta)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
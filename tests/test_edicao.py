@@ -0,0 +1,200 @@
+import collections
+import time
+import unittest
+
+import gerador_caca_palavras as g
+
+
+PALAVRAS = ['CASA', 'BOLA', 'GATO', 'PATO', 'MESA', 'CADEIRA', 'JANELA', 'ABACAXI']
+
+BACKENDS = ['linhas', 'bits'] + (['numpy'] if g.NUMPY_DISPONIVEL else [])
+
+
+def montar(backend='linhas', semente=1, tamanho=10):
+    gerador = g.GeradorCacaPalavras(backend, semente=semente)
+    gerador.criar_grade_vazia(tamanho)
+    gerador.inserir_palavras(PALAVRAS, True, True)
+    return gerador
+
+
+def grade_esperada(gerador):
+    """Grade refeita só a partir das palavras colocadas"""
+    grade = [[None] * gerador.tamanho for _ in range(gerador.tamanho)]
+    for info in gerador.palavras_posicoes:
+        for (l, c), letra in zip(info['posicoes'], g.normalizar_palavra(info['palavra']).texto):
+            grade[l][c] = letra
+    return grade
+
+
+def estado_indice(indice):
+    """O que o índice guarda, para comparar com um índice refeito do zero"""
+    if isinstance(indice, g.IndiceLinhas):
+        return indice.linhas
+    if isinstance(indice, g.GradeBits):
+        return indice.celulas, indice.ocupadas, {letra: bits for letra, bits in indice.letras.items() if bits}
+    return indice.codigos.tolist()
+
+
+class TestEdicao(unittest.TestCase):
+
+    def assertConsistente(self, gerador):
+        """Grade, contagens por célula e índice de busca batem com palavras_posicoes"""
+        self.assertEqual(gerador.grade, grade_esperada(gerador))
+        por_celula = collections.Counter(celula for info in gerador.palavras_posicoes for celula in info['posicoes'])
+        for l in range(gerador.tamanho):
+            for c in range(gerador.tamanho):
+                self.assertEqual(len(gerador.palavras_na_celula(l, c)), por_celula[(l, c)])
+        for info in gerador.palavras_posicoes:
+            self.assertTrue(gerador.pode_colocar_palavra(info['palavra'], *gerador._colocacao(info['posicoes'])))
+
+    def test_adicionar_e_remover_volta_ao_inicio(self):
+        for backend in BACKENDS:
+            gerador = montar(backend)
+            gerador.obter_indice()
+            grade = [linha[:] for linha in gerador.grade]
+            posicoes = [dict(info) for info in gerador.palavras_posicoes]
+            posicao = gerador.adicionar_palavra('LUA', True, True)
+            self.assertIsNotNone(posicao)
+            self.assertEqual(gerador.remover_palavra('LUA'), posicao)
+            self.assertEqual(gerador.grade, grade)
+            self.assertEqual(gerador.palavras_posicoes, posicoes)
+            self.assertNotIn('LUA', gerador.palavras_originais)
+            self.assertConsistente(gerador)
+
+    def test_remover_e_adicionar(self):
+        for backend in BACKENDS:
+            gerador = montar(backend)
+            gerador.remover_palavra('CADEIRA')
+            self.assertNotIn('CADEIRA', gerador.palavras_originais)
+            self.assertConsistente(gerador)
+            self.assertIsNotNone(gerador.adicionar_palavra('CADEIRA', True, True))
+            self.assertEqual(gerador.palavras_originais[-1], 'CADEIRA')
+            self.assertConsistente(gerador)
+
+    def test_remover_mantem_celulas_compartilhadas(self):
+        gerador = g.GeradorCacaPalavras(semente=1)
+        gerador.criar_grade_vazia(5)
+        gerador.colocar_palavra('CASA', 0, 0, 0)
+        gerador.colocar_palavra('COLA', 0, 0, 2)
+        self.assertEqual(sorted(gerador.palavras_na_celula(0, 0)), ['CASA', 'COLA'])
+        gerador.remover_palavra('CASA')
+        self.assertEqual(gerador.grade[0][0], 'C')
+        self.assertIsNone(gerador.grade[0][1])
+        self.assertConsistente(gerador)
+
+    def test_realocar(self):
+        for backend in BACKENDS:
+            gerador = montar(backend)
+            ordem = [info['palavra'] for info in gerador.palavras_posicoes]
+            k = ordem.index('JANELA')
+            antiga = gerador._colocacao(gerador.palavras_posicoes[k]['posicoes'])
+            nova = gerador.realocar_palavra('JANELA', True, True)
+            self.assertIsNotNone(nova)
+            self.assertNotEqual(nova, antiga)
+            self.assertEqual(gerador._colocacao(gerador.palavras_posicoes[k]['posicoes']), nova)
+            self.assertEqual([info['palavra'] for info in gerador.palavras_posicoes], ordem)
+            self.assertConsistente(gerador)
+
+    def test_palavra_normalizada(self):
+        gerador = g.GeradorCacaPalavras(semente=2)
+        gerador.criar_grade_vazia(8)
+        gerador.adicionar_palavra(' casa ')
+        gerador.adicionar_palavra('Coração')
+        self.assertEqual(gerador.palavras_originais, ['casa', 'Coração'])
+        self.assertIsNotNone(gerador.realocar_palavra('CORACAO'))
+        gerador.remover_palavra('Casa')
+        gerador.remover_palavra(' coração ')
+        self.assertEqual(gerador.palavras_posicoes, [])
+        self.assertEqual(gerador.palavras_originais, [])
+
+    def test_remover_palavra_ausente(self):
+        gerador = montar()
+        with self.assertRaises(ValueError):
+            gerador.remover_palavra('NADA')
+        with self.assertRaises(ValueError):
+            gerador.realocar_palavra('NADA')
+
+    def test_edicoes_em_puzzle_preenchido(self):
+        for backend in BACKENDS:
+            gerador = montar(backend, semente=3, tamanho=12)
+            gerador.preencher_espacos_vazios()
+            gerador.remover_palavra('BOLA')
+            gerador.realocar_palavra('GATO', True, True)
+            gerador.adicionar_palavra('LARANJA', True, True)
+            grade = gerador.grade
+            self.assertTrue(all(letra is not None for linha in grade for letra in linha), backend)
+            for info in gerador.palavras_posicoes:
+                texto = g.normalizar_palavra(info['palavra']).texto
+                self.assertEqual(''.join(grade[l][c] for l, c in info['posicoes']), texto)
+            encontradas = {(texto, frozenset(celulas)) for texto, celulas in gerador.encontrar_palavras()}
+            esperadas = {(g.normalizar_palavra(info['palavra']).texto, frozenset(info['posicoes']))
+                         for info in gerador.palavras_posicoes}
+            self.assertEqual(encontradas, esperadas, backend)
+
+    def test_indice_acompanha_edicoes_em_puzzle_preenchido(self):
+        for backend in BACKENDS:
+            for semente in range(40):
+                gerador = montar(backend, semente=semente)
+                # Bloqueadas de duas letras fazem a correção trocar letras a cada edição
+                gerador.preencher_espacos_vazios(['QW', 'ZK', 'XJ', 'YV'])
+                gerador.adicionar_palavra('LARANJA', True, True)
+                gerador.realocar_palavra('CASA', True, True)
+                self.assertEqual(estado_indice(gerador.obter_indice()),
+                                 estado_indice(g.BACKENDS[backend](gerador.grade)), (backend, semente))
+
+    def test_preenchimento_fica_no_lugar(self):
+        for backend in BACKENDS:
+            gerador = montar(backend, semente=6, tamanho=30)
+            gerador.preencher_espacos_vazios()
+            antes = [linha[:] for linha in gerador.grade]
+            k = [info['palavra'] for info in gerador.palavras_posicoes].index('MESA')
+            celulas = gerador.palavras_posicoes[k]['posicoes']
+            gerador.remover_palavra('MESA')
+            # Só mudam letras perto da palavra removida (no alcance da correção)
+            alcance = 2 * max(len(p) for p in PALAVRAS)
+            for l, linha in enumerate(gerador.grade):
+                for c, letra in enumerate(linha):
+                    if letra != antes[l][c]:
+                        self.assertTrue(any(max(abs(l - l0), abs(c - c0)) <= alcance for l0, c0 in celulas),
+                                        (backend, l, c))
+
+    def test_edicao_em_puzzle_preenchido_nao_cresce_com_a_grade(self):
+        # Remover e recolocar não pode percorrer a grade inteira: com uma grade
+        # 8 vezes maior de lado, um custo quadrático ficaria 64 vezes maior
+        def mediana(tamanho):
+            gerador = montar(semente=1, tamanho=tamanho)
+            gerador.preencher_espacos_vazios()
+            gerador.remover_palavra('GATO')
+            gerador.adicionar_palavra('GATO', True, True)
+            tempos = []
+            for i in range(30):
+                palavra = PALAVRAS[i % len(PALAVRAS)]
+                inicio = time.perf_counter()
+                gerador.remover_palavra(palavra)
+                gerador.adicionar_palavra(palavra, True, True)
+                tempos.append(time.perf_counter() - inicio)
+            return sorted(tempos)[len(tempos) // 2]
+        
+        self.assertLess(mediana(320), 8 * mediana(40))
+
+    def test_edicoes_em_puzzle_carregado(self):
+        gerador = montar(semente=4, tamanho=12)
+        gerador.preencher_espacos_vazios()
+        carregado = g.GeradorCacaPalavras.desserializar(gerador.serializar())
+        carregado.remover_palavra('MESA')
+        self.assertTrue(all(letra is not None for linha in carregado.grade for letra in linha))
+        # Depois de limpar, as edições voltam a deixar as células livres vazias
+        carregado.limpar_preenchimento()
+        carregado.remover_palavra('PATO')
+        self.assertEqual(carregado.grade, grade_esperada(carregado))
+
+    @unittest.skipUnless(g.PILLOW_DISPONIVEL, "Pillow não está instalado")
+    def test_renderizar_depois_de_editar_preenchido(self):
+        gerador = montar(semente=5, tamanho=12)
+        gerador.preencher_espacos_vazios()
+        gerador.remover_palavra('CASA')
+        self.assertTrue(gerador.renderizar_em_memoria('.png', incluir_gabarito=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import struct
+import tempfile
+import unittest
+
+import gerador_caca_palavras as g
+
+
+PALAVRAS = ['Casa', 'bola', 'GATO', 'Pato', 'Mesa', 'Cadeira', 'Janela', 'Coração', 'ÁRVORE', 'MELANCIA']
+
+
+def gerar(semente, tamanho=10):
+    """Puzzle preenchido a partir da semente"""
+    gerador = g.GeradorCacaPalavras(semente=semente)
+    gerador.criar_grade_vazia(tamanho)
+    gerador.inserir_palavras(PALAVRAS, True, True)
+    gerador.preencher_espacos_vazios()
+    return gerador
+
+
+class TestFormatoPuzzle(unittest.TestCase):
+
+    def test_mesma_semente_mesmos_bytes(self):
+        self.assertEqual(gerar(11).serializar(), gerar(11).serializar())
+        self.assertNotEqual(gerar(11).serializar(), gerar(12).serializar())
+
+    def test_ida_e_volta(self):
+        gerador = gerar(4)
+        carregado = g.GeradorCacaPalavras.desserializar(gerador.serializar())
+        self.assertEqual(carregado.tamanho, gerador.tamanho)
+        self.assertEqual(carregado.grade, gerador.grade)
+        self.assertEqual(carregado.palavras_posicoes, gerador.palavras_posicoes)
+        self.assertEqual(carregado.palavras_originais, gerador.palavras_originais)
+
+    def test_ida_e_volta_grade_sem_preenchimento(self):
+        gerador = g.GeradorCacaPalavras(semente=2)
+        gerador.criar_grade_vazia(9)
+        gerador.inserir_palavras(PALAVRAS)
+        carregado = g.GeradorCacaPalavras.desserializar(gerador.serializar())
+        self.assertEqual(carregado.grade, gerador.grade)
+        self.assertTrue(any(letra is None for linha in carregado.grade for letra in linha))
+
+    @unittest.skipUnless(g.NUMPY_DISPONIVEL, "numpy não está instalado")
+    def test_carregar_em_outro_backend(self):
+        gerador = gerar(6)
+        carregado = g.GeradorCacaPalavras.desserializar(gerador.serializar(), 'numpy')
+        self.assertEqual(carregado.grade, gerador.grade)
+
+    def test_colecao(self):
+        geradores = [gerar(semente, 8 + semente) for semente in range(4)]
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'colecao.cacas')
+            g.salvar_colecao_puzzles(caminho, geradores)
+            with g.ColecaoPuzzles(caminho) as colecao:
+                self.assertEqual(len(colecao), len(geradores))
+                self.assertEqual(colecao[2].grade, geradores[2].grade)
+                self.assertEqual([p.palavras_posicoes for p in colecao],
+                                 [p.palavras_posicoes for p in geradores])
+
+    def test_dados_invalidos(self):
+        with self.assertRaises(ValueError):
+            g.GeradorCacaPalavras.desserializar(b'nada')
+        dados = bytearray(gerar(1).serializar())
+        dados[0] ^= 0xFF
+        with self.assertRaises(ValueError):
+            g.GeradorCacaPalavras.desserializar(bytes(dados))
+
+    def test_dados_cortados(self):
+        dados = gerar(3).serializar()
+        # Cortes no cabeçalho, nas células, nos registros e no meio dos textos
+        for fim in range(len(dados)):
+            with self.assertRaises(ValueError, msg=fim):
+                g.GeradorCacaPalavras.desserializar(dados[:fim])
+
+    def test_dados_a_mais(self):
+        with self.assertRaises(ValueError):
+            g.GeradorCacaPalavras.desserializar(gerar(3).serializar() + b'\0')
+
+    def test_registro_invalido(self):
+        gerador = gerar(3)
+        inicio = g.CABECALHO_PUZZLE.size + gerador.tamanho ** 2
+        linha, coluna, direcao, comprimento = g.REGISTRO_PALAVRA.unpack_from(gerador.serializar(), inicio)
+        for registro in [(linha, coluna, len(g.DIRECOES), comprimento),
+                         (gerador.tamanho, coluna, direcao, comprimento),
+                         (linha, coluna, direcao, gerador.tamanho + 1),
+                         (linha, coluna, direcao, 0)]:
+            dados = bytearray(gerador.serializar())
+            g.REGISTRO_PALAVRA.pack_into(dados, inicio, *registro)
+            with self.assertRaises(ValueError, msg=registro):
+                g.GeradorCacaPalavras.desserializar(bytes(dados))
+
+    def test_texto_corrompido(self):
+        dados = bytearray(gerar(3).serializar())
+        # Comprimento do último texto maior do que o que sobrou
+        ultimo = len(dados) - len(PALAVRAS[-1].encode('utf-8')) - 2
+        struct.pack_into('<H', dados, ultimo, 500)
+        with self.assertRaises(ValueError):
+            g.GeradorCacaPalavras.desserializar(bytes(dados))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import gerador_caca_palavras as g
+import lote_caca_palavras as lote
+
+
+def escrever_jsonl(caminho, inicio, quantidade):
+    """Acrescenta `quantidade` puzzles PNG pequenos ao JSONL"""
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        for numero in range(inicio, inicio + quantidade):
+            arquivo.write(json.dumps({'nome': f'p{numero}', 'palavras': ['CASA', 'BOLA'], 'tamanho': 6,
+                                      'formato': '.png', 'incluir_gabarito': False, 'dpi': 50,
+                                      'semente': numero}) + '\n')
+
+
+class TestEspecificacao(unittest.TestCase):
+
+    def test_booleanos_em_texto(self):
+        for falso in (False, 0, 'false', 'False', '0', 'não', 'no'):
+            spec = lote.normalizar_especificacao({'palavras': ['CASA'], 'usar_contrarias': falso,
+                                                  'incluir_gabarito': falso}, 0)
+            self.assertIs(spec['usar_contrarias'], False, falso)
+            self.assertIs(spec['incluir_gabarito'], False, falso)
+        for verdadeiro in (True, 1, 'true', '1', 'sim'):
+            spec = lote.normalizar_especificacao({'palavras': ['CASA'], 'usar_diagonais': verdadeiro}, 0)
+            self.assertIs(spec['usar_diagonais'], True, verdadeiro)
+
+    def test_booleano_invalido(self):
+        for valor in ('talvez', '', 2, None, ['false']):
+            with self.assertRaises(ValueError):
+                lote.normalizar_especificacao({'palavras': ['CASA'], 'usar_diagonais': valor}, 0)
+        with self.assertRaises(ValueError):
+            lote.normalizar_especificacao({'palavras': ['CASA'], 'formato': '.jpeg', 'progressivo': 'x'}, 0)
+
+    def test_booleano_invalido_no_csv_vira_erro_da_linha(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'puzzles.csv')
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                arquivo.write('palavras,usar_diagonais\nCASA;BOLA,false\nCASA,talvez\n')
+            lidas = list(lote.ler_especificacoes(caminho))
+        self.assertIs(lidas[0][1]['usar_diagonais'], False)
+        self.assertEqual(lidas[1][0], 2)
+        self.assertIsInstance(lidas[1][1], ValueError)
+
+
+@unittest.skipUnless(g.PILLOW_DISPONIVEL, "Pillow não instalado")
+class TestRetomada(unittest.TestCase):
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.pasta = self._pasta.name
+        self.entrada = os.path.join(self.pasta, 'puzzles.jsonl')
+        self.checkpoint = os.path.join(self.pasta, 'progresso.json')
+        self.saida = os.path.join(self.pasta, 'saida')
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def executar(self, interromper_em=None):
+        """Roda o lote retomando do checkpoint; devolve as linhas concluídas"""
+        linhas = []
+
+        def ao_concluir(resultado):
+            if resultado['linha'] == interromper_em:
+                raise KeyboardInterrupt
+            self.assertTrue(resultado['ok'], resultado.get('erro'))
+            linhas.append(resultado['linha'])
+
+        progresso = lote.ProgressoLote(self.checkpoint, self.entrada)
+        # Uma vaga na janela: os puzzles terminam na ordem das linhas
+        lote.executar_lote_streaming(lote.ler_especificacoes(self.entrada), self.saida, 1, 1,
+                                     progresso, ao_concluir)
+        return linhas
+
+    def test_retoma_depois_da_interrupcao(self):
+        escrever_jsonl(self.entrada, 1, 6)
+        with self.assertRaises(KeyboardInterrupt):
+            self.executar(interromper_em=4)
+        with open(self.checkpoint, encoding='utf-8') as arquivo:
+            self.assertEqual(json.load(arquivo)['linha'], 3)
+
+        # A linha interrompida não foi marcada: volta a ser gerada, e só ela se repete
+        self.assertEqual(self.executar(), [4, 5, 6])
+        self.assertEqual(sorted(os.listdir(self.saida)), [f'p{n}.png' for n in range(1, 7)])
+        self.assertEqual(self.executar(), [])
+
+    def test_checkpoint_de_outro_arquivo(self):
+        escrever_jsonl(self.entrada, 1, 1)
+        self.executar()
+        with self.assertRaises(ValueError):
+            lote.ProgressoLote(self.checkpoint, os.path.join(self.pasta, 'outro.jsonl'))
+
+    def test_relatorio_sem_linhas_repetidas(self):
+        relatorio = os.path.join(self.pasta, 'relatorio.jsonl')
+        argv = [self.entrada, '--saida', self.saida, '--processos', '1', '--checkpoint', self.checkpoint,
+                '--relatorio', relatorio]
+        escrever_jsonl(self.entrada, 1, 3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(lote.main(argv), 0)
+            # Linhas novas no fim da entrada: a segunda execução só gera essas
+            escrever_jsonl(self.entrada, 4, 2)
+            self.assertEqual(lote.main(argv), 0)
+        with open(relatorio, encoding='utf-8') as arquivo:
+            resultados = [json.loads(linha) for linha in arquivo]
+        self.assertEqual([r['linha'] for r in resultados], [1, 2, 3, 4, 5])
+        self.assertEqual(sorted(r['nome'] for r in resultados), [f'p{n}' for n in range(1, 6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import gerador_caca_palavras as g
+
+
+PALAVRAS = ['CASA', 'BOLA', 'GATO', 'PATO', 'MESA', 'CADEIRA', 'JANELA', 'ABACAXI',
+            'MELANCIA', 'PERA', 'UVA', 'LARANJA', 'LIMÃO', 'MORANGO', 'BANANA']
+
+BACKENDS = ['linhas', 'bits'] + (['numpy'] if g.NUMPY_DISPONIVEL else [])
+
+
+def montar(backend, semente, tamanho=12, usar_diagonais=True, preferir_sobreposicoes=False):
+    """Posiciona a lista de teste e devolve (gerador, não inseridas)"""
+    gerador = g.GeradorCacaPalavras(backend, semente=semente)
+    gerador.criar_grade_vazia(tamanho)
+    nao_inseridas = gerador.inserir_palavras(PALAVRAS, usar_diagonais, True,
+                                             preferir_sobreposicoes=preferir_sobreposicoes)
+    return gerador, nao_inseridas
+
+
+class TestPosicionamento(unittest.TestCase):
+
+    def test_palavras_gravadas_nas_posicoes(self):
+        for backend in BACKENDS:
+            gerador, _ = montar(backend, 7)
+            for info in gerador.palavras_posicoes:
+                texto = g.normalizar_palavra(info['palavra']).texto
+                self.assertEqual(''.join(gerador.grade[l][c] for l, c in info['posicoes']), texto)
+
+    def test_mesma_semente_mesmo_resultado(self):
+        for backend in BACKENDS:
+            primeiro, nao_inseridas = montar(backend, 3)
+            segundo, nao_inseridas_de_novo = montar(backend, 3)
+            self.assertEqual(primeiro.grade, segundo.grade)
+            self.assertEqual(primeiro.palavras_posicoes, segundo.palavras_posicoes)
+            self.assertEqual(nao_inseridas, nao_inseridas_de_novo)
+
+    def test_backends_equivalentes(self):
+        # Com a mesma semente, todos os backends escolhem as mesmas posições
+        for semente in range(12):
+            opcoes = {'tamanho': 8 if semente % 2 else 12, 'usar_diagonais': semente % 3 == 0,
+                      'preferir_sobreposicoes': semente % 4 == 0}
+            referencia, nao_inseridas = montar('linhas', semente, **opcoes)
+            for backend in BACKENDS[1:]:
+                gerador, outras = montar(backend, semente, **opcoes)
+                self.assertEqual(gerador.grade, referencia.grade, backend)
+                self.assertEqual(gerador.palavras_posicoes, referencia.palavras_posicoes, backend)
+                self.assertEqual(outras, nao_inseridas, backend)
+
+    def test_backends_equivalentes_em_grade_preenchida(self):
+        # colocar_palavra só escreve nas células vazias, em qualquer backend
+        cheia = [list('ESZYC'), list('IDPYO'), list('PUMZG'), list('DPAMN'), list('TYYAW')]
+        for backend in BACKENDS:
+            gerador = g.GeradorCacaPalavras(backend, semente=1)
+            gerador.criar_grade_vazia(5)
+            gerador.grade = [linha[:] for linha in cheia]
+            gerador.colocar_palavra('CASA', 0, 0, 0)
+            self.assertEqual(gerador.grade, cheia, backend)
+            self.assertEqual(gerador.palavras_posicoes[-1]['posicoes'],
+                             [(0, 0), (0, 1), (0, 2), (0, 3)], backend)
+
+    def test_preenchimento_igual_sem_numpy(self):
+        # O backend numpy sorteia o preenchimento em bloco; os outros letra a letra
+        linhas, _ = montar('linhas', 5)
+        bits, _ = montar('bits', 5)
+        linhas.preencher_espacos_vazios()
+        bits.preencher_espacos_vazios()
+        self.assertEqual(linhas.grade, bits.grade)
+
+    def test_grade_pequena_devolve_nao_inseridas(self):
+        gerador = g.GeradorCacaPalavras(semente=1)
+        gerador.criar_grade_vazia(4)
+        nao_inseridas = gerador.inserir_palavras(['CASA', 'MELANCIA'])
+        self.assertEqual(nao_inseridas, ['MELANCIA'])
+        self.assertEqual([info['palavra'] for info in gerador.palavras_posicoes], ['CASA'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import collections
+import unittest
+
+import gerador_caca_palavras as g
+
+
+PALAVRAS = ['CASA', 'BOLA', 'GATO', 'PATO', 'MESA', 'SOL', 'LUA', 'MAR', 'RIO', 'PERA', 'UVA']
+
+# Bloqueadas com letras que não aparecem nas palavras: só o preenchimento pode formá-las
+BLOQUEADAS = ['QW', 'ZK', 'XJ']
+
+BACKENDS = ['linhas', 'bits'] + (['numpy'] if g.NUMPY_DISPONIVEL else [])
+
+
+def preenchido(backend, semente, bloqueadas=g.PALAVRAS_BLOQUEADAS):
+    gerador = g.GeradorCacaPalavras(backend, semente=semente)
+    gerador.criar_grade_vazia(10)
+    gerador.inserir_palavras(PALAVRAS, True, True)
+    gerador.preencher_espacos_vazios(bloqueadas)
+    return gerador
+
+
+def ocorrencias(gerador, bloqueadas=()):
+    """{(texto, células)} encontradas na grade"""
+    return {(texto, frozenset(celulas)) for texto, celulas in gerador.encontrar_palavras(bloqueadas=bloqueadas)}
+
+
+def colocadas(gerador):
+    return {(g.normalizar_palavra(info['palavra']).texto, frozenset(info['posicoes']))
+            for info in gerador.palavras_posicoes}
+
+
+class TestPreenchimento(unittest.TestCase):
+
+    def test_sem_celulas_vazias(self):
+        for backend in BACKENDS:
+            gerador = preenchido(backend, 1)
+            self.assertTrue(all(letra is not None for linha in gerador.grade for letra in linha))
+
+    def test_sem_ocorrencias_repetidas(self):
+        # Palavras curtas em grade pequena: sem a correção, o preenchimento repete várias
+        for backend in BACKENDS:
+            for semente in range(10):
+                gerador = preenchido(backend, semente)
+                self.assertEqual(ocorrencias(gerador), colocadas(gerador), (backend, semente))
+
+    def test_sem_palavras_bloqueadas(self):
+        for backend in BACKENDS:
+            for semente in range(10):
+                gerador = preenchido(backend, semente, BLOQUEADAS)
+                self.assertEqual(ocorrencias(gerador, BLOQUEADAS), colocadas(gerador), (backend, semente))
+
+    def test_letras_das_palavras_intactas(self):
+        gerador = g.GeradorCacaPalavras(semente=8)
+        gerador.criar_grade_vazia(10)
+        gerador.inserir_palavras(PALAVRAS, True, True)
+        antes = [linha[:] for linha in gerador.grade]
+        gerador.preencher_espacos_vazios(BLOQUEADAS)
+        for l, linha in enumerate(antes):
+            for c, letra in enumerate(linha):
+                if letra is not None:
+                    self.assertEqual(gerador.grade[l][c], letra)
+
+    def test_encontrar_palavras_avulsas(self):
+        gerador = g.GeradorCacaPalavras()
+        gerador.tamanho = 3
+        gerador.grade = [list('SOL'), list('XAX'), list('XXX')]
+        encontradas = collections.Counter(texto for texto, _ in gerador.encontrar_palavras(['sol', 'LOS', 'OA']))
+        self.assertEqual(encontradas, {'SOL': 1, 'LOS': 1, 'OA': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+import gerador_caca_palavras as g
+import servidor_caca_palavras as servidor_http
+
+
+class TestServidor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Porta 0: o sistema escolhe uma porta livre
+        cls.servidor = servidor_http.ServidorCacaPalavras(('127.0.0.1', 0), processos=1, limite_fila=1)
+        cls.url = f"http://127.0.0.1:{cls.servidor.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.servidor.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        cls.thread.join()
+
+    def pedir(self, dados):
+        """Faz POST /gerar; devolve (status, cabeçalhos, corpo)"""
+        pedido = urllib.request.Request(self.url + '/gerar', json.dumps(dados).encode('utf-8'),
+                                        {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(pedido, timeout=60) as resposta:
+                return resposta.status, resposta.headers, resposta.read()
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, e.headers, e.read()
+
+    def esperar_fila_vazia(self):
+        # A vaga é devolvida pelo callback do futuro, que pode rodar logo depois da resposta
+        limite = time.time() + 10
+        while self.servidor.em_andamento and time.time() < limite:
+            time.sleep(0.01)
+        self.assertEqual(self.servidor.em_andamento, 0)
+
+    @unittest.skipUnless(g.PILLOW_DISPONIVEL, "Pillow não instalado")
+    def test_gera_o_arquivo_e_libera_a_vaga(self):
+        # A fila tem uma vaga só: o segundo pedido passa porque o primeiro a devolveu
+        for semente in (1, 2):
+            status, cabecalhos, corpo = self.pedir({'palavras': ['CASA', 'BOLA'], 'tamanho': 8, 'formato': '.png',
+                                                    'incluir_gabarito': False, 'dpi': 50, 'semente': semente})
+            self.assertEqual(status, 200)
+            self.assertEqual(cabecalhos['Content-Type'], 'image/png')
+            self.assertTrue(corpo.startswith(b'\x89PNG'))
+            self.esperar_fila_vazia()
+
+    def test_pedido_invalido(self):
+        for dados in ({'palavras': []}, {'palavras': ['CASA'], 'tamanho': 1},
+                      {'palavras': ['CASA'], 'usar_diagonais': 'talvez'}, ['CASA']):
+            status, _, corpo = self.pedir(dados)
+            self.assertEqual(status, 400, dados)
+            self.assertIn('erro', json.loads(corpo))
+        self.assertEqual(self.servidor.em_andamento, 0)
+
+    def test_fila_cheia(self):
+        self.assertTrue(self.servidor.reservar_vaga())
+        try:
+            status, cabecalhos, corpo = self.pedir({'palavras': ['CASA', 'BOLA'], 'tamanho': 8})
+        finally:
+            self.servidor.liberar_vaga()
+        self.assertEqual(status, 429)
+        self.assertEqual(cabecalhos['Retry-After'], '1')
+        self.assertIn('erro', json.loads(corpo))
+        self.assertGreaterEqual(self.servidor.metricas.resumo()['contadores']['rejeitados'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
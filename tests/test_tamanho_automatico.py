@@ -0,0 +1,89 @@
+import unittest
+
+import gerador_caca_palavras as g
+
+
+# (palavras, usar_diagonais, usar_contrarias, menor tamanho possível)
+CASOS = [
+    (['VACA', 'LIVRO', 'SOL', 'UVA', 'FLOR', 'PEIXE', 'PERA', 'BOLA', 'OVO'], False, False, 6),
+    (['SOL', 'AREIA', 'MESA', 'VACA', 'PEIXE', 'LEAO', 'NUVEM', 'ARARA', 'UVA', 'PATO'], False, True, 6),
+    (['CASA', 'PEIXE', 'ARARA', 'URSO', 'SAL', 'CEU', 'VENTO', 'AREIA', 'UVA'], True, True, 6),
+    (['BOLA', 'AREIA', 'NOITE', 'MAR', 'FOCA', 'FOLHA', 'PEIXE', 'LAPIS'], True, True, 6),
+    # 30 letras em 25 células, com poucos cruzamentos possíveis
+    (['ABCDE', 'FGHIJ', 'KLMNO', 'PQRST', 'UVWXY', 'ZABCD'], False, False, 6),
+]
+
+
+def cabe(palavras, tamanho, direcoes):
+    """Busca exaustiva: True se existe algum arranjo das palavras na grade"""
+    textos = sorted((g.normalizar_palavra(p).texto for p in palavras), key=len, reverse=True)
+    # Posições de cada palavra como [(índice da célula, letra)]
+    opcoes = []
+    for texto in textos:
+        posicoes = []
+        for direcao in direcoes:
+            passo_l, passo_c = g.DIRECOES[direcao]
+            for l in range(tamanho):
+                for c in range(tamanho):
+                    fim_l, fim_c = l + (len(texto) - 1) * passo_l, c + (len(texto) - 1) * passo_c
+                    if 0 <= fim_l < tamanho and 0 <= fim_c < tamanho:
+                        posicoes.append([((l + i * passo_l) * tamanho + c + i * passo_c, letra)
+                                         for i, letra in enumerate(texto)])
+        opcoes.append(posicoes)
+    grade = [None] * (tamanho * tamanho)
+
+    def colocar(k):
+        if k == len(opcoes):
+            return True
+        for posicao in opcoes[k]:
+            novas = []
+            for i, letra in posicao:
+                if grade[i] is None:
+                    novas.append(i)
+                elif grade[i] != letra:
+                    break
+            else:
+                for i, letra in posicao:
+                    grade[i] = letra
+                if colocar(k + 1):
+                    return True
+                for i in novas:
+                    grade[i] = None
+        return False
+
+    return colocar(0)
+
+
+class TestTamanhoAutomatico(unittest.TestCase):
+
+    def test_tamanho_escolhido_e_o_menor(self):
+        for palavras, usar_diagonais, usar_contrarias, menor in CASOS:
+            direcoes = g.direcoes_disponiveis(usar_diagonais, usar_contrarias)
+            # Nenhum arranjo cabe em uma grade menor
+            self.assertFalse(cabe(palavras, menor - 1, direcoes), palavras)
+            for semente in range(3):
+                gerador, nao_inseridas = g.posicionar_puzzle(palavras, g.TAMANHO_AUTOMATICO, usar_diagonais,
+                                                             usar_contrarias, semente)
+                self.assertEqual(gerador.tamanho, menor, (palavras, semente))
+                self.assertEqual(nao_inseridas, [])
+                self.assertEqual([info['palavra'] for info in gerador.palavras_posicoes], palavras)
+                for info in gerador.palavras_posicoes:
+                    letras = ''.join(gerador.grade[l][c] for l, c in info['posicoes'])
+                    self.assertEqual(letras, g.normalizar_palavra(info['palavra']).texto)
+
+    def test_palavra_mais_longa_define_o_tamanho(self):
+        gerador, _ = g.buscar_tamanho_minimo(['ABACAXI', 'UVA', 'PERA'], semente=1)
+        self.assertEqual(gerador.tamanho, 7)
+        gerador, _ = g.buscar_tamanho_minimo(['UVA', 'PERA'], semente=1)
+        self.assertEqual(gerador.tamanho, g.TAMANHO_MINIMO)
+
+    def test_mesma_semente_mesmo_tamanho(self):
+        palavras = ['CASA', 'BOLA', 'GATO', 'PATO', 'MESA', 'CADEIRA', 'JANELA', 'ABACAXI', 'MELANCIA']
+        primeiro, _ = g.buscar_tamanho_minimo(palavras, True, True, semente=4)
+        segundo, _ = g.buscar_tamanho_minimo(palavras, True, True, semente=4)
+        self.assertEqual(primeiro.grade, segundo.grade)
+        self.assertEqual(primeiro.palavras_posicoes, segundo.palavras_posicoes)
+
+
+if __name__ == '__main__':
+    unittest.main()